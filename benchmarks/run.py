@@ -0,0 +1,263 @@
+"""
+Замеры производительности по этапам: разбор CSV, анализ (построчный,
+колоночный, потоковый), построение графиков, рекомендации и HTML-отчеты.
+Для каждого этапа записываются время выполнения и пиковая память
+(tracemalloc), результат сравнивается с сохраненной базовой линией.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run --sizes set match 100k --save-baseline
+    python -m benchmarks.run --sizes set match 100k          # сравнение с базовой линией
+    python -m benchmarks.run --sizes 10m --stages read_csv analyze_columnar
+
+Код возврата 1 означает, что найдена регрессия.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from tennis_analytics.charts import (
+    create_key_shots_chart,
+    create_momentum_chart,
+    create_rally_stats_chart,
+    create_serve_stats_chart,
+    create_serve_zones_chart,
+    create_shot_combinations_chart,
+    create_shot_types_chart,
+)
+from tennis_analytics.encoding import encode_match_events
+from tennis_analytics.engine import analyze_match_data, analyze_match_data_columnar, analyze_match_data_streaming
+from tennis_analytics.parallel import analyze_match_data_parallel
+from tennis_analytics.recommendations import generate_match_recommendations
+from tennis_analytics.report import render_player_report
+from tennis_analytics.synthetic import write_match_csv
+from tennis_analytics.timeline import point_timeline
+
+# Размер выборки: (число сетов одного матча, минимальное число строк)
+SIZES = {
+    'set': {'sets': 1},
+    'match': {'sets': None},
+    '100k': {'rows': 100_000},
+    '1m': {'rows': 1_000_000},
+    '10m': {'rows': 10_000_000},
+}
+
+DEFAULT_BASELINE = Path(__file__).with_name('baseline.json')
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / 'tennis_analytics_bench'
+
+# Построчный движок на больших файлах работает минутами, поэтому по
+# умолчанию он измеряется только до этого размера
+ROW_ENGINE_MAX_ROWS = 200_000
+
+CHART_COLORS = {'player1': '#0088FE', 'player2': '#FF8042'}
+
+def _build_charts(player_stats):
+    """
+    Строит все графики вкладки матча, как это делает приложение.
+    """
+    figures = [
+        create_serve_stats_chart(player_stats, CHART_COLORS),
+        create_rally_stats_chart(player_stats, CHART_COLORS),
+        create_shot_types_chart(player_stats, CHART_COLORS),
+    ]
+    for i, player in enumerate(player_stats):
+        color = CHART_COLORS[f'player{i % 2 + 1}']
+        figures.append(create_serve_zones_chart(player_stats, player, color))
+        figures.append(create_key_shots_chart(player_stats, player, color))
+        figures.append(create_shot_combinations_chart(player_stats, player, color))
+    return figures
+
+def _render_reports(player_stats):
+    """
+    Страницы HTML-отчетов игроков матча (без пула процессов и записи на диск).
+    """
+    recommendations = generate_match_recommendations(player_stats)
+    return [render_player_report(player, stats, recommendations[player]) for player, stats in player_stats.items()]
+
+# Этап получает контекст (путь к CSV и результаты предыдущих этапов)
+# и возвращает значение, которое сохраняется в контексте под именем этапа
+STAGES = {
+    'read_csv': lambda ctx: pd.read_csv(ctx['path']),
+    'encode': lambda ctx: encode_match_events(ctx['read_csv'].copy()),
+    'analyze_rows': lambda ctx: analyze_match_data(ctx['read_csv']),
+    'analyze_columnar': lambda ctx: analyze_match_data_columnar(ctx['read_csv']),
+    'analyze_encoded': lambda ctx: analyze_match_data_columnar(ctx['encode']),
+    'analyze_streaming': lambda ctx: analyze_match_data_streaming(ctx['path']),
+    # Пиковая память учитывает только основной процесс
+    'analyze_parallel': lambda ctx: analyze_match_data_parallel(ctx['encode']),
+    'charts': lambda ctx: _build_charts(ctx['analyze_columnar']),
+    'timeline': lambda ctx: point_timeline(ctx['read_csv']),
+    'momentum_chart': lambda ctx: create_momentum_chart(ctx['timeline'], CHART_COLORS).to_json(),
+    'recommendations': lambda ctx: generate_match_recommendations(ctx['analyze_columnar'], 'Подробная'),
+    'player_reports': lambda ctx: _render_reports(ctx['analyze_columnar']),
+}
+
+def prepare_data(size, seed, data_dir):
+    """
+    Возвращает путь к синтетическому CSV нужного размера, генерируя его
+    при первом запуске.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f'match_{size}_seed{seed}.csv'
+    if not path.exists():
+        tmp_path = path.with_suffix('.tmp')
+        write_match_csv(tmp_path, seed=seed, **SIZES[size])
+        tmp_path.replace(path)
+    return path
+
+def measure(stage, ctx, repeat):
+    """
+    Время - лучшее из repeat запусков без трассировки памяти, пиковая
+    память - отдельный запуск под tracemalloc (трассировка замедляет код
+    и исказила бы время).
+    """
+    func = STAGES[stage]
+    best = None
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = func(ctx)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {'seconds': round(best, 6), 'peak_mb': round(peak / 1024 ** 2, 3)}
+
+def run_benchmarks(sizes, stages, seed=0, repeat=3, data_dir=DEFAULT_DATA_DIR, row_engine_max_rows=ROW_ENGINE_MAX_ROWS):
+    """
+    Возвращает словарь {'размер/этап': {'seconds', 'peak_mb', 'rows'}}.
+    Этапы, от которых зависит выбранный этап, выполняются, но не записываются.
+    """
+    results = {}
+    for size in sizes:
+        path = prepare_data(size, seed, data_dir)
+        ctx = {'path': path}
+        needed = set(stages)
+        if needed & {'charts', 'recommendations', 'player_reports'}:
+            needed.add('analyze_columnar')
+        if 'momentum_chart' in needed:
+            needed.add('timeline')
+        if needed - {'read_csv', 'analyze_streaming'}:
+            needed.add('read_csv')
+        if needed & {'analyze_encoded', 'analyze_parallel'}:
+            needed.add('encode')
+
+        for stage in STAGES:
+            if stage not in needed:
+                continue
+            if stage == 'analyze_rows' and len(ctx['read_csv']) > row_engine_max_rows:
+                print(f'{size}/{stage}: пропущен ({len(ctx["read_csv"])} строк > {row_engine_max_rows})', file=sys.stderr)
+                continue
+            if stage in stages:
+                ctx[stage], metrics = measure(stage, ctx, repeat)
+                metrics['rows'] = len(ctx['read_csv']) if 'read_csv' in ctx else None
+                results[f'{size}/{stage}'] = metrics
+                print(f'{size}/{stage}: {metrics["seconds"]:.4f} с, {metrics["peak_mb"]:.1f} МБ', file=sys.stderr)
+            else:
+                ctx[stage] = STAGES[stage](ctx)
+    return results
+
+def compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.10, min_seconds=0.01):
+    """
+    Сравнивает замеры с базовой линией. Возвращает список регрессий -
+    строк с описанием. Очень короткие этапы (меньше min_seconds) по
+    времени не сравниваются: их разброс больше допуска.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if reference['seconds'] >= min_seconds and metrics['seconds'] > reference['seconds'] * (1 + time_tolerance):
+            regressions.append(
+                f'{key}: время {metrics["seconds"]:.4f} с против {reference["seconds"]:.4f} с '
+                f'(+{(metrics["seconds"] / reference["seconds"] - 1) * 100:.0f}%)'
+            )
+        if reference['peak_mb'] > 0 and metrics['peak_mb'] > reference['peak_mb'] * (1 + memory_tolerance):
+            regressions.append(
+                f'{key}: память {metrics["peak_mb"]:.1f} МБ против {reference["peak_mb"]:.1f} МБ '
+                f'(+{(metrics["peak_mb"] / reference["peak_mb"] - 1) * 100:.0f}%)'
+            )
+    return regressions
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))['results']
+
+def save_baseline(path, results):
+    """
+    Дописывает замеры в файл базовой линии (существующие ключи перезаписываются).
+    """
+    path = Path(path)
+    merged = load_baseline(path)
+    merged.update(results)
+    document = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': dict(sorted(merged.items())),
+    }
+    path.write_text(json.dumps(document, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Замеры производительности анализа матчей')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['set', 'match', '100k'], help='Размеры данных')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help='Измеряемые этапы')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора')
+    parser.add_argument('--repeat', type=int, default=3, help='Число запусков для замера времени')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Каталог сгенерированных CSV')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Файл базовой линии')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить замеры как базовую линию')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='Допустимый рост времени (доля)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='Допустимый рост памяти (доля)')
+    parser.add_argument('--row-engine-max-rows', type=int, default=ROW_ENGINE_MAX_ROWS,
+                        help='Максимальный размер данных для построчного движка')
+    parser.add_argument('-o', '--output', help='Записать замеры в JSON')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Предупреждения plotly о будущих изменениях pandas засоряют вывод замеров
+    warnings.filterwarnings('ignore', category=FutureWarning)
+    results = run_benchmarks(args.sizes, args.stages, args.seed, args.repeat, args.data_dir, args.row_engine_max_rows)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f'Базовая линия сохранена: {args.baseline}', file=sys.stderr)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f'Базовая линия {args.baseline} не найдена, сравнение пропущено', file=sys.stderr)
+        return 0
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for line in regressions:
+        print(f'РЕГРЕССИЯ {line}', file=sys.stderr)
+    if not regressions:
+        print('Регрессий не найдено', file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Аналитика теннисных матчей без зависимости от интерфейса Streamlit.
+
+Имена пакета загружаются лениво: импорт tennis_analytics ничего не
+загружает, а модуль с нужной функцией импортируется при первом обращении.
+"""
+import importlib
+
+_EXPORTS = {
+    'analyze_match_data': 'tennis_analytics.engine',
+    'analyze_match_data_columnar': 'tennis_analytics.engine',
+    'analyze_match_data_streaming': 'tennis_analytics.engine',
+    'StreamingMatchAnalyzer': 'tennis_analytics.engine',
+    'merge_player_stats': 'tennis_analytics.engine',
+    'analyze_match_data_parallel': 'tennis_analytics.parallel',
+    'encode_match_events': 'tennis_analytics.encoding',
+    'read_match_table': 'tennis_analytics.columnar_cache',
+    'BackgroundAnalysis': 'tennis_analytics.background',
+    'LiveMatchTail': 'tennis_analytics.live',
+    'parse_game_score': 'tennis_analytics.scoring',
+    'game_score_columns': 'tennis_analytics.scoring',
+    'PlayerStats': 'tennis_analytics.stats',
+    'PointIndex': 'tennis_analytics.points',
+    'point_timeline': 'tennis_analytics.timeline',
+    'analyze_match_batch': 'tennis_analytics.batch',
+    'generate_player_recommendations': 'tennis_analytics.recommendations',
+    'generate_match_recommendations': 'tennis_analytics.recommendations',
+    'generate_roster_recommendations': 'tennis_analytics.recommendations',
+    'thresholds': 'tennis_analytics.recommendations',
+    'export_player_reports': 'tennis_analytics.report',
+    'MemoryBudget': 'tennis_analytics.memory',
+    'MatchStore': 'tennis_analytics.store',
+    'LRUCache': 'tennis_analytics.cache',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
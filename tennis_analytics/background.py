@@ -0,0 +1,150 @@
+"""
+Анализ загруженного файла в фоновом потоке. Сценарий Streamlit не
+блокируется разбором CSV: файл читается частями, каждая часть сразу
+сворачивается StreamingMatchAnalyzer, а интерфейс при перезапусках читает
+прогресс (доля прочитанных байт, строки, розыгрыши) и статистику по уже
+обработанным частям. Отмена проверяется между частями.
+"""
+import io
+import threading
+
+import pandas as pd
+
+from tennis_analytics.encoding import encode_match_events
+from tennis_analytics.engine import StreamingMatchAnalyzer
+from tennis_analytics.memory import track_memory
+from tennis_analytics.points import PointIndex
+from tennis_analytics.timeline import point_timeline
+from tennis_analytics.timing import StageTimer
+
+class AnalysisCancelled(Exception):
+    """
+    Анализ остановлен вызовом cancel().
+    """
+
+class BackgroundAnalysis:
+    """
+    Фоновый анализ CSV матча по частям:
+
+        job = BackgroundAnalysis(file_bytes, chunksize=100_000).start()
+        job.progress()      # {'state', 'stage', 'fraction', 'rows', 'points'}
+        job.partial()       # статистика по обработанным строкам или None
+        job.cancel()
+
+    Состояние state: 'pending', 'running', 'done', 'cancelled' или 'failed'
+    (исключение - в error). После завершения result - кортеж
+    (df, player_stats, point_index, timeline), как в кэше приложения. При
+    keep_frame=False строки не сохраняются (df, индекс и ход матча - None),
+    и память не зависит от размера файла. При measure_memory в peak_memory
+    записывается пик памяти анализа (tracemalloc).
+    """
+    def __init__(self, data, chunksize=100_000, sequence_lengths=(), keep_frame=True, measure_memory=False):
+        self.data = data
+        self.size = len(data)
+        self.chunksize = chunksize
+        self.sequence_lengths = tuple(sequence_lengths)
+        self.keep_frame = keep_frame
+        self.measure_memory = measure_memory
+        self.peak_memory = None
+        self.state = 'pending'
+        self.error = None
+        self.result = None
+        self.timer = StageTimer()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = {'stage': 'read', 'fraction': 0.0, 'rows': 0, 'points': 0}
+        self._partial = None
+        self._thread = threading.Thread(target=self._run, name='tennis-analysis', daemon=True)
+
+    def start(self):
+        self.state = 'running'
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """
+        Просит остановить анализ; поток завершится после текущей части.
+        """
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """
+        Ждет завершения потока. Возвращает True, если он завершился.
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def progress(self):
+        with self._lock:
+            return dict(self._progress, state=self.state)
+
+    def partial(self):
+        """
+        Статистика по строкам, прочитанным к этому моменту (включая
+        незавершенный последний розыгрыш), или None до первой части.
+        """
+        with self._lock:
+            return self._partial
+
+    def _update(self, **fields):
+        with self._lock:
+            self._progress.update(fields)
+
+    def _check_cancelled(self):
+        if self._cancel.is_set():
+            raise AnalysisCancelled()
+
+    def _run(self):
+        try:
+            with track_memory(self.measure_memory) as memory:
+                self.result = self._analyze()
+            self.peak_memory = memory['peak']
+            self.state = 'done'
+        except AnalysisCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+        finally:
+            # Исходные байты больше не нужны
+            self.data = None
+
+    def _analyze(self):
+        analyzer = StreamingMatchAnalyzer(self.sequence_lengths)
+        source = io.BytesIO(self.data)
+        chunks = []
+
+        with self.timer.stage('stream_chunks') as record:
+            for chunk in pd.read_csv(source, chunksize=self.chunksize):
+                self._check_cancelled()
+                analyzer.feed(chunk)
+                if self.keep_frame:
+                    chunks.append(chunk)
+                # Снимок считается в рабочем потоке, интерфейс только читает готовый
+                partial = analyzer.result(include_pending=True)
+                with self._lock:
+                    self._partial = partial
+                    self._progress.update(
+                        fraction=min(source.tell() / max(self.size, 1), 1.0),
+                        rows=analyzer.rows_processed,
+                        points=analyzer.points_processed
+                    )
+            analyzer.flush()
+            record['rows'] = analyzer.rows_processed
+            record['points'] = analyzer.points_processed
+
+        with self.timer.stage('finalize_stats'):
+            player_stats = analyzer.result()
+        self._update(fraction=1.0, points=analyzer.points_processed)
+        if not self.keep_frame:
+            return None, player_stats, None, None
+
+        self._check_cancelled()
+        self._update(stage='point_index')
+        with self.timer.stage('point_index', rows=analyzer.rows_processed) as record:
+            df = encode_match_events(pd.concat(chunks, ignore_index=True)) if chunks else pd.DataFrame()
+            chunks.clear()
+            point_index = PointIndex(df)
+            timeline = point_timeline(point_index)
+            record['points'] = len(point_index)
+        return df, player_stats, point_index, timeline
@@ -0,0 +1,119 @@
+"""
+Пакетный анализ каталога или ZIP-архива с CSV-файлами матчей в пуле процессов.
+"""
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from tennis_analytics.columnar_cache import read_match_table
+from tennis_analytics.engine import ENGINES
+from tennis_analytics.stats import (
+    dumps_match_stats,
+    loads_match_stats,
+    merge_match_stats,
+    pack_match_stats,
+    unpack_match_stats,
+)
+
+def _is_directory(source):
+    return isinstance(source, (str, os.PathLike)) and Path(source).is_dir()
+
+def _archive_members(archive):
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith('.csv') and not info.filename.startswith('__MACOSX/')
+    ]
+
+def count_match_sources(source):
+    """
+    Возвращает число CSV-файлов матчей в каталоге или ZIP-архиве.
+    """
+    if _is_directory(source):
+        return sum(1 for _ in Path(source).rglob('*.csv'))
+    with zipfile.ZipFile(source) as archive:
+        return len(_archive_members(archive))
+
+def iter_match_sources(source):
+    """
+    Перечисляет CSV-файлы матчей как пары (имя, путь или содержимое).
+    source - путь к каталогу, путь к ZIP-архиву или файловый объект архива.
+    Файлы архива читаются по мере перебора.
+    """
+    if _is_directory(source):
+        for path in sorted(Path(source).rglob('*.csv')):
+            yield str(path.relative_to(source)), str(path)
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for info in _archive_members(archive):
+            yield info.filename, archive.read(info)
+
+def _analyze_match_file(name, data, engine):
+    """
+    Рабочая функция пула: читает один CSV (файлы каталога - через
+    колоночный кэш) и возвращает его статистику в компактном двоичном
+    виде, чтобы не передавать между процессами вложенные словари.
+    """
+    # Файлы из архива читаются однократно: кэш на них только занимал бы место
+    df = read_match_table(data, cache=not isinstance(data, bytes))
+    return name, dumps_match_stats(pack_match_stats(ENGINES[engine](df)))
+
+def analyze_match_batch(source, workers=None, engine='columnar', progress=None):
+    """
+    Анализирует все матчи из source параллельно и сводит результаты
+    в итоговую статистику сезона по каждому игроку.
+
+    Args:
+        source: Каталог с CSV-файлами или ZIP-архив
+        workers: Число рабочих процессов (по умолчанию - число ядер)
+        engine: Движок анализа ('columnar' или 'rows')
+        progress: Функция progress(done, total, elapsed), вызываемая после каждого матча
+
+    Returns:
+        Словарь с ключами 'matches' (статистика каждого матча), 'players'
+        (итоги по игрокам), 'errors', 'elapsed' и 'matches_per_second'.
+    """
+    total = count_match_sources(source)
+    workers = workers or os.cpu_count() or 1
+    packed = {}
+    errors = {}
+    started = time.perf_counter()
+
+    # spawn вместо fork: процесс Streamlit многопоточный
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = {}
+        queued = iter_match_sources(source)
+        # Ограничиваем число задач в очереди, чтобы не держать в памяти все файлы архива
+        for name, data in queued:
+            pending[executor.submit(_analyze_match_file, name, data, engine)] = name
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    packed[name] = loads_match_stats(future.result()[1])
+                except Exception as e:
+                    errors[name] = str(e)
+
+                if progress:
+                    progress(len(packed) + len(errors), total, time.perf_counter() - started)
+
+                next_source = next(queued, None)
+                if next_source is not None:
+                    pending[executor.submit(_analyze_match_file, *next_source, engine)] = next_source[0]
+
+    elapsed = time.perf_counter() - started
+    return {
+        'matches': {name: unpack_match_stats(match) for name, match in packed.items()},
+        'players': unpack_match_stats(merge_match_stats(packed.values())),
+        'errors': errors,
+        'elapsed': elapsed,
+        'matches_per_second': len(packed) / elapsed if elapsed > 0 else 0
+    }
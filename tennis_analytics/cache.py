@@ -0,0 +1,64 @@
+"""
+Потокобезопасный LRU-кэш и ключи для кэширования результатов анализа.
+"""
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением по числу записей и объему.
+    Сохраненные объекты используются только для чтения.
+    """
+    def __init__(self, max_entries=16, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # Вытесняем давно не использованные записи
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+def file_content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def stats_fingerprint(player_stats):
+    return hashlib.sha256(pickle.dumps(player_stats)).hexdigest()
@@ -0,0 +1,453 @@
+"""
+Построение графиков Plotly по статистике матча. Plotly импортируется
+внутри функций, поэтому загружается только при построении графика.
+"""
+import numpy as np
+import pandas as pd
+
+from tennis_analytics.sequences import top_sequences
+from tennis_analytics.timeline import minmax_indices
+
+def create_serve_stats_chart(player_stats, colors, height=400):
+    """
+    Создает график статистики подачи.
+    """
+    import plotly.express as px
+    
+    players = list(player_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for player in players:
+        data.append({
+            'Игрок': player,
+            'Показатель': 'Процент первой подачи',
+            'Значение': player_stats[player].get('first_serve_pct', 0)
+        })
+        data.append({
+            'Игрок': player,
+            'Показатель': 'Выигрыш на первой подаче (%)',
+            'Значение': player_stats[player].get('first_serve_won_pct', 0)
+        })
+        data.append({
+            'Игрок': player,
+            'Показатель': 'Выигрыш на второй подаче (%)',
+            'Значение': player_stats[player].get('second_serve_won_pct', 0)
+        })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Показатель', 
+        y='Значение', 
+        color='Игрок',
+        barmode='group',
+        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Статистика подачи',
+        xaxis_title=None,
+        yaxis_title='Процент (%)',
+        legend_title='Игрок',
+        yaxis_range=[0, 100]
+    )
+    
+    return fig
+
+def create_rally_stats_chart(player_stats, colors, height=400):
+    """
+    Создает график статистики розыгрышей по длине.
+    """
+    import plotly.express as px
+    
+    players = list(player_stats.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for player in players:
+        for rally_length in ['1-3', '4-6', '7-9', '10+']:
+            data.append({
+                'Игрок': player,
+                'Длина розыгрыша': rally_length,
+                'Процент выигрыша': player_stats[player].get(f'{rally_length}_rally_win_pct', 0)
+            })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.line(
+        df, 
+        x='Длина розыгрыша', 
+        y='Процент выигрыша', 
+        color='Игрок',
+        markers=True,
+        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Эффективность по длине розыгрыша',
+        xaxis_title='Количество ударов в розыгрыше',
+        yaxis_title='Процент выигранных розыгрышей (%)',
+        legend_title='Игрок',
+        yaxis_range=[0, 100]
+    )
+    
+    return fig
+
+def create_shot_types_chart(player_stats, colors, height=400):
+    """
+    Создает график распределения типов ударов.
+    """
+    import plotly.express as px
+    
+    players = list(player_stats.keys())
+    
+    # Собираем все типы ударов
+    all_shot_types = set()
+    for player in players:
+        shot_types = player_stats[player].get('shot_types', {})
+        all_shot_types.update(shot_types.keys())
+    
+    # Создаем данные для графика
+    data = []
+    for player in players:
+        shot_types = player_stats[player].get('shot_types', {})
+        total_shots = sum(shot_types.values()) if shot_types else 0
+        
+        for shot_type in all_shot_types:
+            if total_shots > 0:
+                percentage = shot_types.get(shot_type, 0) / total_shots * 100
+            else:
+                percentage = 0
+                
+            data.append({
+                'Игрок': player,
+                'Тип удара': shot_type,
+                'Процент': percentage
+            })
+    
+    df = pd.DataFrame(data)
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Тип удара', 
+        y='Процент', 
+        color='Игрок',
+        barmode='group',
+        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
+        height=height
+    )
+    
+    fig.update_layout(
+        title='Распределение типов ударов',
+        xaxis_title=None,
+        yaxis_title='Процент (%)',
+        legend_title='Игрок'
+    )
+    
+    return fig
+
+def create_serve_zones_chart(player_stats, player, color, height=400, resolution=100):
+    """
+    Создает тепловую карту зон подачи для игрока.
+    resolution - число узлов сетки по каждой стороне корта.
+    """
+    import plotly.graph_objects as go
+    
+    # Получаем данные о зонах подачи
+    serve_zones = player_stats[player].get('serve_zones', {})
+    total_serves = sum(serve_zones.values()) if serve_zones else 0
+    
+    # Стандартное теннисное поле (упрощенно)
+    court_x = np.linspace(0, 1, resolution)
+    court_y = np.linspace(0, 1, resolution)
+    Z = np.zeros((resolution, resolution))
+    
+    # Заполняем тепловую карту на основе данных о зонах
+    # Здесь используется упрощенная модель, в реальном приложении нужно
+    # соотносить названия зон с координатами на корте
+    zone_to_coords = {
+        "Wide": (0.2, 0.8),  # Широкая подача
+        "Body": (0.5, 0.8),  # Подача в корпус
+        "T": (0.8, 0.8),     # Подача по центральной линии
+        "Center": (0.5, 0.5)  # Центр (для общих случаев)
+    }
+    
+    for zone, count in serve_zones.items():
+        if zone in zone_to_coords and total_serves > 0:
+            x, y = zone_to_coords[zone]
+            percentage = count / total_serves * 100
+            
+            # Добавляем "тепло" в тепловую карту. Гауссова функция
+            # exp(-10 * dist**2) раскладывается в произведение множителей
+            # по осям, поэтому ядро зоны - внешнее произведение двух векторов
+            kernel_x = np.exp(-10 * (court_x - x)**2)
+            kernel_y = np.exp(-10 * (court_y - y)**2)
+            Z += percentage * np.outer(kernel_y, kernel_x)
+    
+    # Создаем график
+    fig = go.Figure()
+    
+    # Добавляем тепловую карту
+    fig.add_trace(go.Heatmap(
+        z=Z,
+        x=court_x,
+        y=court_y,
+        colorscale=[[0, 'rgba(255,255,255,0)'], [1, color]],
+        showscale=False
+    ))
+    
+    # Добавляем разметку теннисного корта (упрощенно)
+    # Внешние границы
+    fig.add_shape(type="rect", x0=0, y0=0, x1=1, y1=1, line=dict(color="black"))
+    # Центральная линия
+    fig.add_shape(type="line", x0=0.5, y0=0, x1=0.5, y1=1, line=dict(color="black"))
+    
+    # Настраиваем макет
+    fig.update_layout(
+        title=f"Зоны подачи - {player}",
+        height=height,
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x", scaleratio=1),
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+    
+    return fig
+
+def create_key_shots_chart(player_stats, player, color, height=400):
+    """
+    Создает график эффективности ключевых ударов игрока.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    # Получаем данные о ключевых ударах
+    key_shots = player_stats[player].get('key_shots', {})
+    
+    # Создаем данные для графика
+    data = []
+    for shot_type, stats in key_shots.items():
+        if stats.get('total', 0) >= 2:  # Фильтруем удары с малым количеством наблюдений
+            data.append({
+                'Тип удара': shot_type,
+                'Процент успешности': stats.get('win_percentage', 0),
+                'Количество': stats.get('total', 0)
+            })
+    
+    # Сортируем по количеству
+    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Если данных нет, возвращаем пустой график
+    if df.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Эффективность ключевых ударов - {player}",
+            height=height,
+            xaxis_title="Нет данных",
+            yaxis_title="Нет данных"
+        )
+        return fig
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        x='Тип удара', 
+        y='Процент успешности',
+        color_discrete_sequence=[color],
+        text='Количество',
+        height=height
+    )
+    
+    fig.update_layout(
+        title=f"Эффективность ключевых ударов - {player}",
+        xaxis_title=None,
+        yaxis_title='Процент успешности (%)',
+        yaxis_range=[0, 100]
+    )
+    
+    # Добавляем линию среднего значения
+    avg = df['Процент успешности'].mean()
+    fig.add_shape(
+        type="line",
+        xref="paper", yref="y",
+        x0=0, y0=avg,
+        x1=1, y1=avg,
+        line=dict(
+            color="red",
+            width=2,
+            dash="dash",
+        )
+    )
+    
+    fig.add_annotation(
+        xref="paper", yref="y",
+        x=0.01, y=avg,
+        text=f"Среднее: {avg:.1f}%",
+        showarrow=False,
+        font=dict(color="red")
+    )
+    
+    return fig
+
+def create_shot_combinations_chart(player_stats, player, color, height=400, top_n=5, sequence_length=2):
+    """
+    Создает график эффективности комбинаций ударов игрока. При
+    sequence_length > 2 показываются последовательности из стольких
+    ударов (если они посчитаны движком).
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    # Получаем данные о комбинациях ударов
+    if sequence_length > 2:
+        combinations = player_stats[player].get('shot_sequences', {}).get(sequence_length, {})
+    else:
+        combinations = player_stats[player].get('shot_combinations', {})
+    
+    # Отбираем top_n по проценту успешности без сортировки всех комбинаций;
+    # комбинации с малым количеством наблюдений не учитываются
+    data = []
+    for combo, stats in top_sequences(combinations, top_n, min_count=3):
+        data.append({
+            'Комбинация': combo,
+            'Процент успешности': stats.get('win_percentage', 0),
+            'Количество': stats.get('count', 0)
+        })
+    
+    # Создаем DataFrame
+    df = pd.DataFrame(data)
+    
+    # Если данных нет, возвращаем пустой график
+    if df.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title=f"Топ комбинации ударов - {player}",
+            height=height,
+            xaxis_title="Нет данных",
+            yaxis_title="Нет данных"
+        )
+        return fig
+    
+    # Создаем график
+    fig = px.bar(
+        df, 
+        y='Комбинация', 
+        x='Процент успешности',
+        color_discrete_sequence=[color],
+        text='Количество',
+        height=height,
+        orientation='h'
+    )
+    
+    fig.update_layout(
+        title=(
+            f"Топ-{top_n} комбинаций ударов - {player}" if sequence_length == 2
+            else f"Топ-{top_n} последовательностей из {sequence_length} ударов - {player}"
+        ),
+        xaxis_title='Процент успешности (%)',
+        yaxis_title=None,
+        xaxis_range=[0, 100]
+    )
+    
+    return fig
+
+def create_momentum_chart(timeline, colors, height=400, max_points=2000):
+    """
+    Создает график хода матча по таблице point_timeline: накопленные
+    выигранные очки игроков, отметки брейков и серии взятых подач.
+    Используются WebGL-трассы (Scattergl), а каждый ряд прореживается
+    до max_points точек с сохранением минимумов и максимумов, поэтому
+    объем данных графика не зависит от длины матча.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    title = "Ход матча"
+    
+    # Если данных нет, возвращаем пустой график
+    if timeline.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title=title,
+            height=height,
+            xaxis_title="Нет данных",
+            yaxis_title="Нет данных"
+        )
+        return fig
+    
+    players = list(timeline['server'].cat.categories)
+    # Цвета схемы - у двух первых игроков, остальные (в сводке нескольких матчей) - по умолчанию
+    player_colors = dict(zip(players, [colors['player1'], colors['player2']]))
+    points = timeline['point'].to_numpy()
+    
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    
+    for player in players:
+        color = player_colors.get(player)
+        won = (timeline['winner'] == player).to_numpy().cumsum()
+        keep = minmax_indices(won, max_points)
+        fig.add_trace(go.Scattergl(
+            x=points[keep], y=won[keep], mode='lines', name=player,
+            line=dict(color=color), legendgroup=player
+        ), row=1, col=1)
+        
+        # Брейки: гейм, взятый игроком на подаче соперника
+        breaks = np.flatnonzero((timeline['break'] & (timeline['winner'] == player)).to_numpy())
+        keep = breaks[minmax_indices(won[breaks], max_points)]
+        fig.add_trace(go.Scattergl(
+            x=points[keep], y=won[keep], mode='markers', name=f"Брейки - {player}",
+            marker=dict(color=color, symbol='x', size=9), legendgroup=player
+        ), row=1, col=1)
+        
+        # Серия взятых подач меняется только в конце геймов на подаче игрока
+        games = timeline[(timeline['server'] == player) & timeline['hold_streak'].notna()]
+        streak = games['hold_streak'].to_numpy()
+        keep = minmax_indices(streak, max_points)
+        fig.add_trace(go.Scattergl(
+            x=games['point'].to_numpy()[keep], y=streak[keep], mode='lines', name=f"Серия подач - {player}",
+            line=dict(color=color, shape='hv', dash='dot'), legendgroup=player, showlegend=False
+        ), row=2, col=1)
+    
+    fig.update_layout(
+        title=title,
+        height=height,
+        legend_title='Игрок',
+        hovermode='x'
+    )
+    fig.update_yaxes(title_text='Выиграно очков', row=1, col=1)
+    fig.update_yaxes(title_text='Серия подач', rangemode='tozero', row=2, col=1)
+    fig.update_xaxes(title_text='Розыгрыш', row=2, col=1)
+    
+    return fig
+
+def cached_chart(cache, fingerprint, builder, player_stats, *args, height=400, **kwargs):
+    """
+    Возвращает график, построенный функцией builder, из кэша.
+    Ключ - (функция, отпечаток статистики, игрок, цвета и прочие параметры
+    построения); высота в ключ не входит, при ее изменении меняется только
+    макет готового графика.
+    """
+    key = (builder.__name__, fingerprint) + tuple(
+        tuple(sorted(arg.items())) if isinstance(arg, dict) else arg for arg in args
+    ) + tuple(sorted(kwargs.items()))
+    import plotly.io as pio
+    
+    figure_json = cache.get(key)
+    if figure_json is None:
+        fig = builder(player_stats, *args, height, **kwargs)
+        figure_json = fig.to_json()
+        cache.put(key, figure_json, len(figure_json))
+        return fig
+    
+    fig = pio.from_json(figure_json)
+    fig.update_layout(height=height)
+    return fig
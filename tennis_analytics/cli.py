@@ -0,0 +1,192 @@
+"""
+Консольный запуск анализа без интерфейса: статистика и рекомендации
+для одного или нескольких матчей записываются в JSON или Parquet,
+а HTML-отчеты по игрокам - в отдельный каталог.
+
+Пример:
+    python -m tennis_analytics.cli matches/ --output stats.parquet --workers 8
+    python -m tennis_analytics.cli matches/ --reports reports/ --workers 8
+    python -m tennis_analytics.cli matches/ --output - --store   # сохранить в историю матчей
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from tennis_analytics.engine import ENGINES
+from tennis_analytics.recommendations import generate_match_recommendations
+
+STAGES = ['read', 'analyze', 'recommend']
+
+def collect_match_files(paths):
+    """
+    Разворачивает аргументы командной строки в список CSV-файлов.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob('*.csv')))
+        else:
+            files.append(path)
+    return files
+
+def process_match(path, engine='columnar', detail_level='Средняя', use_cache=True):
+    """
+    Анализирует один матч. Возвращает (путь, статистика, рекомендации, время этапов).
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    if use_cache:
+        from tennis_analytics.columnar_cache import read_match_table
+        df = read_match_table(path)
+    else:
+        df = pd.read_csv(path)
+    timings['read'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    player_stats = ENGINES[engine](df)
+    timings['analyze'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    recommendations = generate_match_recommendations(player_stats, detail_level)
+    timings['recommend'] = time.perf_counter() - started
+
+    return str(path), player_stats, recommendations, timings
+
+def _stats_rows(results):
+    """
+    Плоская таблица для Parquet: строка на пару (матч, игрок), вложенные
+    словари статистики и рекомендации сохраняются как JSON-строки.
+    """
+    rows = []
+    for path, player_stats, recommendations, _ in results:
+        for player, stats in player_stats.items():
+            row = {'match': path, 'player': str(player)}
+            for key, value in stats.items():
+                row[key] = json.dumps(value, ensure_ascii=False) if isinstance(value, dict) else value
+            row['recommendations'] = json.dumps(recommendations[player], ensure_ascii=False)
+            rows.append(row)
+    return rows
+
+def write_results(results, output, output_format):
+    if output_format == 'parquet':
+        pd.DataFrame(_stats_rows(results)).to_parquet(output, index=False)
+        return
+
+    document = {
+        path: {
+            'player_stats': {str(player): stats for player, stats in player_stats.items()},
+            'recommendations': {str(player): recs for player, recs in recommendations.items()}
+        }
+        for path, player_stats, recommendations, _ in results
+    }
+    if output == '-':
+        json.dump(document, sys.stdout, ensure_ascii=False, indent=2, default=str)
+        sys.stdout.write('\n')
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2, default=str)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tennis_analytics.cli',
+        description='Анализ теннисных матчей без интерфейса Streamlit'
+    )
+    parser.add_argument('paths', nargs='+', help='CSV-файлы матчей или каталоги с ними')
+    parser.add_argument('-o', '--output', default='-', help='Файл результата (по умолчанию JSON в stdout)')
+    parser.add_argument('-f', '--format', choices=['json', 'parquet'], help='Формат результата (по умолчанию - по расширению файла)')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Число рабочих процессов')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='columnar', help='Движок анализа')
+    parser.add_argument('--detail', choices=['Минимальная', 'Средняя', 'Подробная'], default='Средняя',
+                        help='Детализация рекомендаций')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать колоночный кэш CSV')
+    parser.add_argument('--reports', metavar='DIR',
+                        help='Записать HTML-отчеты по игрокам (итоги всех матчей) в каталог')
+    parser.add_argument('--store', nargs='?', const='', metavar='DB',
+                        help='Сохранить матчи в хранилище истории SQLite (по умолчанию - общее хранилище приложения)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Печатать время этапов для каждого матча')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'json')
+    if output_format == 'parquet' and args.output == '-':
+        print('Для формата parquet нужно указать файл результата (--output)', file=sys.stderr)
+        return 2
+
+    files = collect_match_files(args.paths)
+    started = time.perf_counter()
+    options = (args.engine, args.detail, not args.no_cache)
+
+    results = []
+    errors = 0
+    if args.workers > 1:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+            futures = {path: executor.submit(process_match, path, *options) for path in files}
+            for path, future in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    errors += 1
+                    print(f'{path}: ошибка: {e}', file=sys.stderr)
+    else:
+        for path in files:
+            try:
+                results.append(process_match(path, *options))
+            except Exception as e:
+                errors += 1
+                print(f'{path}: ошибка: {e}', file=sys.stderr)
+
+    if args.verbose:
+        for path, _, _, timings in results:
+            stages = ', '.join(f'{stage} {timings[stage]:.3f} с' for stage in STAGES)
+            print(f'{path}: {stages}', file=sys.stderr)
+
+    write_started = time.perf_counter()
+    write_results(results, args.output, output_format)
+    write_time = time.perf_counter() - write_started
+
+    if args.reports:
+        from tennis_analytics.report import export_player_reports
+        from tennis_analytics.stats import merge_match_stats, unpack_match_stats
+
+        season = unpack_match_stats(merge_match_stats(player_stats for _, player_stats, _, _ in results))
+        export = export_player_reports(season, args.reports, workers=args.workers, detail_level=args.detail)
+        for player, error in export['errors'].items():
+            errors += 1
+            print(f'{player}: ошибка отчета: {error}', file=sys.stderr)
+        print(
+            f'Отчетов: {len(export["reports"])} в {args.reports}, '
+            f'{export["bytes"] / 2**20:.1f} МБ (Plotly JS {export["plotly_js_bytes"] / 2**20:.1f} МБ, '
+            f'страница ~{export["report_bytes"] / 2**10:.0f} КБ), {export["elapsed"]:.3f} с',
+            file=sys.stderr
+        )
+
+    if args.store is not None:
+        from tennis_analytics.store import DEFAULT_STORE_PATH, MatchStore
+
+        store = MatchStore(args.store or DEFAULT_STORE_PATH)
+        for path, player_stats, _, _ in results:
+            store.save_match(Path(path).read_bytes(), player_stats, source=path)
+        print(f'Сохранено матчей: {len(results)} в {store.path}', file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+
+    # Время этапов суммируется по матчам, поэтому при нескольких процессах
+    # сумма может превышать общее время работы
+    totals = {stage: sum(timings[stage] for *_, timings in results) for stage in STAGES}
+    stages = ', '.join(f'{stage} {totals[stage]:.3f} с' for stage in STAGES)
+    print(f'Матчей: {len(results)}, ошибок: {errors}', file=sys.stderr)
+    print(f'Этапы: {stages}, write {write_time:.3f} с', file=sys.stderr)
+    print(f'Всего: {elapsed:.3f} с ({len(results) / elapsed if elapsed > 0 else 0:.1f} матчей/с)', file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Дисковый кэш загруженных матчей в колоночном формате Arrow/Feather.
+CSV разбирается один раз, столбцы событий кодируются encode_match_events
+и сохраняются как словарные (категориальные), а повторные загрузки отображают файл в память вместо
+вызова pd.read_csv.
+"""
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from tennis_analytics.encoding import encode_match_events
+
+# Версия формата: при изменении схемы старые файлы кэша перестраиваются
+FORMAT_VERSION = 2
+
+MATCH_COLUMNS = ['Player_1', 'Serve', 'Serve Zone', 'Serve Result', 'Shot Type', 'Finish Type', 'Game Score']
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'TENNIS_COLUMNAR_CACHE_DIR', Path.home() / '.cache' / 'tennis_analytics' / 'columnar'
+))
+
+METADATA_KEY = b'tennis_analytics'
+
+def _column_dtypes(df):
+    return {column: str(df[column].dtype) for column in MATCH_COLUMNS if column in df.columns}
+
+def _write_table(df, path, metadata):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(metadata).encode()
+    table = table.replace_schema_metadata(schema_metadata)
+
+    # Запись во временный файл и атомарная замена, чтобы параллельные
+    # сессии не прочитали недописанный файл. Без сжатия, чтобы файл
+    # можно было отобразить в память
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def _read_table(path):
+    """
+    Читает файл кэша с отображением в память. Возвращает (df, метаданные).
+    """
+    # Буферы таблицы ссылаются на отображение, поэтому оно не закрывается явно
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    return table.to_pandas(), metadata
+
+def _is_valid(df, metadata, source_hash):
+    return (
+        metadata.get('version') == FORMAT_VERSION
+        and metadata.get('source_sha256') == source_hash
+        and metadata.get('dtypes') == _column_dtypes(df)
+    )
+
+def prune_cache(cache_dir=DEFAULT_CACHE_DIR, max_bytes=2 * 1024 ** 3):
+    """
+    Удаляет давно не использованные файлы кэша сверх лимита объема.
+    """
+    # Кэш чистят параллельно несколько процессов: файл может исчезнуть
+    # между перечислением каталога и чтением его атрибутов
+    files = []
+    for path in Path(cache_dir).glob('*.arrow'):
+        try:
+            files.append((path, path.stat()))
+        except FileNotFoundError:
+            continue
+    files.sort(key=lambda item: item[1].st_mtime, reverse=True)
+    total = 0
+    for path, stat in files:
+        total += stat.st_size
+        if total > max_bytes:
+            path.unlink(missing_ok=True)
+
+def read_match_table(source, cache_dir=DEFAULT_CACHE_DIR, cache=True):
+    """
+    Возвращает DataFrame матча, используя колоночный кэш.
+
+    Args:
+        source: Путь к CSV-файлу или его содержимое (bytes)
+        cache_dir: Каталог кэша
+        cache: False - только разобрать CSV, не читая и не записывая кэш
+            (для данных, которые больше не будут загружаться)
+
+    Файл кэша привязан к хэшу содержимого CSV: если исходный файл
+    изменился (или изменились типы столбцов), кэш перестраивается.
+    """
+    if not cache:
+        data = source if isinstance(source, bytes) else Path(source).read_bytes()
+        return encode_match_events(pd.read_csv(io.BytesIO(data)))
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(source, bytes):
+        data = source
+        source_hash = hashlib.sha256(data).hexdigest()
+        path = cache_dir / f'{source_hash}.arrow'
+    else:
+        data = Path(source).read_bytes()
+        source_hash = hashlib.sha256(data).hexdigest()
+        path = cache_dir / f'{hashlib.sha256(str(Path(source).resolve()).encode()).hexdigest()}.arrow'
+
+    if path.exists():
+        try:
+            df, metadata = _read_table(path)
+            if _is_valid(df, metadata, source_hash):
+                path.touch()
+                return df
+        except (pa.ArrowInvalid, OSError, ValueError):
+            pass
+
+    df = encode_match_events(pd.read_csv(io.BytesIO(data)))
+    _write_table(df, path, {
+        'version': FORMAT_VERSION,
+        'source_sha256': source_hash,
+        'dtypes': _column_dtypes(df)
+    })
+    # Файл кэша уже записан, поэтому ошибка очистки не должна прерывать чтение
+    try:
+        prune_cache(cache_dir)
+    except OSError:
+        pass
+    return df
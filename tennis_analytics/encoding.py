@@ -0,0 +1,57 @@
+"""
+Категориальное кодирование столбцов событий матча при загрузке.
+"""
+import numpy as np
+import pandas as pd
+
+# Фиксированные словари: синонимы сводятся к одному значению, а значения,
+# которые анализ не различает (например, '-' или 'Fault'), - к пропуску
+SERVE_ALIASES = {'1st': '1st', '1st Serve': '1st', '2nd': '2nd', '2nd Serve': '2nd'}
+SERVE_RESULT_ALIASES = {'In': 'In', 'In Play': 'In', 'Ace': 'Ace', 'Double Fault': 'Double Fault'}
+FINISH_TYPE_ALIASES = {'Winner': 'Winner', 'Forced Error': 'Forced Error', 'Unforced Error': 'Unforced Error'}
+
+FIXED_VOCABULARIES = {
+    'Serve': SERVE_ALIASES,
+    'Serve Result': SERVE_RESULT_ALIASES,
+    'Finish Type': FINISH_TYPE_ALIASES,
+}
+
+# Открытые словари: значения сохраняются, '-' считается пропуском
+OPEN_VOCABULARY_COLUMNS = ['Serve Zone', 'Shot Type', 'Game Score']
+
+FIRST_SERVE_VALUES = [alias for alias, value in SERVE_ALIASES.items() if value == '1st']
+SECOND_SERVE_VALUES = [alias for alias, value in SERVE_ALIASES.items() if value == '2nd']
+SERVE_IN_VALUES = [alias for alias, value in SERVE_RESULT_ALIASES.items() if value == 'In']
+ERROR_FINISH_TYPES = ['Forced Error', 'Unforced Error']
+
+def _encode_fixed(series, aliases):
+    categories = list(dict.fromkeys(aliases.values()))
+    values = series.astype('category')
+    # Таблица перекодировки: код исходной категории -> код в фиксированном словаре
+    recode = np.array(
+        [categories.index(aliases[v]) if isinstance(v, str) and v in aliases else -1 for v in values.cat.categories] + [-1]
+    )
+    return pd.Categorical.from_codes(recode[values.cat.codes.to_numpy()], categories=categories)
+
+def _encode_open(series):
+    values = series.astype('category')
+    if '-' in values.cat.categories:
+        values = values.cat.remove_categories(['-'])
+    return values
+
+def encode_match_events(df):
+    """
+    Переводит столбцы событий матча в категориальный тип и возвращает df
+    (столбцы заменяются на месте). Результат анализа не меняется, но
+    сравнения выполняются над целочисленными кодами, а память под
+    строковые столбцы сокращается в разы.
+    """
+    for column, aliases in FIXED_VOCABULARIES.items():
+        if column in df.columns:
+            df[column] = _encode_fixed(df[column], aliases)
+    for column in OPEN_VOCABULARY_COLUMNS:
+        if column in df.columns:
+            df[column] = _encode_open(df[column])
+    if 'Player_1' in df.columns:
+        df['Player_1'] = df['Player_1'].astype('category')
+    return df
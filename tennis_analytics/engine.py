@@ -0,0 +1,721 @@
+"""
+Разбор и агрегирование данных матча: построчный, колоночный и потоковый
+движки анализа. Модуль не зависит от интерфейса и может импортироваться
+из рабочих процессов.
+"""
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from tennis_analytics.encoding import (
+    ERROR_FINISH_TYPES,
+    FIRST_SERVE_VALUES,
+    SECOND_SERVE_VALUES,
+    SERVE_ALIASES,
+    SERVE_IN_VALUES,
+)
+from tennis_analytics.scoring import NO_FLAGS, game_score_flags, game_score_table
+from tennis_analytics.sequences import SEQUENCE_SEPARATOR, count_shot_ngrams
+from tennis_analytics.timing import NULL_TIMER
+
+SERVE_START_VALUES = list(SERVE_ALIASES)
+
+# Столбцы событий, которые читает колоночный движок (кроме Player_1)
+POINT_COLUMNS = ['Serve', 'Serve Zone', 'Serve Result', 'Shot Type', 'Finish Type', 'Game Score']
+
+def _init_player_stats(players):
+    """
+    Создает пустой словарь статистики с нулевыми счетчиками для каждого игрока.
+    """
+    player_stats = {player: {} for player in players}
+    
+    for player in players:
+        player_stats[player]['first_serve_total'] = 0
+        player_stats[player]['first_serve_in'] = 0
+        player_stats[player]['first_serve_won'] = 0
+        player_stats[player]['second_serve_total'] = 0
+        player_stats[player]['second_serve_in'] = 0
+        player_stats[player]['second_serve_won'] = 0
+        player_stats[player]['aces'] = 0
+        player_stats[player]['double_faults'] = 0
+        player_stats[player]['serve_zones'] = {}
+        player_stats[player]['shot_types'] = {}
+        player_stats[player]['shot_combinations'] = {}
+        player_stats[player]['points_by_rally_length'] = {'1-3': 0, '4-6': 0, '7-9': 0, '10+': 0}
+        player_stats[player]['wins_by_rally_length'] = {'1-3': 0, '4-6': 0, '7-9': 0, '10+': 0}
+        # Для анализа ключевых моментов
+        player_stats[player]['break_points'] = {'faced': 0, 'saved': 0, 'converted': 0}
+        player_stats[player]['game_points'] = {'faced': 0, 'saved': 0, 'converted': 0}
+        player_stats[player]['key_shots'] = {}
+        player_stats[player]['pressure_points_won'] = 0
+        player_stats[player]['pressure_points_total'] = 0
+    
+    return player_stats
+
+def _finalize_player_stats(player_stats, players):
+    """
+    Рассчитывает проценты и соотношения по накопленным счетчикам.
+    """
+    for player in players:
+        # Процент подач
+        if player_stats[player]['first_serve_total'] > 0:
+            player_stats[player]['first_serve_pct'] = round(
+                player_stats[player]['first_serve_in'] / player_stats[player]['first_serve_total'] * 100, 1
+            )
+        else:
+            player_stats[player]['first_serve_pct'] = 0
+            
+        if player_stats[player]['second_serve_total'] > 0:
+            player_stats[player]['second_serve_pct'] = round(
+                player_stats[player]['second_serve_in'] / player_stats[player]['second_serve_total'] * 100, 1
+            )
+        else:
+            player_stats[player]['second_serve_pct'] = 0
+            
+        # Процент выигранных очков на подаче
+        if player_stats[player]['first_serve_in'] > 0:
+            player_stats[player]['first_serve_won_pct'] = round(
+                player_stats[player]['first_serve_won'] / player_stats[player]['first_serve_in'] * 100, 1
+            )
+        else:
+            player_stats[player]['first_serve_won_pct'] = 0
+            
+        if player_stats[player]['second_serve_in'] > 0:
+            player_stats[player]['second_serve_won_pct'] = round(
+                player_stats[player]['second_serve_won'] / player_stats[player]['second_serve_in'] * 100, 1
+            )
+        else:
+            player_stats[player]['second_serve_won_pct'] = 0
+        
+        # Расчет процента выигранных розыгрышей по длине
+        for length in player_stats[player]['points_by_rally_length']:
+            if player_stats[player]['points_by_rally_length'][length] > 0:
+                player_stats[player][f'{length}_rally_win_pct'] = round(
+                    player_stats[player]['wins_by_rally_length'][length] / 
+                    player_stats[player]['points_by_rally_length'][length] * 100, 1
+                )
+            else:
+                player_stats[player][f'{length}_rally_win_pct'] = 0
+                
+        # Обобщенный показатель для длинных розыгрышей (4+ ударов)
+        long_rally_wins = sum(player_stats[player]['wins_by_rally_length'][l] 
+                            for l in ['4-6', '7-9', '10+'])
+        long_rally_points = sum(player_stats[player]['points_by_rally_length'][l] 
+                              for l in ['4-6', '7-9', '10+'])
+        
+        if long_rally_points > 0:
+            player_stats[player]['long_rally_win_pct'] = round(
+                long_rally_wins / long_rally_points * 100, 1
+            )
+        else:
+            player_stats[player]['long_rally_win_pct'] = 0
+        
+        # Расчет выигрышей комбинаций
+        for combo in player_stats[player]['shot_combinations']:
+            combo_stats = player_stats[player]['shot_combinations'][combo]
+            if combo_stats['count'] > 0:
+                combo_stats['win_percentage'] = round(
+                    combo_stats['wins'] / combo_stats['count'] * 100, 1
+                )
+            else:
+                combo_stats['win_percentage'] = 0
+                
+        # Последовательности из 3-5 ударов (считаются по запросу)
+        for sequences in player_stats[player].get('shot_sequences', {}).values():
+            for sequence_stats in sequences.values():
+                if sequence_stats['count'] > 0:
+                    sequence_stats['win_percentage'] = round(
+                        sequence_stats['wins'] / sequence_stats['count'] * 100, 1
+                    )
+                else:
+                    sequence_stats['win_percentage'] = 0
+                
+        # Расчет статистики по ключевым ударам
+        for shot_type in player_stats[player]['key_shots']:
+            shot_stats = player_stats[player]['key_shots'][shot_type]
+            if shot_stats['total'] > 0:
+                shot_stats['win_percentage'] = round(
+                    shot_stats['won'] / shot_stats['total'] * 100, 1
+                )
+            else:
+                shot_stats['win_percentage'] = 0
+                
+        # Процент выигранных очков под давлением
+        if player_stats[player]['pressure_points_total'] > 0:
+            player_stats[player]['pressure_points_pct'] = round(
+                player_stats[player]['pressure_points_won'] / player_stats[player]['pressure_points_total'] * 100, 1
+            )
+        else:
+            player_stats[player]['pressure_points_pct'] = 0
+
+def analyze_match_data(df, timer=NULL_TIMER):
+    """
+    Анализирует данные матча из CSV и возвращает статистику для обоих игроков.
+    timer (StageTimer) получает время разбиения на розыгрыши, подсчета и
+    расчета процентов.
+    """
+    started = time.perf_counter()
+    
+    # Получаем имена игроков
+    players = list(df['Player_1'].unique())
+    
+    # Инициализируем словарь для статистики
+    player_stats = _init_player_stats(players)
+    
+    # Группируем розыгрыши
+    points = []
+    current_point = None
+    
+    for _, row in df.iterrows():
+        # Начало нового розыгрыша
+        if isinstance(row['Serve'], str) and row['Serve'] in ['1st', '2nd', '1st Serve', '2nd Serve']:
+            if current_point:
+                points.append(current_point)
+            current_point = {'server': row['Player_1'], 'actions': [row.to_dict()]}
+        elif current_point:
+            current_point['actions'].append(row.to_dict())
+    
+    # Добавляем последний розыгрыш
+    if current_point:
+        points.append(current_point)
+    
+    timer.record('segment_points', time.perf_counter() - started, rows=len(df), points=len(points))
+    started = time.perf_counter()
+    
+    # Анализируем каждый розыгрыш
+    for point in points:
+        server = point['server']
+        returner = [p for p in players if p != server][0] if len(players) > 1 else None
+        
+        # Анализ подачи
+        first_serve = next((a for a in point['actions'] if isinstance(a.get('Serve'), str) and a['Serve'] in ['1st', '1st Serve']), None)
+        second_serve = next((a for a in point['actions'] if isinstance(a.get('Serve'), str) and a['Serve'] in ['2nd', '2nd Serve']), None)
+        
+        if first_serve is not None:
+            player_stats[server]['first_serve_total'] += 1
+            
+            # Анализ зоны подачи
+            serve_zone = first_serve.get('Serve Zone')
+            if isinstance(serve_zone, str) and serve_zone != '-':
+                if serve_zone not in player_stats[server]['serve_zones']:
+                    player_stats[server]['serve_zones'][serve_zone] = 0
+                player_stats[server]['serve_zones'][serve_zone] += 1
+            
+            serve_result = first_serve.get('Serve Result')
+            if isinstance(serve_result, str) and serve_result in ['In', 'In Play']:
+                player_stats[server]['first_serve_in'] += 1
+            elif isinstance(serve_result, str) and serve_result == 'Ace':
+                player_stats[server]['first_serve_in'] += 1
+                player_stats[server]['aces'] += 1
+                player_stats[server]['first_serve_won'] += 1
+        
+        if second_serve is not None:
+            player_stats[server]['second_serve_total'] += 1
+            
+            serve_result = second_serve.get('Serve Result')
+            if isinstance(serve_result, str) and serve_result in ['In', 'In Play']:
+                player_stats[server]['second_serve_in'] += 1
+            elif isinstance(serve_result, str) and serve_result == 'Double Fault':
+                player_stats[server]['double_faults'] += 1
+        
+        # Определение победителя розыгрыша
+        winner = None
+        last_action = point['actions'][-1]
+        
+        if isinstance(last_action.get('Finish Type'), str) and last_action['Finish Type'] == 'Winner':
+            winner = last_action['Player_1']
+        elif isinstance(last_action.get('Finish Type'), str) and last_action['Finish Type'] in ['Forced Error', 'Unforced Error']:
+            winner = [p for p in players if p != last_action['Player_1']][0] if len(players) > 1 else None
+        
+        # Анализ счета в гейме для определения ключевых моментов
+        game_score = None
+        for action in point['actions']:
+            if isinstance(action.get('Game Score'), str) and action['Game Score'] != '-':
+                game_score = action['Game Score']
+                break
+        
+        # Флаги ключевых моментов из таблицы разобранных значений счета
+        if game_score and returner:
+            is_break_point, is_game_point, is_pressure = game_score_flags(game_score)
+        else:
+            is_break_point, is_game_point, is_pressure = NO_FLAGS
+        
+        if is_break_point:
+            player_stats[server]['break_points']['faced'] += 1
+            player_stats[returner]['break_points']['faced'] += 1
+        if is_game_point:
+            player_stats[server]['game_points']['faced'] += 1
+        
+        # Обновляем статистику по ключевым моментам
+        if winner and (is_break_point or is_game_point):
+            if is_break_point:
+                if winner == returner:
+                    player_stats[returner]['break_points']['converted'] += 1
+                else:
+                    player_stats[server]['break_points']['saved'] += 1
+            
+            if is_game_point:
+                if winner == server:
+                    player_stats[server]['game_points']['converted'] += 1
+                else:
+                    player_stats[returner]['game_points']['saved'] += 1
+        
+        # Обновление статистики по победителю розыгрыша
+        if winner:
+            # Определяем длину розыгрыша
+            shot_count = sum(1 for a in point['actions'] if isinstance(a.get('Shot Type'), str) and a['Shot Type'] != '-')
+            
+            if shot_count <= 3:
+                rally_length = '1-3'
+            elif shot_count <= 6:
+                rally_length = '4-6'
+            elif shot_count <= 9:
+                rally_length = '7-9'
+            else:
+                rally_length = '10+'
+            
+            # Обновляем статистику по длине розыгрыша
+            for player in players:
+                player_stats[player]['points_by_rally_length'][rally_length] += 1
+            
+            # Отмечаем победителя
+            player_stats[winner]['wins_by_rally_length'][rally_length] += 1
+            
+            # Обновляем статистику подачи
+            if winner == server:
+                if first_serve and isinstance(first_serve.get('Serve Result'), str) and first_serve['Serve Result'] in ['In', 'In Play']:
+                    player_stats[server]['first_serve_won'] += 1
+                elif second_serve and isinstance(second_serve.get('Serve Result'), str) and second_serve['Serve Result'] in ['In', 'In Play']:
+                    player_stats[server]['second_serve_won'] += 1
+        
+        # Анализ типов ударов
+        for action in point['actions']:
+            shot_type = action.get('Shot Type')
+            if isinstance(shot_type, str) and shot_type != '-':
+                player = action['Player_1']
+                
+                if shot_type not in player_stats[player]['shot_types']:
+                    player_stats[player]['shot_types'][shot_type] = 0
+                player_stats[player]['shot_types'][shot_type] += 1
+                
+                # Анализ ключевых ударов
+                if is_break_point or is_game_point:
+                    if shot_type not in player_stats[player]['key_shots']:
+                        player_stats[player]['key_shots'][shot_type] = {'total': 0, 'won': 0}
+                    
+                    player_stats[player]['key_shots'][shot_type]['total'] += 1
+                    
+                    if winner == player:
+                        player_stats[player]['key_shots'][shot_type]['won'] += 1
+                
+                # Обновляем статистику по напряженным моментам
+                if is_pressure:
+                    player_stats[player]['pressure_points_total'] += 1
+                    if winner == player:
+                        player_stats[player]['pressure_points_won'] += 1
+        
+        # Анализ комбинаций ударов
+        for i in range(len(point['actions']) - 1):
+            curr_shot = point['actions'][i].get('Shot Type')
+            next_shot = point['actions'][i+1].get('Shot Type')
+            
+            if (isinstance(curr_shot, str) and curr_shot != '-' and 
+                isinstance(next_shot, str) and next_shot != '-'):
+                
+                player = point['actions'][i]['Player_1']
+                combo = f"{curr_shot} → {next_shot}"
+                
+                if combo not in player_stats[player]['shot_combinations']:
+                    player_stats[player]['shot_combinations'][combo] = {'count': 0, 'wins': 0}
+                
+                player_stats[player]['shot_combinations'][combo]['count'] += 1
+                
+                if winner == player:
+                    player_stats[player]['shot_combinations'][combo]['wins'] += 1
+    
+    timer.record('aggregate_points', time.perf_counter() - started, rows=len(df), points=len(points))
+    
+    # Рассчитываем проценты и соотношения
+    with timer.stage('finalize_stats'):
+        _finalize_player_stats(player_stats, players)
+
+    return player_stats
+
+def _encoded_column(df, column):
+    """
+    Возвращает столбец в виде целочисленных кодов и массива значений словаря.
+    Категориальные столбцы используются как есть, остальные кодируются
+    pd.factorize. Пропуски и отсутствующий столбец кодируются как -1.
+    """
+    if column not in df.columns:
+        return np.full(len(df), -1, dtype=np.int64), np.array([], dtype=object)
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64), series.cat.categories.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+def _lookup(values, predicate):
+    """
+    Таблица признака для значений словаря: учитываются только строки.
+    Последний элемент соответствует коду -1, поэтому таблицу можно
+    индексировать кодами напрямую.
+    """
+    return np.array([isinstance(v, str) and predicate(v) for v in values] + [False], dtype=bool)
+
+def _count_groups(keys, sizes, mask, weights=None):
+    """
+    Считает количество (и сумму весов) по группам целочисленных ключей
+    в порядке первого появления. sizes - число возможных значений каждого ключа.
+    """
+    flat = np.ravel_multi_index([key[mask] for key in keys], sizes)
+    uniques, first, inverse, counts = np.unique(flat, return_index=True, return_inverse=True, return_counts=True)
+    if weights is not None:
+        totals = np.bincount(inverse, weights=weights[mask], minlength=len(uniques))
+    else:
+        totals = np.zeros(len(uniques))
+    order = np.argsort(first)
+    groups = np.unravel_index(uniques[order], sizes)
+    return [
+        (tuple(int(g[i]) for g in groups), int(counts[j]), int(totals[j]))
+        for i, j in enumerate(order)
+    ]
+
+def _point_winners(player, finish_type, finish_values, last_row, other):
+    """
+    Победитель каждого розыгрыша по последнему действию: автор виннера
+    или соперник автора ошибки; -1, если определить нельзя.
+    """
+    last_player = player[last_row]
+    last_finish = finish_type[last_row]
+    winner = np.full(len(last_row), -1)
+    winner = np.where(_lookup(finish_values, lambda v: v == 'Winner')[last_finish], last_player, winner)
+    winner = np.where(_lookup(finish_values, lambda v: v in ERROR_FINISH_TYPES)[last_finish], other[last_player], winner)
+    return winner
+
+def _point_scores(point_id, game_score, score_values, n_points):
+    """
+    Код счета каждого розыгрыша: первое заполненное значение в нем (-1, если нет).
+    """
+    score_valid = _lookup(score_values, lambda v: v != '-')[game_score]
+    score_rows = np.flatnonzero(score_valid)
+    score_points, first_score_idx = np.unique(point_id[score_rows], return_index=True)
+    point_score = np.full(n_points, -1)
+    point_score[score_points] = game_score[score_rows[first_score_idx]]
+    return point_score
+
+def _point_score_flags(point_score, score_values, returner):
+    """
+    Флаги (брейк-пойнт, гейм-пойнт, напряженный момент) каждого розыгрыша
+    по коду его счета. Без известного принимающего ключевых моментов нет.
+    """
+    # Флаги берутся из таблицы, построенной один раз для каждого значения счета
+    flags = game_score_table(score_values)[point_score]
+    has_returner = returner >= 0
+    is_break_point = flags[:, 0] & has_returner
+    is_game_point = flags[:, 1] & has_returner
+    is_pressure = is_break_point | is_game_point | (flags[:, 2] & has_returner)
+    return is_break_point, is_game_point, is_pressure
+
+def analyze_match_data_columnar(df, timer=NULL_TIMER, sequence_lengths=()):
+    """
+    Колоночная версия analyze_match_data: вместо обхода строк присваивает
+    номера розыгрышей кумулятивной суммой по началам подач и считает
+    статистику группировками pandas/NumPy. Возвращает словарь того же вида;
+    при заданных sequence_lengths добавляется ключ 'shot_sequences'.
+    """
+    with timer.stage('aggregate_points', rows=len(df)) as record:
+        # Коды игроков в порядке первого появления (как у df['Player_1'].unique())
+        player_codes, uniques = pd.factorize(df['Player_1'], use_na_sentinel=False)
+        players = list(uniques)
+
+        player_stats = _init_player_stats(players)
+        record['points'] = _accumulate_columnar(df, player_codes, players, player_stats, sequence_lengths)
+
+    with timer.stage('finalize_stats'):
+        _finalize_player_stats(player_stats, players)
+
+    return player_stats
+
+def _encode_columns(df):
+    """
+    Коды и словари всех столбцов событий, которые читает колоночный движок.
+    """
+    return {name: _encoded_column(df, name) for name in POINT_COLUMNS}
+
+def _accumulate_columnar(df, player_codes, players, player_stats, sequence_lengths=()):
+    """
+    Добавляет счетчики по розыгрышам из df к накопленной статистике
+    (без расчета процентов). player_codes - номера игроков каждой строки
+    в списке players. Возвращает число учтенных розыгрышей.
+    sequence_lengths - дополнительные длины последовательностей ударов
+    (3-5), которые сохраняются в player_stats[игрок]['shot_sequences'][n].
+    """
+    return _accumulate_encoded(_encode_columns(df), player_codes, players, player_stats, sequence_lengths)
+
+def _accumulate_encoded(columns, player_codes, players, player_stats, sequence_lengths=()):
+    """
+    То же, что _accumulate_columnar, для уже закодированных столбцов
+    ({столбец: (коды, словарь)}, как возвращает _encode_columns).
+
+    Все сравнения выполняются над целочисленными кодами столбцов: признаки
+    вычисляются один раз для каждого значения словаря.
+    """
+    n_players = len(players)
+
+    serve, serve_values = columns['Serve']
+    is_start = _lookup(serve_values, lambda v: v in SERVE_START_VALUES)[serve]
+
+    # Номер розыгрыша для каждой строки; строки до первой подачи не входят ни в один розыгрыш
+    point_id = np.cumsum(is_start) - 1
+    in_point = point_id >= 0
+    n_points = int(is_start.sum())
+
+    if n_points == 0:
+        return 0
+
+    rows = np.flatnonzero(in_point)
+    point_id = point_id[rows]
+    player = np.asarray(player_codes)[rows]
+    serve = serve[rows]
+
+    def column(name):
+        codes, values = columns[name]
+        return codes[rows], values
+
+    serve_zone, zone_values = column('Serve Zone')
+    serve_result, result_values = column('Serve Result')
+    shot_type, shot_values = column('Shot Type')
+    finish_type, finish_values = column('Finish Type')
+    game_score, score_values = column('Game Score')
+
+    # Первая и последняя строка каждого розыгрыша
+    first_row = np.flatnonzero(is_start[rows])
+    last_row = np.append(first_row[1:] - 1, len(rows) - 1)
+
+    # Соперник игрока: первый игрок в списке, отличный от него
+    if n_players > 1:
+        other = np.where(np.arange(n_players) == 0, 1, 0)
+    else:
+        other = np.full(n_players, -1)
+
+    server = player[first_row]
+    returner = other[server]
+
+    # Подача
+    start_serve = serve[first_row]
+    start_result = serve_result[first_row]
+    first_serve = _lookup(serve_values, lambda v: v in FIRST_SERVE_VALUES)[start_serve]
+    second_serve = _lookup(serve_values, lambda v: v in SECOND_SERVE_VALUES)[start_serve]
+    serve_in = _lookup(result_values, lambda v: v in SERVE_IN_VALUES)[start_result]
+    ace = _lookup(result_values, lambda v: v == 'Ace')[start_result]
+    double_fault = _lookup(result_values, lambda v: v == 'Double Fault')[start_result]
+
+    # Победитель розыгрыша и флаги счета
+    winner = _point_winners(player, finish_type, finish_values, last_row, other)
+    has_winner = winner >= 0
+    point_score = _point_scores(point_id, game_score, score_values, n_points)
+    is_break_point, is_game_point, is_pressure = _point_score_flags(point_score, score_values, returner)
+    is_key_point = is_break_point | is_game_point
+
+    # Длина розыгрыша по числу ударов
+    shot_valid = _lookup(shot_values, lambda v: v != '-')[shot_type]
+    shot_count = np.bincount(point_id, weights=shot_valid, minlength=n_points)
+    rally_bucket = np.select([shot_count <= 3, shot_count <= 6, shot_count <= 9], [0, 1, 2], 3)
+    rally_lengths = ['1-3', '4-6', '7-9', '10+']
+
+    def per_player(mask, codes=server):
+        return np.bincount(codes[mask], minlength=n_players)
+
+    counters = {
+        'first_serve_total': per_player(first_serve),
+        'first_serve_in': per_player(first_serve & (serve_in | ace)),
+        'first_serve_won': per_player(first_serve & ace) + per_player(first_serve & serve_in & (winner == server)),
+        'second_serve_total': per_player(second_serve),
+        'second_serve_in': per_player(second_serve & serve_in),
+        'second_serve_won': per_player(second_serve & serve_in & (winner == server)),
+        'aces': per_player(first_serve & ace),
+        'double_faults': per_player(second_serve & double_fault),
+    }
+    break_faced = per_player(is_break_point) + per_player(is_break_point, returner)
+    break_converted = per_player(is_break_point & has_winner & (winner == returner), returner)
+    break_saved = per_player(is_break_point & has_winner & (winner != returner))
+    game_faced = per_player(is_game_point)
+    game_converted = per_player(is_game_point & has_winner & (winner == server))
+    game_saved = per_player(is_game_point & has_winner & (winner != server), returner)
+
+    rally_points = np.bincount(rally_bucket[has_winner], minlength=4)
+    rally_wins = np.bincount(winner[has_winner] * 4 + rally_bucket[has_winner], minlength=n_players * 4).reshape(n_players, 4)
+
+    # Удары: победитель розыгрыша, к которому относится каждая строка
+    row_won = winner[point_id] == player
+    row_pressure = shot_valid & is_pressure[point_id]
+    pressure_total = per_player(row_pressure, player)
+    pressure_won = per_player(row_pressure & row_won, player)
+
+    for code, name in enumerate(players):
+        stats = player_stats[name]
+        for key, values in counters.items():
+            stats[key] += int(values[code])
+        stats['break_points']['faced'] += int(break_faced[code])
+        stats['break_points']['saved'] += int(break_saved[code])
+        stats['break_points']['converted'] += int(break_converted[code])
+        stats['game_points']['faced'] += int(game_faced[code])
+        stats['game_points']['saved'] += int(game_saved[code])
+        stats['game_points']['converted'] += int(game_converted[code])
+        for i, length in enumerate(rally_lengths):
+            stats['points_by_rally_length'][length] += int(rally_points[i])
+            stats['wins_by_rally_length'][length] += int(rally_wins[code, i])
+        stats['pressure_points_won'] += int(pressure_won[code])
+        stats['pressure_points_total'] += int(pressure_total[code])
+
+    # Зоны первой подачи
+    start_zone = serve_zone[first_row]
+    zone_valid = first_serve & _lookup(zone_values, lambda v: v != '-')[start_zone]
+    for (code, zone), count, _ in _count_groups([server, start_zone], (n_players, len(zone_values)), zone_valid):
+        zones = player_stats[players[code]]['serve_zones']
+        zones[zone_values[zone]] = zones.get(zone_values[zone], 0) + count
+
+    # Типы ударов и ключевые удары
+    shot_sizes = (n_players, len(shot_values))
+    for (code, shot), count, _ in _count_groups([player, shot_type], shot_sizes, shot_valid):
+        shot_types = player_stats[players[code]]['shot_types']
+        shot_types[shot_values[shot]] = shot_types.get(shot_values[shot], 0) + count
+
+    key_rows = shot_valid & is_key_point[point_id]
+    for (code, shot), total, won in _count_groups([player, shot_type], shot_sizes, key_rows, row_won):
+        shot_stats = player_stats[players[code]]['key_shots'].setdefault(shot_values[shot], {'total': 0, 'won': 0})
+        shot_stats['total'] += total
+        shot_stats['won'] += won
+
+    # Комбинации ударов: соседние удары внутри одного розыгрыша
+    for n in sorted({2, *sequence_lengths}):
+        for (code, *shots), count, wins in count_shot_ngrams(
+            n, point_id, player, shot_type, shot_valid, row_won, n_players, len(shot_values)
+        ):
+            if n == 2:
+                sequences = player_stats[players[code]]['shot_combinations']
+            else:
+                sequences = player_stats[players[code]].setdefault('shot_sequences', {}).setdefault(n, {})
+            sequence_stats = sequences.setdefault(
+                SEQUENCE_SEPARATOR.join(shot_values[shot] for shot in shots), {'count': 0, 'wins': 0}
+            )
+            sequence_stats['count'] += count
+            sequence_stats['wins'] += wins
+
+    return n_points
+
+class StreamingMatchAnalyzer:
+    """
+    Накопительный анализ матча по частям. Каждая часть сразу сворачивается
+    в счетчики того же вида, что и player_stats, а незавершенный последний
+    розыгрыш переносится в следующую часть, поэтому пиковая память
+    ограничена размером части, а не размером файла.
+    """
+    def __init__(self, sequence_lengths=()):
+        self.sequence_lengths = tuple(sequence_lengths)
+        self.players = []
+        self.player_stats = {}
+        self.rows_processed = 0
+        self.points_processed = 0
+        self._pending = None
+    
+    def feed(self, chunk):
+        """
+        Добавляет очередную часть строк и учитывает завершенные в ней розыгрыши.
+        """
+        self.rows_processed += len(chunk)
+        self._register_players(chunk['Player_1'])
+        
+        frame = chunk if self._pending is None else pd.concat([self._pending, chunk], ignore_index=True)
+        serve, serve_values = _encoded_column(frame, 'Serve')
+        starts = np.flatnonzero(_lookup(serve_values, lambda v: v in SERVE_START_VALUES)[serve])
+        
+        # Строки до первой подачи не входят ни в один розыгрыш
+        if len(starts) == 0:
+            self._pending = None
+            return
+        
+        # Пока известен только один игрок, победителя по ошибке определить
+        # нельзя, поэтому розыгрыши копятся до появления соперника
+        if len(self.players) < 2:
+            self._pending = frame.iloc[starts[0]:]
+            return
+        
+        # Последний розыгрыш может продолжиться в следующей части
+        self._process(frame.iloc[starts[0]:starts[-1]])
+        self._pending = frame.iloc[starts[-1]:]
+    
+    def flush(self):
+        """
+        Учитывает последний (незавершенный) розыгрыш - вызывается в конце данных.
+        """
+        if self._pending is not None:
+            self._process(self._pending)
+            self._pending = None
+    
+    def result(self, include_pending=False):
+        """
+        Возвращает копию накопленной статистики с рассчитанными процентами.
+        При include_pending в копию добавляется и незавершенный последний
+        розыгрыш - так считает полный анализ данных, прочитанных к этому моменту.
+        """
+        player_stats = copy.deepcopy(self.player_stats)
+        if include_pending and self._pending is not None and len(self._pending) > 0:
+            player_codes = pd.Index(self.players).get_indexer(self._pending['Player_1'])
+            _accumulate_columnar(self._pending, player_codes, self.players, player_stats, self.sequence_lengths)
+        # Распределение по длине розыгрышей общее для всех игроков; игроки,
+        # появившиеся позже, получают его от первого игрока
+        if self.players:
+            rally_points = player_stats[self.players[0]]['points_by_rally_length']
+            for player in self.players[1:]:
+                player_stats[player]['points_by_rally_length'] = dict(rally_points)
+        _finalize_player_stats(player_stats, self.players)
+        return player_stats
+    
+    def _register_players(self, column):
+        known = pd.Index(self.players)
+        new_players = [p for p in pd.unique(column) if known.get_indexer([p])[0] < 0]
+        if new_players:
+            self.players.extend(new_players)
+            self.player_stats.update(_init_player_stats(new_players))
+    
+    def _process(self, frame):
+        if len(frame) == 0:
+            return
+        player_codes = pd.Index(self.players).get_indexer(frame['Player_1'])
+        self.points_processed += _accumulate_columnar(frame, player_codes, self.players, self.player_stats, self.sequence_lengths)
+
+def analyze_match_data_streaming(source, chunksize=100_000, timer=NULL_TIMER, sequence_lengths=()):
+    """
+    Анализирует CSV по частям по chunksize строк и возвращает статистику
+    того же вида, что и analyze_match_data.
+    """
+    analyzer = StreamingMatchAnalyzer(sequence_lengths)
+    # Чтение и подсчет чередуются по частям, поэтому замеряются вместе
+    with timer.stage('stream_chunks') as record:
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            analyzer.feed(chunk)
+        analyzer.flush()
+        record['rows'] = analyzer.rows_processed
+        record['points'] = analyzer.points_processed
+    with timer.stage('finalize_stats'):
+        return analyzer.result()
+
+# Движки анализа по имени (для пакетного режима и командной строки)
+ENGINES = {
+    'columnar': analyze_match_data_columnar,
+    'rows': analyze_match_data,
+}
+
+def merge_player_stats(stats_list):
+    """
+    Объединяет статистику нескольких матчей в итоговую по каждому игроку.
+    Складываются только исходные счетчики, а проценты пересчитываются
+    по суммам, а не усредняются.
+    """
+    # Модуль stats сам импортирует engine, поэтому импорт внутри функции
+    from tennis_analytics.stats import merge_match_stats, unpack_match_stats
+    return unpack_match_stats(merge_match_stats(stats_list))
@@ -0,0 +1,86 @@
+"""
+Анализ матча в реальном времени: CSV событий дописывается по ходу игры,
+а статистика обновляется только по новым строкам.
+"""
+import io
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from tennis_analytics.engine import StreamingMatchAnalyzer
+
+class LiveMatchTail:
+    """
+    Следит за дописываемым CSV матча. Запоминает смещение в файле, при
+    каждом опросе читает только дописанные полные строки и передает их
+    StreamingMatchAnalyzer, поэтому стоимость обновления пропорциональна
+    числу новых розыгрышей, а не длине матча.
+
+    Строка без завершающего перевода строки считается недописанной и
+    читается при следующем опросе. Если файл заменен или укорочен,
+    анализ начинается заново.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.header = None
+        self.analyzer = StreamingMatchAnalyzer()
+        self.last_new_rows = 0
+        self._file_id = None
+
+    @property
+    def rows(self):
+        return self.analyzer.rows_processed
+
+    @property
+    def points(self):
+        """
+        Число завершенных розыгрышей (последний, еще идущий, не учитывается).
+        """
+        return self.analyzer.points_processed
+
+    def poll(self):
+        """
+        Читает строки, дописанные после прошлого опроса. Возвращает их число.
+        """
+        stat = os.stat(self.path)
+        file_id = (stat.st_dev, stat.st_ino)
+        if self._file_id is not None and (file_id != self._file_id or stat.st_size < self.offset):
+            self.reset()
+        self._file_id = file_id
+        self.last_new_rows = 0
+
+        if stat.st_size == self.offset:
+            return 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        # Последняя строка может быть дописана не полностью
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+        data = data[:end]
+        self.offset += end
+
+        if self.header is None:
+            header_end = data.find(b'\n') + 1
+            self.header, data = data[:header_end], data[header_end:]
+        if not data.strip():
+            return 0
+
+        chunk = pd.read_csv(io.BytesIO(self.header + data))
+        self.analyzer.feed(chunk)
+        self.last_new_rows = len(chunk)
+        return self.last_new_rows
+
+    def result(self):
+        """
+        Текущая статистика с процентами, включая идущий розыгрыш.
+        """
+        return self.analyzer.result(include_pending=True)
@@ -0,0 +1,163 @@
+"""
+Бюджет памяти на анализ одного файла. До загрузки потребность в памяти
+оценивается по размеру файла и числу строк; если полный анализ не
+помещается в бюджет, выбирается потоковый анализ частями (память
+ограничена размером части) или анализ отклоняется. Фактический пик
+можно измерить tracemalloc (это заметно замедляет анализ), и он уточняет
+последующие оценки.
+"""
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Пиковая память на строку файла (байт), измеренная tracemalloc на
+# синтетических матчах: разбор CSV, хранимый закодированный DataFrame,
+# движки анализа и индекс розыгрышей с ходом матча
+ROW_BYTES = {
+    'read': 120,
+    'frame': 10,
+    'columnar': 200,
+    'parallel': 220,
+    'rows': 420,
+    'point_index': 70,
+}
+
+# Пик потокового анализа: постоянная часть (буферы разбора CSV) и
+# память на строку части (разбор части и ее свертка)
+STREAMING_BASE_BYTES = 3 * 1024 * 1024
+STREAMING_ROW_BYTES = 350
+
+# Запас на неточность оценки
+SAFETY_FACTOR = 1.25
+
+# Меньшие части слишком замедляют потоковый анализ
+MIN_CHUNK_ROWS = 10_000
+
+def count_rows(data):
+    """
+    Число строк данных в CSV (без заголовка) по числу переводов строки.
+    """
+    rows = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        rows += 1
+    return max(rows - 1, 0)
+
+def estimate_full_memory(size, rows, engine='columnar'):
+    """
+    Оценка пиковой памяти полного анализа (байт): исходные байты файла,
+    DataFrame и наибольший из этапов - разбор, движок или индекс розыгрышей.
+    """
+    stage = max(ROW_BYTES['read'], ROW_BYTES[engine], ROW_BYTES['point_index'])
+    return int((size + rows * (ROW_BYTES['frame'] + stage)) * SAFETY_FACTOR)
+
+def estimate_streaming_memory(size, chunk_size):
+    """
+    Оценка пиковой памяти потокового анализа (байт): от размера файла
+    зависят только его исходные байты.
+    """
+    return int((size + STREAMING_BASE_BYTES + chunk_size * STREAMING_ROW_BYTES) * SAFETY_FACTOR)
+
+class AnalysisPlan:
+    """
+    Решение по одному файлу: mode - 'full', 'streaming' или 'refuse';
+    estimate - оценка пика выбранного режима (для 'refuse' - наименьшая
+    из возможных); chunk_size - размер части для потокового режима.
+    """
+    __slots__ = ('mode', 'estimate', 'chunk_size')
+
+    def __init__(self, mode, estimate, chunk_size=None):
+        self.mode = mode
+        self.estimate = estimate
+        self.chunk_size = chunk_size
+
+class MemoryBudget:
+    """
+    Бюджет памяти сеанса (limit в байтах, 0 - без ограничения).
+
+        budget = MemoryBudget(1024 * 2**20)
+        plan = budget.plan(len(data), count_rows(data), 'columnar')
+        with track_memory() as memory:
+            ...
+        budget.observe(plan.estimate, memory['peak'])
+
+    observe запоминает, во сколько раз фактический пик превысил оценку,
+    и последующие оценки умножаются на этот коэффициент.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.correction = 1.0
+        self.last_peak = None
+
+    @property
+    def enabled(self):
+        return self.limit > 0
+
+    def plan(self, size, rows, engine='columnar', streaming=False, chunk_size=100_000):
+        """
+        Выбирает режим анализа файла. При streaming=True полный анализ
+        не рассматривается; если потоковый не помещается с заданной
+        частью, часть уменьшается (не меньше MIN_CHUNK_ROWS строк).
+        """
+        if not streaming:
+            full = int(estimate_full_memory(size, rows, engine) * self.correction)
+            if not self.enabled or full <= self.limit:
+                return AnalysisPlan('full', full)
+
+        estimate = int(estimate_streaming_memory(size, chunk_size) * self.correction)
+        if not self.enabled or estimate <= self.limit:
+            return AnalysisPlan('streaming', estimate, chunk_size)
+
+        # Наибольшая часть, при которой оценка укладывается в бюджет
+        available = self.limit / (SAFETY_FACTOR * self.correction) - size - STREAMING_BASE_BYTES
+        fitted = int(available // STREAMING_ROW_BYTES)
+        if fitted >= MIN_CHUNK_ROWS:
+            fitted = min(fitted, chunk_size)
+            return AnalysisPlan('streaming', int(estimate_streaming_memory(size, fitted) * self.correction), fitted)
+        return AnalysisPlan('refuse', int(estimate_streaming_memory(size, MIN_CHUNK_ROWS) * self.correction))
+
+    def observe(self, estimate, peak):
+        """
+        Учитывает фактический пик анализа, оцененного в estimate байт.
+        """
+        self.last_peak = peak
+        if estimate > 0 and peak > estimate:
+            self.correction = max(self.correction, peak / estimate)
+
+_tracking_lock = threading.Lock()
+_tracking_count = 0
+_tracking_started = False
+
+@contextmanager
+def track_memory(enabled=True):
+    """
+    Замер пиковой памяти блока через tracemalloc: record['peak'] - пик
+    сверх памяти, занятой на входе (байт). Трассировка общая для процесса:
+    она включается первым замером и выключается последним, а при
+    одновременных замерах в нескольких сеансах пик включает и их
+    выделения, то есть оценивается сверху. При enabled=False ничего
+    не замеряется (трассировка замедляет анализ).
+    """
+    global _tracking_count, _tracking_started
+    record = {'peak': None}
+    if not enabled:
+        yield record
+        return
+
+    with _tracking_lock:
+        if _tracking_count == 0:
+            # Трассировку, включенную снаружи (например, замером производительности), не выключаем
+            _tracking_started = not tracemalloc.is_tracing()
+            if _tracking_started:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _tracking_count += 1
+        baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        yield record
+    finally:
+        with _tracking_lock:
+            record['peak'] = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            _tracking_count -= 1
+            if _tracking_count == 0 and _tracking_started:
+                tracemalloc.stop()
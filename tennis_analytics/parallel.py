@@ -0,0 +1,89 @@
+"""
+Параллельный анализ одного большого файла: строки делятся на части по
+границам розыгрышей (строкам начала подачи), части считаются в пуле
+процессов, а счетчики сводятся в общий player_stats. Розыгрыш целиком
+попадает в одну часть, поэтому результат совпадает с последовательным
+анализом.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tennis_analytics.encoding import encode_match_events
+from tennis_analytics.engine import (
+    POINT_COLUMNS,
+    SERVE_START_VALUES,
+    _accumulate_columnar,
+    _encoded_column,
+    _init_player_stats,
+    _lookup,
+    analyze_match_data_columnar,
+)
+from tennis_analytics.stats import dumps_match_stats, loads_match_stats, merge_match_stats, pack_match_stats, unpack_match_stats
+from tennis_analytics.timing import NULL_TIMER
+
+# Меньшие части не окупают запуск процессов и передачу данных
+MIN_SHARD_ROWS = 250_000
+
+def shard_boundaries(df, shards):
+    """
+    Возвращает границы частей [0, ..., len(df)]: каждая внутренняя граница -
+    строка начала подачи, ближайшая к равному делению по числу строк.
+    """
+    serve, serve_values = _encoded_column(df, 'Serve')
+    starts = np.flatnonzero(_lookup(serve_values, lambda v: v in SERVE_START_VALUES)[serve])
+    targets = np.arange(1, shards) * len(df) // shards
+    inner = starts[np.minimum(np.searchsorted(starts, targets), len(starts) - 1)] if len(starts) else []
+    return sorted({0, len(df), *(int(b) for b in inner if 0 < b < len(df))})
+
+def _accumulate_shard(frame, player_codes, players, sequence_lengths):
+    """
+    Рабочая функция пула: счетчики одной части без расчета процентов.
+    Возвращает (число розыгрышей, статистика в компактном двоичном виде).
+    """
+    player_stats = _init_player_stats(players)
+    points = _accumulate_columnar(frame, player_codes, players, player_stats, sequence_lengths)
+    return points, dumps_match_stats(pack_match_stats(player_stats))
+
+def analyze_match_data_parallel(df, workers=None, timer=NULL_TIMER, sequence_lengths=(), min_shard_rows=MIN_SHARD_ROWS):
+    """
+    Параллельная версия analyze_match_data_columnar для больших файлов.
+    Число частей - не больше workers (по умолчанию - число ядер) и такое,
+    чтобы в каждой было не меньше min_shard_rows строк; при одной части
+    анализ выполняется в текущем процессе.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = min(workers, len(df) // max(min_shard_rows, 1))
+    if shards <= 1:
+        return analyze_match_data_columnar(df, timer, sequence_lengths)
+
+    with timer.stage('shard_points', rows=len(df)):
+        # Коды игроков общие для всех частей (порядок первого появления во всем файле)
+        player_codes, uniques = pd.factorize(df['Player_1'], use_na_sentinel=False)
+        players = list(uniques)
+        # Категориальные столбцы передаются в процессы кодами, а не строками
+        frame = df[[column for column in POINT_COLUMNS if column in df.columns]]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in frame.dtypes):
+            frame = encode_match_events(frame.copy())
+        boundaries = shard_boundaries(frame, shards)
+
+    with timer.stage('aggregate_points', rows=len(df)) as record:
+        # spawn вместо fork: процесс Streamlit многопоточный
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(boundaries) - 1, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    _accumulate_shard, frame.iloc[start:end], player_codes[start:end], players, sequence_lengths
+                )
+                for start, end in zip(boundaries, boundaries[1:])
+            ]
+            # Части сводятся по порядку: новые значения добавляются в конец,
+            # поэтому порядок ключей совпадает с порядком первого появления
+            results = [future.result() for future in futures]
+        record['points'] = sum(points for points, _ in results)
+
+    with timer.stage('finalize_stats'):
+        return unpack_match_stats(merge_match_stats(loads_match_stats(data) for _, data in results))
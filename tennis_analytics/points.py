@@ -0,0 +1,198 @@
+"""
+Индекс розыгрышей матча: таблица со строкой на розыгрыш (границы в
+исходных строках, подающий, победитель, длина, счет, подача) и
+закодированные столбцы событий. По булевой маске таблицы статистика
+пересчитывается только по выбранным розыгрышам без повторного разбора CSV.
+"""
+import numpy as np
+import pandas as pd
+
+from tennis_analytics.encoding import SERVE_ALIASES
+from tennis_analytics.engine import (
+    SERVE_START_VALUES,
+    _accumulate_encoded,
+    _encode_columns,
+    _finalize_player_stats,
+    _init_player_stats,
+    _lookup,
+    _point_score_flags,
+    _point_scores,
+    _point_winners,
+)
+
+RALLY_LENGTHS = ['1-3', '4-6', '7-9', '10+']
+
+TABLE_COLUMNS = [
+    'start', 'end', 'server', 'returner', 'winner', 'rally_length', 'rally_bucket',
+    'game_score', 'break_point', 'game_point', 'pressure', 'serve', 'serve_result', 'serve_zone',
+]
+
+def _compact_codes(codes, size):
+    """
+    Коды словаря из size значений в наименьшем знаковом целом типе
+    (код -1 сохраняется).
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes
+
+def _category(codes, values):
+    """
+    Категориальный столбец по кодам; '-' и код -1 становятся пропуском.
+    """
+    names = np.array([None if v == '-' else v for v in values] + [None], dtype=object)
+    categories = list(dict.fromkeys(v for v in names[:-1] if v is not None and not pd.isna(v)))
+    return pd.Categorical(names[codes], categories=categories)
+
+class PointIndex:
+    """
+    Индекс розыгрышей одного матча (или нескольких, записанных подряд).
+
+        index = PointIndex(df)
+        index.points                            # таблица розыгрышей
+        index.player_stats(index.points['break_point'])
+
+    Таблица points содержит по строке на розыгрыш:
+        start, end - строки розыгрыша в df (end не включается);
+        server, returner, winner - игроки (winner пуст, если не определен);
+        rally_length, rally_bucket - число ударов и группа длины ('1-3' ... '10+');
+        game_score, break_point, game_point, pressure - счет перед розыгрышем и его флаги;
+        serve, serve_result, serve_zone - подача, ее результат и зона
+        ('1st' или '2nd', по первой строке розыгрыша).
+
+    Исходный DataFrame не хранится: достаточно кодов столбцов событий.
+    """
+    def __init__(self, df):
+        player_codes, uniques = pd.factorize(df['Player_1'], use_na_sentinel=False)
+        self.players = list(uniques)
+        self.player_codes = _compact_codes(player_codes, len(self.players))
+        self.columns = {
+            name: (_compact_codes(codes, len(values)), values)
+            for name, (codes, values) in _encode_columns(df).items()
+        }
+        self.points = self._build_table()
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def nbytes(self):
+        """
+        Примерный объем памяти индекса в байтах.
+        """
+        codes = sum(codes.nbytes for codes, _ in self.columns.values()) + self.player_codes.nbytes
+        return codes + int(self.points.memory_usage(deep=True).sum())
+
+    def _build_table(self):
+        n_players = len(self.players)
+        serve, serve_values = self.columns['Serve']
+        is_start = _lookup(serve_values, lambda v: v in SERVE_START_VALUES)[serve]
+        starts = np.flatnonzero(is_start)
+        n_points = len(starts)
+        if n_points == 0:
+            return pd.DataFrame(columns=TABLE_COLUMNS)
+
+        # Строки до первой подачи не входят ни в один розыгрыш
+        offset = starts[0]
+        ends = np.append(starts[1:], len(serve))
+        first_row = starts - offset
+        last_row = ends - 1 - offset
+        point_id = np.cumsum(is_start[offset:]) - 1
+
+        def column(name):
+            codes, values = self.columns[name]
+            return codes[offset:], values
+
+        player = self.player_codes[offset:]
+        shot_type, shot_values = column('Shot Type')
+        finish_type, finish_values = column('Finish Type')
+        game_score, score_values = column('Game Score')
+        serve_result, result_values = self.columns['Serve Result']
+        serve_zone, zone_values = self.columns['Serve Zone']
+
+        # Соперник игрока: первый игрок в списке, отличный от него
+        if n_players > 1:
+            other = np.where(np.arange(n_players) == 0, 1, 0)
+        else:
+            other = np.full(n_players, -1)
+
+        server = player[first_row].astype(np.int64)
+        returner = other[server]
+        winner = _point_winners(player, finish_type, finish_values, last_row, other)
+        # Счет - первое заполненное значение в розыгрыше
+        point_score = _point_scores(point_id, game_score, score_values, n_points)
+        is_break_point, is_game_point, is_pressure = _point_score_flags(point_score, score_values, returner)
+
+        shot_valid = _lookup(shot_values, lambda v: v != '-')[shot_type]
+        rally_length = np.bincount(point_id, weights=shot_valid, minlength=n_points).astype(np.int64)
+        rally_bucket = np.select([rally_length <= 3, rally_length <= 6, rally_length <= 9], [0, 1, 2], 3)
+
+        serve_names = np.array([SERVE_ALIASES.get(v) if isinstance(v, str) else None for v in serve_values] + [None], dtype=object)
+        player_names = np.array(self.players + [None], dtype=object)
+        player_categories = [p for p in self.players if not pd.isna(p)]
+
+        return pd.DataFrame({
+            'start': starts,
+            'end': ends,
+            'server': pd.Categorical(player_names[server], categories=player_categories),
+            'returner': pd.Categorical(player_names[returner], categories=player_categories),
+            'winner': pd.Categorical(player_names[winner], categories=player_categories),
+            'rally_length': rally_length,
+            'rally_bucket': pd.Categorical.from_codes(rally_bucket, categories=RALLY_LENGTHS),
+            'game_score': _category(point_score, score_values),
+            'break_point': is_break_point,
+            'game_point': is_game_point,
+            'pressure': is_pressure,
+            'serve': pd.Categorical(serve_names[serve[starts]], categories=['1st', '2nd']),
+            'serve_result': _category(serve_result[starts], result_values),
+            'serve_zone': _category(serve_zone[starts], zone_values),
+        })
+
+    def rows(self, mask=None):
+        """
+        Номера исходных строк выбранных розыгрышей по порядку.
+        """
+        points = self.points if mask is None else self.points[np.asarray(mask, dtype=bool)]
+        starts = points['start'].to_numpy(dtype=np.int64)
+        lengths = points['end'].to_numpy(dtype=np.int64) - starts
+        # Конкатенация диапазонов [start, end) без цикла по розыгрышам
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.arange(int(lengths.sum())) + shifts
+
+    def player_stats(self, mask=None, sequence_lengths=()):
+        """
+        Статистика вида analyze_match_data_columnar по розыгрышам, выбранным
+        булевой маской таблицы points (все розыгрыши, если маска не задана).
+        Розыгрыши берутся целиком, поэтому без маски результат совпадает
+        с анализом всего файла.
+        """
+        rows = self.rows(mask)
+        columns = {name: (codes[rows], values) for name, (codes, values) in self.columns.items()}
+        player_stats = _init_player_stats(self.players)
+        _accumulate_encoded(columns, self.player_codes[rows], self.players, player_stats, sequence_lengths)
+        _finalize_player_stats(player_stats, self.players)
+        return player_stats
+
+    def mask(self, key_points=(), serves=(), serve_zones=(), rally_lengths=None, servers=()):
+        """
+        Маска таблицы points по типовым условиям (пустое условие не ограничивает):
+            key_points - флаги счета: 'break_point', 'game_point', 'pressure'
+            (розыгрыш подходит, если выполнен любой из них);
+            serves - '1st' и/или '2nd'; serve_zones - зоны подачи;
+            rally_lengths - (минимум, максимум) числа ударов; servers - подающие.
+        """
+        points = self.points
+        mask = np.ones(len(points), dtype=bool)
+        if key_points:
+            mask &= points[list(key_points)].any(axis=1).to_numpy()
+        if serves:
+            mask &= points['serve'].isin(serves).to_numpy()
+        if serve_zones:
+            mask &= points['serve_zone'].isin(serve_zones).to_numpy()
+        if rally_lengths is not None:
+            low, high = rally_lengths
+            mask &= points['rally_length'].between(low, high).to_numpy()
+        if servers:
+            mask &= points['server'].isin(servers).to_numpy()
+        return mask
@@ -0,0 +1,341 @@
+"""
+Рекомендации игроку на основе статистики матча.
+
+Правила записаны таблицей RULES: каждое правило - условие над столбцами
+одной из таблиц признаков и текст рекомендации. Условия вычисляются
+векторно (NumPy) сразу для всех игроков, поэтому рекомендации для целого
+состава считаются одним проходом по таблице.
+"""
+import string
+
+import numpy as np
+
+# Пороговые значения для разных показателей
+thresholds = {
+    'first_serve_pct': {'low': 50, 'medium': 60, 'high': 70},
+    'second_serve_pct': {'low': 80, 'medium': 85, 'high': 90},
+    'first_serve_won_pct': {'low': 60, 'medium': 70, 'high': 75},
+    'second_serve_won_pct': {'low': 40, 'medium': 50, 'high': 60},
+    'break_point_conversion': {'low': 30, 'medium': 40, 'high': 50},
+    'forehand_winners_ratio': {'low': 0.5, 'medium': 1.0, 'high': 1.5},
+    'long_rally_win_pct': {'low': 40, 'medium': 50, 'high': 60},
+}
+
+CATEGORIES = [
+    'strengths',        # Сильные стороны
+    'improvements',     # Области для улучшения
+    'tactics',          # Тактические рекомендации
+    'training_focus',   # Фокус тренировок
+    'mental_game',      # Ментальный аспект
+]
+
+# Правила: (таблица признаков, категория, условие, текст, уровни детализации).
+# Условие - функция от словаря столбцов таблицы (массивов NumPy),
+# возвращающая булев массив по строкам; текст заполняется значениями
+# той же строки. Порядок правил задает порядок рекомендаций внутри
+# категории. Таблицы признаков:
+#     players - строка на игрока (с показателями соперника opp_*);
+#     shot_types - строка на тип удара игрока (shot_type, shot_pct);
+#     serve_zone - самая частая зона подачи игрока (max_zone, max_zone_pct);
+#     best_combination - лучшая комбинация из встреченных не реже 3 раз;
+#     best_key_shot, worst_key_shot - лучший и худший ключевой удар (не реже 2 раз).
+RULES = [
+    # Анализ подачи
+    ('players', 'improvements', lambda c: c['first_serve_pct'] < thresholds['first_serve_pct']['low'],
+     "Улучшить процент первой подачи (текущий: {first_serve_pct}%). "
+     "Сосредоточиться на технике и стабильности.", None),
+    ('players', 'training_focus', lambda c: c['first_serve_pct'] < thresholds['first_serve_pct']['low'],
+     "Работа над первой подачей", None),
+    ('players', 'strengths', lambda c: (c['first_serve_pct'] >= thresholds['first_serve_pct']['low']) & (c['first_serve_pct'] > thresholds['first_serve_pct']['high']),
+     "Высокий процент первой подачи ({first_serve_pct}%). "
+     "Продолжать использовать это как преимущество.", None),
+
+    # Анализ второй подачи
+    ('players', 'improvements', lambda c: c['second_serve_won_pct'] < thresholds['second_serve_won_pct']['low'],
+     "Низкий процент выигранных очков на второй подаче ({second_serve_won_pct}%). "
+     "Улучшить качество и вариативность второй подачи.", None),
+    ('players', 'training_focus', lambda c: c['second_serve_won_pct'] < thresholds['second_serve_won_pct']['low'],
+     "Работа над второй подачей", None),
+
+    # Анализ зон подачи
+    ('serve_zone', 'improvements', lambda c: c['max_zone_pct'] > 60,
+     "Чрезмерная концентрация подач в зону {max_zone} ({max_zone_pct:.1f}%). "
+     "Увеличить вариативность подачи.", None),
+
+    # Сравнение с соперником: эффективность форхенда
+    ('players', 'strengths', lambda c: c['has_opponent'] & (c['forehand'] > c['opp_forehand'] * 1.5) & (c['forehand'] > 5),
+     "Значительное преимущество в эффективности форхенда. "
+     "Использовать форхенд как основное оружие.", None),
+    ('players', 'tactics', lambda c: c['has_opponent'] & (c['forehand'] > c['opp_forehand'] * 1.5) & (c['forehand'] > 5),
+     "Строить розыгрыши через форхенд, искать возможности для атаки с форхенда", None),
+
+    # Сравнение с соперником: длинные розыгрыши
+    ('players', 'tactics', lambda c: c['has_opponent'] & (c['long_rally_win_pct'] > c['opp_long_rally_win_pct'] + 20),
+     "Значительное преимущество в длинных розыгрышах "
+     "({long_rally_win_pct}% vs {opp_long_rally_win_pct}%). "
+     "Стремиться к затяжным обменам ударами.", None),
+    ('players', 'tactics', lambda c: c['has_opponent'] & (c['long_rally_win_pct'] < c['opp_long_rally_win_pct'] - 20),
+     "Слабая эффективность в длинных розыгрышах "
+     "({long_rally_win_pct}% vs {opp_long_rally_win_pct}%). "
+     "Избегать затяжных обменов, играть более агрессивно.", None),
+    ('players', 'training_focus', lambda c: c['has_opponent'] & (c['long_rally_win_pct'] < c['opp_long_rally_win_pct'] - 20),
+     "Физическая подготовка и выносливость для длинных розыгрышей", None),
+
+    # Брейк-пойнты (при известном сопернике)
+    ('players', 'mental_game', lambda c: c['has_opponent'] & (c['bp_faced'] > 2) & (c['bp_conv_pct'] < 30),
+     "Низкий процент реализации брейк-пойнтов ({bp_conv_pct:.1f}%). "
+     "Работать над концентрацией в ключевые моменты.", None),
+    ('players', 'strengths', lambda c: c['has_opponent'] & (c['bp_faced'] > 2) & (c['bp_conv_pct'] > 60),
+     "Высокий процент реализации брейк-пойнтов ({bp_conv_pct:.1f}%). "
+     "Хорошая психологическая устойчивость в ключевые моменты.", None),
+
+    # Анализ типов ударов
+    ('shot_types', 'strengths', lambda c: (c['shot_type'] == 'Forehand') & (c['shot_pct'] > 65),
+     "Высокое использование форхенда ({shot_pct:.1f}% всех ударов). "
+     "Продолжать строить игру через форхенд.", None),
+    ('shot_types', 'strengths', lambda c: (c['shot_type'] == 'Backhand') & (c['shot_pct'] > 65),
+     "Высокое использование бэкхенда ({shot_pct:.1f}% всех ударов). "
+     "Продолжать строить игру через бэкхенд.", None),
+    ('shot_types', 'improvements', lambda c: np.isin(c['shot_type'], ['Slice', 'Drop Shot', 'Volley']) & (c['shot_pct'] < 5),
+     "Редкое использование удара {shot_type} ({shot_pct:.1f}%). "
+     "Добавить больше вариативности в игру.", None),
+    ('shot_types', 'training_focus', lambda c: np.isin(c['shot_type'], ['Slice', 'Drop Shot', 'Volley']) & (c['shot_pct'] < 5),
+     "Развитие удара {shot_type}", None),
+
+    # Анализ комбинаций ударов
+    ('best_combination', 'tactics', lambda c: c['win_percentage'] > 60,
+     "Комбинация '{combination}' особенно эффективна "
+     "({win_percentage}% успешности). "
+     "Использовать чаще в ключевые моменты.", None),
+
+    # Анализ ключевых ударов (только при подробной детализации)
+    ('best_key_shot', 'strengths', lambda c: c['win_percentage'] > 60,
+     "Эффективное использование {shot} в ключевые моменты "
+     "({win_percentage}% успешности).", ("Подробная",)),
+    ('worst_key_shot', 'improvements', lambda c: c['win_percentage'] < 40,
+     "Низкая эффективность {shot} в ключевые моменты "
+     "({win_percentage}% успешности). "
+     "Работать над стабильностью этого удара под давлением.", ("Подробная",)),
+
+    # Ментальная игра на основе паттернов
+    ('players', 'mental_game', lambda c: (c['first_serve_pct'] > 65) & (c['second_serve_won_pct'] < 40),
+     "Высокий риск на второй подаче может привести к неуверенности. "
+     "Работать над психологической стабильностью при второй подаче.", None),
+
+    # Выигрыш очков под давлением
+    ('players', 'mental_game', lambda c: (c['pressure_points_total'] > 5) & (c['pressure_pct'] < 40),
+     "Низкий процент выигрыша очков под давлением ({pressure_pct:.1f}%). "
+     "Работать над ментальной устойчивостью в ключевые моменты.", None),
+    ('players', 'strengths', lambda c: (c['pressure_points_total'] > 5) & (c['pressure_pct'] > 60),
+     "Высокий процент выигрыша очков под давлением ({pressure_pct:.1f}%). "
+     "Хорошая психологическая устойчивость.", None),
+]
+
+# Число рекомендаций в категории по уровню детализации (None - без ограничения)
+DETAIL_LIMITS = {"Минимальная": 1, "Средняя": 2, "Подробная": None}
+
+# Признаки таблицы players
+PLAYER_FEATURES = [
+    'first_serve_pct', 'second_serve_won_pct', 'long_rally_win_pct', 'forehand', 'has_opponent',
+    'opp_forehand', 'opp_long_rally_win_pct', 'bp_faced', 'bp_conv_pct', 'pressure_points_total', 'pressure_pct',
+]
+
+def compile_rules(rules):
+    """
+    Подготавливает таблицу правил: разбирает поля текстов один раз.
+    Возвращает список
+    (таблица, категория, условие, текст, поля текста, уровни детализации).
+    """
+    compiled = []
+    for source, category, condition, template, levels in rules:
+        fields = [name.split('.')[0].split('[')[0] for _, name, _, _ in string.Formatter().parse(template) if name]
+        compiled.append((source, category, condition, template, fields, levels))
+    return compiled
+
+COMPILED_RULES = compile_rules(RULES)
+
+class _FeatureTable:
+    """
+    Таблица признаков: values - исходные значения столбцов (списки, для
+    текстов), columns - те же столбцы массивами NumPy (для условий),
+    owner - номер игрока каждой строки.
+    """
+    __slots__ = ('values', 'columns', 'owner')
+
+    def __init__(self, values, owner, numeric=(), text=()):
+        self.values = values
+        self.owner = np.asarray(owner, dtype=np.int64)
+        self.columns = {name: np.array(values[name], dtype=float) for name in numeric}
+        self.columns.update({name: np.array(values[name], dtype=object) for name in text})
+
+    def __len__(self):
+        return len(self.owner)
+
+    def add(self, name, column):
+        """
+        Добавляет вычисленный столбец (и для условий, и для текстов).
+        """
+        self.columns[name] = column
+        self.values[name] = column
+
+    def take(self, index):
+        table = _FeatureTable({}, self.owner[index])
+        table.values = {name: [values[i] for i in index] for name, values in self.values.items()}
+        table.columns = {name: column[index] for name, column in self.columns.items()}
+        return table
+
+def _player_table(entries):
+    values = {name: [] for name in PLAYER_FEATURES}
+    for player_stats, opponent_stats in entries:
+        break_points = player_stats.get('break_points', {})
+        faced = break_points.get('faced', 0)
+        values['first_serve_pct'].append(player_stats.get('first_serve_pct', 0))
+        values['second_serve_won_pct'].append(player_stats.get('second_serve_won_pct', 0))
+        values['long_rally_win_pct'].append(player_stats.get('long_rally_win_pct', 0))
+        values['forehand'].append(player_stats.get('shot_types', {}).get('Forehand', 0))
+        values['has_opponent'].append(bool(opponent_stats))
+        values['opp_forehand'].append(opponent_stats.get('shot_types', {}).get('Forehand', 0) if opponent_stats else 0)
+        values['opp_long_rally_win_pct'].append(opponent_stats.get('long_rally_win_pct', 0) if opponent_stats else 0)
+        values['bp_faced'].append(faced)
+        values['bp_conv_pct'].append(break_points.get('converted', 0) / faced * 100 if faced > 0 else 0)
+        values['pressure_points_total'].append(player_stats.get('pressure_points_total', 0))
+        values['pressure_pct'].append(player_stats.get('pressure_points_pct', 0))
+    table = _FeatureTable(values, np.arange(len(entries)), numeric=[name for name in PLAYER_FEATURES if name != 'has_opponent'])
+    table.columns['has_opponent'] = np.array(values['has_opponent'], dtype=bool)
+    return table
+
+def _items(entries, key, fields=None):
+    """
+    Длинная таблица элементов словаря player_stats[key] всех игроков
+    (в порядке словаря): name, order и value (или поля значения fields).
+    """
+    values = {'name': [], 'order': []}
+    columns = ['value'] if fields is None else list(fields)
+    values.update((column, []) for column in columns)
+    owner = []
+    for i, (player_stats, _) in enumerate(entries):
+        items = player_stats.get(key, {})
+        values['name'].extend(items)
+        values['order'].extend(range(len(items)))
+        owner.extend([i] * len(items))
+        if fields is None:
+            values['value'].extend(items.values())
+        else:
+            for field in fields:
+                values[field].extend(value.get(field, 0) for value in items.values())
+    return _FeatureTable(values, owner, numeric=['order', *columns], text=['name'])
+
+def _shares(table, value, n_players):
+    """
+    Доля значения строки в сумме по игроку, в процентах.
+    """
+    totals = np.bincount(table.owner, weights=table.columns[value], minlength=n_players)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return table.columns[value] / totals[table.owner] * 100
+
+def _first_per_player(table, score):
+    """
+    По одной строке на игрока с наибольшим score; при равенстве - первая
+    по порядку словаря. Строки таблицы уже упорядочены по игрокам и
+    порядку словарей, поэтому сортировка не нужна: максимум ищется по
+    группам строк игрока (NaN учитывается, только если вся группа - NaN).
+    """
+    if len(table) == 0:
+        return table
+    starts = np.flatnonzero(np.r_[True, table.owner[1:] != table.owner[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(table)]))
+    best = np.fmax.reduceat(score, starts)[group]
+    candidates = np.flatnonzero((score == best) | np.isnan(best))
+    # Первый кандидат каждой группы
+    first = candidates[np.r_[True, group[candidates][1:] != group[candidates][:-1]]]
+    return table.take(first)
+
+def _feature_tables(entries):
+    n_players = len(entries)
+    tables = {'players': _player_table(entries)}
+
+    shots = _items(entries, 'shot_types')
+    shots.add('shot_pct', _shares(shots, 'value', n_players))
+    shots.add('shot_type', shots.columns['name'])
+    tables['shot_types'] = shots
+
+    zones = _items(entries, 'serve_zones')
+    zones.add('max_zone_pct', _shares(zones, 'value', n_players))
+    zones.add('max_zone', zones.columns['name'])
+    tables['serve_zone'] = _first_per_player(zones, zones.columns['max_zone_pct'])
+
+    combinations = _items(entries, 'shot_combinations', ('count', 'win_percentage'))
+    combinations.add('combination', combinations.columns['name'])
+    combinations = combinations.take(np.flatnonzero(combinations.columns['count'] >= 3))
+    tables['best_combination'] = _first_per_player(combinations, combinations.columns['win_percentage'])
+
+    key_shots = _items(entries, 'key_shots', ('total', 'win_percentage'))
+    key_shots.add('shot', key_shots.columns['name'])
+    key_shots = key_shots.take(np.flatnonzero(key_shots.columns['total'] >= 2))
+    tables['best_key_shot'] = _first_per_player(key_shots, key_shots.columns['win_percentage'])
+    tables['worst_key_shot'] = _first_per_player(key_shots, -key_shots.columns['win_percentage'])
+    return tables
+
+def generate_roster_recommendations(entries, detail_level="Средняя", rules=None):
+    """
+    Рекомендации сразу для многих игроков (например, всего состава за
+    несколько матчей).
+
+    Args:
+        entries: Список пар (статистика игрока, статистика соперника или None)
+        detail_level: Уровень детализации рекомендаций ("Минимальная", "Средняя", "Подробная")
+        rules: Скомпилированная таблица правил (по умолчанию - COMPILED_RULES)
+
+    Returns:
+        Список словарей рекомендаций в порядке entries.
+    """
+    entries = list(entries)
+    results = [{category: [] for category in CATEGORIES} for _ in entries]
+    if not entries:
+        return results
+
+    tables = _feature_tables(entries)
+    for source, category, condition, template, fields, levels in rules or COMPILED_RULES:
+        if levels is not None and detail_level not in levels:
+            continue
+        table = tables[source]
+        if len(table) == 0:
+            continue
+        fired = np.broadcast_to(condition(table.columns), table.owner.shape)
+        # Строки таблицы упорядочены по игрокам и порядку словарей,
+        # поэтому тексты добавляются в том же порядке, что и при переборе
+        for i in np.flatnonzero(fired):
+            text = template.format(**{field: table.values[field][i] for field in fields})
+            results[table.owner[i]][category].append(text)
+
+    # Фильтрация рекомендаций в соответствии с уровнем детализации
+    limit = DETAIL_LIMITS.get(detail_level)
+    if limit is not None:
+        for recommendations in results:
+            for category in recommendations:
+                recommendations[category] = recommendations[category][:limit]
+    return results
+
+def generate_player_recommendations(player_stats, opponent_stats=None, detail_level="Средняя"):
+    """
+    Генерирует рекомендации для игрока на основе его статистики
+    и опционально статистики соперника.
+
+    Args:
+        player_stats: Статистика игрока
+        opponent_stats: Статистика соперника
+        detail_level: Уровень детализации рекомендаций ("Минимальная", "Средняя", "Подробная")
+    """
+    return generate_roster_recommendations([(player_stats, opponent_stats)], detail_level)[0]
+
+def generate_match_recommendations(player_stats, detail_level="Средняя"):
+    """
+    Генерирует рекомендации для всех игроков матча, сравнивая каждого
+    с соперником. Возвращает словарь {игрок: рекомендации}.
+    """
+    players = list(player_stats.keys())
+    entries = []
+    for i, player in enumerate(players):
+        opponent = players[1-i] if len(players) > 1 else None
+        entries.append((player_stats[player], player_stats[opponent] if opponent else None))
+    return dict(zip(players, generate_roster_recommendations(entries, detail_level)))
@@ -0,0 +1,196 @@
+"""
+Статические HTML-отчеты по игрокам для просмотра без приложения: графики
+подачи, розыгрышей, типов ударов, зон подачи, ключевых ударов и
+комбинаций плюс рекомендации.
+
+Отчеты строятся в пуле процессов и записываются в один каталог-комплект.
+Библиотека Plotly JS записывается в комплект один раз (plotly.min.js), а
+страницы подключают ее по относительной ссылке, поэтому размер комплекта -
+размер библиотеки плюс примерно постоянный размер страницы на игрока.
+"""
+import html
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from tennis_analytics.charts import (
+    create_key_shots_chart,
+    create_rally_stats_chart,
+    create_serve_stats_chart,
+    create_serve_zones_chart,
+    create_shot_combinations_chart,
+    create_shot_types_chart,
+)
+from tennis_analytics.recommendations import generate_roster_recommendations
+
+PLOTLY_JS = 'plotly.min.js'
+INDEX_FILE = 'index.html'
+
+# Цвет игрока в отчете (графики строятся по одному игроку)
+REPORT_COLORS = {'player1': '#0088FE', 'player2': '#FF8042'}
+
+# Графики отчета: (функция, строится ли по игроку из player_stats)
+REPORT_CHARTS = [
+    (create_serve_stats_chart, False),
+    (create_rally_stats_chart, False),
+    (create_shot_types_chart, False),
+    (create_serve_zones_chart, True),
+    (create_key_shots_chart, True),
+    (create_shot_combinations_chart, True),
+]
+
+REPORT_SECTIONS = {
+    'strengths': 'Сильные стороны',
+    'improvements': 'Области для улучшения',
+    'tactics': 'Тактика',
+    'training_focus': 'Фокус тренировок',
+    'mental_game': 'Ментальный аспект',
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 1100px; }}
+.charts {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1em; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+def report_filename(player, number):
+    """
+    Имя файла отчета: номер игрока в составе и имя без недопустимых символов.
+    """
+    slug = re.sub(r'[^\w-]+', '_', str(player), flags=re.UNICODE).strip('_')
+    return f'{number:04d}_{slug or "player"}.html'
+
+def render_player_report(player, stats, recommendations, color=REPORT_COLORS['player1'], height=400, resolution=50):
+    """
+    HTML-страница отчета одного игрока. Библиотека Plotly JS не
+    встраивается: страница подключает файл PLOTLY_JS из того же каталога.
+    resolution - сетка тепловой карты зон подачи (определяет размер страницы).
+    """
+    player_stats = {player: stats}
+    colors = dict(REPORT_COLORS, player1=color)
+    figures = []
+    for builder, per_player in REPORT_CHARTS:
+        if per_player:
+            kwargs = {'resolution': resolution} if builder is create_serve_zones_chart else {}
+            fig = builder(player_stats, player, color, height, **kwargs)
+        else:
+            fig = builder(player_stats, colors, height)
+        # Разметка фигуры без библиотеки и без обращения к CDN
+        figures.append(fig.to_html(full_html=False, include_plotlyjs=False, config={'displaylogo': False}))
+
+    title = html.escape(str(player))
+    body = [f'<h1>{title}</h1>', '<div class="charts">']
+    body.extend(f'<div>{figure}</div>' for figure in figures)
+    body.append('</div>')
+    body.append('<h2>Рекомендации</h2>')
+    for category, label in REPORT_SECTIONS.items():
+        items = recommendations.get(category, [])
+        if items:
+            body.append(f'<h3>{label}</h3>')
+            body.append('<ul>' + ''.join(f'<li>{html.escape(text)}</li>' for text in items) + '</ul>')
+    return PAGE_TEMPLATE.format(title=title, plotly_js=PLOTLY_JS, body='\n'.join(body))
+
+def _write_player_report(path, player, stats, recommendations, color, height, resolution):
+    """
+    Рабочая функция пула: строит и записывает страницу, возвращает ее размер
+    (в основной процесс не передается HTML).
+    """
+    data = render_player_report(player, stats, recommendations, color, height, resolution).encode('utf-8')
+    Path(path).write_bytes(data)
+    return len(data)
+
+def _write_index(output_dir, reports):
+    items = ''.join(
+        f'<li><a href="{html.escape(filename)}">{html.escape(str(player))}</a></li>'
+        for player, filename in reports.items()
+    )
+    page = PAGE_TEMPLATE.format(title='Отчеты по игрокам', plotly_js=PLOTLY_JS, body=f'<h1>Отчеты по игрокам</h1>\n<ul>{items}</ul>')
+    data = page.encode('utf-8')
+    (output_dir / INDEX_FILE).write_bytes(data)
+    return len(data)
+
+def export_player_reports(player_stats, output_dir, workers=None, detail_level='Средняя',
+                          color=REPORT_COLORS['player1'], height=400, resolution=50, progress=None):
+    """
+    Записывает HTML-отчеты всех игроков в каталог output_dir одной
+    пакетной задачей: рекомендации подбираются для всего состава одним
+    проходом по таблице правил, а страницы строятся в пуле процессов.
+
+    Args:
+        player_stats: Словарь {игрок: статистика} (например, итоги сезона)
+        output_dir: Каталог комплекта (создается при необходимости)
+        workers: Число рабочих процессов (по умолчанию - число ядер)
+        detail_level: Уровень детализации рекомендаций
+        color, height, resolution: Цвет, высота графиков и сетка тепловой карты
+        progress: Функция progress(done, total, elapsed), вызываемая после каждого отчета
+
+    Returns:
+        Словарь с ключами 'reports' ({игрок: имя файла}), 'errors',
+        'bytes' (размер комплекта), 'plotly_js_bytes', 'report_bytes'
+        (средний размер страницы), 'elapsed' и 'reports_per_second'.
+    """
+    import plotly.offline
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    players = list(player_stats)
+    started = time.perf_counter()
+
+    plotly_js = plotly.offline.get_plotlyjs().encode('utf-8')
+    (output_dir / PLOTLY_JS).write_bytes(plotly_js)
+
+    roster = generate_roster_recommendations([(player_stats[player], None) for player in players], detail_level)
+    filenames = {player: report_filename(player, i) for i, player in enumerate(players, 1)}
+    sizes = {}
+    errors = {}
+
+    if players:
+        workers = min(workers or os.cpu_count() or 1, len(players))
+        # spawn вместо fork: процесс Streamlit многопоточный
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(
+                    _write_player_report, output_dir / filenames[player], player, player_stats[player],
+                    recommendations, color, height, resolution
+                ): player
+                for player, recommendations in zip(players, roster)
+            }
+            for future in as_completed(futures):
+                player = futures[future]
+                try:
+                    sizes[player] = future.result()
+                except Exception as e:
+                    errors[player] = str(e)
+
+                if progress:
+                    progress(len(sizes) + len(errors), len(players), time.perf_counter() - started)
+
+    # Оглавление в порядке состава, только успешно записанные отчеты
+    reports = {player: filenames[player] for player in players if player in sizes}
+    index_bytes = _write_index(output_dir, reports)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'reports': reports,
+        'errors': errors,
+        'bytes': len(plotly_js) + index_bytes + sum(sizes.values()),
+        'plotly_js_bytes': len(plotly_js),
+        'report_bytes': sum(sizes.values()) / len(sizes) if sizes else 0,
+        'elapsed': elapsed,
+        'reports_per_second': len(sizes) / elapsed if elapsed > 0 else 0
+    }
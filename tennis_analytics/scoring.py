@@ -0,0 +1,106 @@
+"""
+Разбор счета в гейме. Значение столбца Game Score записано с точки зрения
+подающего ('30-40', 'A-40', в тай-брейке - '5-6'). Каждое значение словаря
+разбирается один раз в состояние (очки подающего, очки принимающего,
+тай-брейк), а флаги ключевых моментов берутся из таблицы по кодам.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Очки обычного гейма: 'A' - преимущество (при 40 у соперника)
+GAME_POINTS = {'0': 0, '00': 0, 'love': 0, '15': 1, '30': 2, '40': 3, 'a': 4, 'ad': 4, 'adv': 4}
+
+# Последняя пара вида 'X-Y' в значении: счет сета перед счетом гейма
+# ('6-4 30-40') не мешает разбору
+SCORE_PATTERN = re.compile(r'(\d+|[A-Za-z]+)\s*[-:]\s*(\d+|[A-Za-z]+)(?!.*\d\s*[-:])')
+
+# Порядок флагов в таблице
+BREAK_POINT, GAME_POINT, PRESSURE = 0, 1, 2
+NO_FLAGS = (False, False, False)
+
+@lru_cache(maxsize=4096)
+def parse_game_score(value):
+    """
+    Возвращает (очки подающего, очки принимающего, тай-брейк) или None,
+    если значение не является счетом. В обычном гейме очки - 0..4
+    (0, 15, 30, 40, преимущество), в тай-брейке - фактическое число очков.
+    """
+    if not isinstance(value, str):
+        return None
+    match = SCORE_PATTERN.search(value.strip())
+    if match is None:
+        return None
+    server, returner = match.group(1).lower(), match.group(2).lower()
+
+    if server in GAME_POINTS and returner in GAME_POINTS:
+        server_points, returner_points = GAME_POINTS[server], GAME_POINTS[returner]
+        # Преимущество возможно только при 40 у соперника
+        if server_points == 4 and returner_points != 3 or returner_points == 4 and server_points != 3:
+            return None
+        return server_points, returner_points, False
+
+    if server.isdigit() and returner.isdigit():
+        return int(server), int(returner), True
+    return None
+
+@lru_cache(maxsize=4096)
+def game_score_flags(value):
+    """
+    Флаги (брейк-пойнт, гейм-пойнт, напряженный момент) для значения счета.
+
+    В гейме брейк-пойнт - принимающему не хватает одного очка (0-40, 15-40,
+    30-40, 40-A), гейм-пойнт - то же для подающего, напряженные моменты -
+    еще 30-30 и ровно. В тай-брейке брейк- и гейм-пойнтами считаются
+    сет-болы принимающего и подающего, а напряженными - равный счет от 5-5.
+    """
+    state = parse_game_score(value)
+    if state is None:
+        return NO_FLAGS
+    server, returner, tiebreak = state
+
+    target = 7 if tiebreak else 4
+    is_game_point = server >= target - 1 and server > returner
+    is_break_point = returner >= target - 1 and returner > server
+    if tiebreak:
+        is_level_pressure = server == returner and server >= 5
+    else:
+        is_level_pressure = server == returner and server >= 2
+    return is_break_point, is_game_point, is_break_point or is_game_point or is_level_pressure
+
+def game_score_table(values):
+    """
+    Таблица флагов формы (len(values) + 1, 3) для значений словаря.
+    Последняя строка соответствует коду -1 (пропуск), поэтому таблицу
+    можно индексировать кодами столбца напрямую.
+    """
+    return np.array([game_score_flags(v) for v in values] + [NO_FLAGS], dtype=bool).reshape(-1, 3)
+
+def game_score_columns(series):
+    """
+    Векторные флаги для столбца Game Score: DataFrame с булевыми столбцами
+    is_break_point, is_game_point, is_pressure (разбор - один раз на значение).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series)
+    flags = game_score_table(values)[codes]
+    return pd.DataFrame(
+        {'is_break_point': flags[:, BREAK_POINT], 'is_game_point': flags[:, GAME_POINT], 'is_pressure': flags[:, PRESSURE]},
+        index=series.index
+    )
+
+def tiebreak_flags(series):
+    """
+    Булев массив: значение столбца Game Score - счет тай-брейка
+    (разбор - один раз на значение, пропуск - не тай-брейк).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series)
+    states = [parse_game_score(value) for value in values]
+    return np.array([state is not None and state[2] for state in states] + [False], dtype=bool)[codes]
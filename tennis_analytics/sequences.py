@@ -0,0 +1,89 @@
+"""
+Последовательности ударов (n-граммы) по закодированным столбцам: окна из
+n соседних ударов внутри одного розыгрыша строятся сдвигами массивов, а
+каждое окно сворачивается в одно целое число (смешанная система счисления
+по кодам ударов), поэтому подсчет сводится к np.unique по int64.
+"""
+import numpy as np
+
+MIN_SEQUENCE_LENGTH = 2
+MAX_SEQUENCE_LENGTH = 5
+
+SEQUENCE_SEPARATOR = ' → '
+
+def count_shot_ngrams(n, point_id, player, shot_type, shot_valid, row_won, n_players, n_shots):
+    """
+    Считает n-граммы ударов. Окно начинается в строке i и занимает строки
+    i..i+n-1 одного розыгрыша, все с заполненным типом удара; оно
+    относится к игроку первого удара и считается выигранным, если этот
+    игрок выиграл розыгрыш (как у пар ударов в analyze_match_data).
+
+    Возвращает список ((код игрока, код удара 1, ..., код удара n), количество,
+    выигрыши) в порядке первого появления окна.
+    """
+    if not MIN_SEQUENCE_LENGTH <= n <= MAX_SEQUENCE_LENGTH:
+        raise ValueError(f'Длина последовательности должна быть от {MIN_SEQUENCE_LENGTH} до {MAX_SEQUENCE_LENGTH}')
+
+    size = len(shot_type) - n + 1
+    if size <= 0:
+        return []
+
+    # Окно допустимо, если все его удары заполнены и лежат в одном розыгрыше
+    valid = shot_valid[:size].copy()
+    for k in range(1, n):
+        valid &= shot_valid[k:k + size] & (point_id[k:k + size] == point_id[:size])
+    starts = np.flatnonzero(valid)
+    if len(starts) == 0:
+        return []
+
+    # Ключ окна: игрок, затем коды ударов как цифры в системе по основанию n_shots
+    if n_players * n_shots ** n >= 2 ** 63:
+        raise ValueError('Слишком много различных ударов для целочисленного ключа последовательности')
+    keys = player[starts].astype(np.int64)
+    for k in range(n):
+        keys = keys * n_shots + shot_type[starts + k]
+
+    uniques, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    wins = np.bincount(inverse, weights=row_won[starts], minlength=len(uniques))
+
+    order = np.argsort(first)
+    digits = []
+    remainder = uniques[order]
+    for _ in range(n):
+        digits.append(remainder % n_shots)
+        remainder = remainder // n_shots
+    digits.append(remainder)
+    digits.reverse()
+
+    return [
+        (tuple(int(d[i]) for d in digits), int(counts[j]), int(wins[j]))
+        for i, j in enumerate(order)
+    ]
+
+def top_k_indices(scores, k):
+    """
+    Индексы k наибольших значений по убыванию; при равенстве раньше идет
+    меньший индекс (как у устойчивой сортировки). Отбор выполняется
+    np.argpartition за линейное время, сортируются только k выбранных.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if k <= 0 or len(scores) == 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        chosen = np.concatenate([above, ties])
+        chosen.sort()
+    else:
+        chosen = np.arange(len(scores))
+    return chosen[np.argsort(-scores[chosen], kind='stable')]
+
+def top_sequences(sequences, k, min_count=3, key='win_percentage'):
+    """
+    Возвращает до k пар (последовательность, статистика) с наибольшим
+    значением key среди последовательностей, встретившихся не реже min_count раз.
+    """
+    candidates = [(name, stats) for name, stats in sequences.items() if stats.get('count', 0) >= min_count]
+    indices = top_k_indices([stats.get(key, 0) for _, stats in candidates], k)
+    return [candidates[i] for i in indices]
@@ -0,0 +1,264 @@
+"""
+Компактное представление статистики игрока. Фиксированные счетчики
+хранятся в одном массиве int64, а счетчики по типам ударов, зонам и
+комбинациям - в словарно-кодированных таблицах (список имен + массив
+значений). Объединение сводится к сложению массивов, а сериализация -
+к записи буферов массивов без вложенных словарей.
+
+Словарь player_stats прежнего вида получается через to_dict(), поэтому
+графики и рекомендации работают без изменений.
+"""
+import pickle
+import struct
+
+import numpy as np
+
+from tennis_analytics.engine import _finalize_player_stats, _init_player_stats
+from tennis_analytics.sequences import SEQUENCE_SEPARATOR
+
+RALLY_LENGTHS = ['1-3', '4-6', '7-9', '10+']
+
+# Порядок фиксированных счетчиков: (путь в словаре player_stats)
+COUNTER_FIELDS = (
+    [(key,) for key in [
+        'first_serve_total', 'first_serve_in', 'first_serve_won',
+        'second_serve_total', 'second_serve_in', 'second_serve_won',
+        'aces', 'double_faults',
+    ]]
+    + [('points_by_rally_length', length) for length in RALLY_LENGTHS]
+    + [('wins_by_rally_length', length) for length in RALLY_LENGTHS]
+    + [('break_points', key) for key in ['faced', 'saved', 'converted']]
+    + [('game_points', key) for key in ['faced', 'saved', 'converted']]
+    + [('pressure_points_won',), ('pressure_points_total',)]
+)
+
+# Таблицы счетчиков: имя -> поля значения (None - значение само является числом)
+TALLY_FIELDS = {
+    'serve_zones': None,
+    'shot_types': None,
+    'shot_combinations': ('count', 'wins'),
+    'key_shots': ('total', 'won'),
+}
+SEQUENCE_FIELDS = ('count', 'wins')
+
+MAGIC = b'TPS1'
+
+class Tally:
+    """
+    Словарно-кодированная таблица счетчиков: names[i] соответствует
+    строке values[i]. Порядок имен - порядок первого появления.
+    """
+    __slots__ = ('names', 'index', 'values')
+
+    def __init__(self, width, names=(), values=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if values is None:
+            values = np.zeros((len(self.names), width), dtype=np.int64)
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, counts, fields):
+        if fields is None:
+            values = np.array(list(counts.values()), dtype=np.int64).reshape(-1, 1)
+            return cls(1, counts, values)
+        values = np.array([[entry[f] for f in fields] for entry in counts.values()], dtype=np.int64)
+        return cls(len(fields), counts, values.reshape(-1, len(fields)))
+
+    def to_dict(self, fields):
+        if fields is None:
+            return {name: int(value) for name, value in zip(self.names, self.values[:, 0])}
+        return {
+            name: {f: int(v) for f, v in zip(fields, row)}
+            for name, row in zip(self.names, self.values)
+        }
+
+    def merge(self, other):
+        """
+        Прибавляет счетчики other; новые имена добавляются в конец.
+        """
+        if not other.names:
+            return
+        start = len(self.names)
+        codes = np.empty(len(other.names), dtype=np.int64)
+        for i, name in enumerate(other.names):
+            code = self.index.get(name)
+            if code is None:
+                code = self.index[name] = len(self.names)
+                self.names.append(name)
+            codes[i] = code
+        if len(self.names) > start:
+            grown = np.zeros((len(self.names), self.values.shape[1]), dtype=np.int64)
+            grown[:start] = self.values
+            self.values = grown
+        # Коды в other уникальны, поэтому достаточно векторного сложения
+        self.values[codes] += other.values
+
+    def copy(self):
+        return Tally(self.values.shape[1], self.names, self.values.copy())
+
+class PlayerStats:
+    """
+    Статистика одного игрока без рассчитанных процентов (они вычисляются
+    в to_dict, так что после объединения проценты считаются по суммам).
+    """
+    __slots__ = ('counters', 'tallies', 'sequences')
+
+    def __init__(self, counters=None, tallies=None, sequences=None):
+        self.counters = np.zeros(len(COUNTER_FIELDS), dtype=np.int64) if counters is None else counters
+        self.tallies = tallies or {name: Tally(1 if fields is None else len(fields)) for name, fields in TALLY_FIELDS.items()}
+        self.sequences = sequences or {}
+
+    @classmethod
+    def from_dict(cls, stats):
+        """
+        Создает PlayerStats из словаря статистики игрока (вывода движков).
+        """
+        counters = np.array(
+            [stats[path[0]] if len(path) == 1 else stats[path[0]][path[1]] for path in COUNTER_FIELDS],
+            dtype=np.int64
+        )
+        tallies = {name: Tally.from_dict(stats.get(name, {}), fields) for name, fields in TALLY_FIELDS.items()}
+        sequences = {
+            n: Tally.from_dict(counts, SEQUENCE_FIELDS)
+            for n, counts in stats.get('shot_sequences', {}).items()
+        }
+        return cls(counters, tallies, sequences)
+
+    def to_dict(self):
+        """
+        Словарь в формате analyze_match_data, включая проценты.
+        """
+        stats = _init_player_stats([None])[None]
+        for path, value in zip(COUNTER_FIELDS, self.counters.tolist()):
+            if len(path) == 1:
+                stats[path[0]] = value
+            else:
+                stats[path[0]][path[1]] = value
+        for name, fields in TALLY_FIELDS.items():
+            stats[name] = self.tallies[name].to_dict(fields)
+        if self.sequences:
+            stats['shot_sequences'] = {n: tally.to_dict(SEQUENCE_FIELDS) for n, tally in self.sequences.items()}
+        player_stats = {None: stats}
+        _finalize_player_stats(player_stats, [None])
+        return stats
+
+    def merge(self, other):
+        """
+        Прибавляет статистику other (на месте) и возвращает self.
+        """
+        self.counters += other.counters
+        for name, tally in other.tallies.items():
+            self.tallies[name].merge(tally)
+        for n, tally in other.sequences.items():
+            if n in self.sequences:
+                self.sequences[n].merge(tally)
+            else:
+                self.sequences[n] = tally.copy()
+        return self
+
+    def copy(self):
+        return PlayerStats(
+            self.counters.copy(),
+            {name: tally.copy() for name, tally in self.tallies.items()},
+            {n: tally.copy() for n, tally in self.sequences.items()}
+        )
+
+    def _tables(self):
+        return [self.tallies[name] for name in TALLY_FIELDS] + list(self.sequences.values())
+
+def pack_match_stats(player_stats):
+    """
+    {игрок: словарь статистики} -> {игрок: PlayerStats}.
+    """
+    return {player: PlayerStats.from_dict(stats) for player, stats in player_stats.items()}
+
+def unpack_match_stats(packed):
+    """
+    {игрок: PlayerStats} -> словарь player_stats прежнего вида.
+    """
+    return {player: stats.to_dict() for player, stats in packed.items()}
+
+def merge_match_stats(matches):
+    """
+    Объединяет статистику нескольких матчей ({игрок: PlayerStats} или
+    словари player_stats) в {игрок: PlayerStats}.
+    """
+    merged = {}
+    for match in matches:
+        for player, stats in match.items():
+            if not isinstance(stats, PlayerStats):
+                stats = PlayerStats.from_dict(stats)
+            if player in merged:
+                merged[player].merge(stats)
+            else:
+                merged[player] = stats.copy()
+    return merged
+
+def _encode_names(names, symbols):
+    """
+    Имена таблицы в виде номеров в общей таблице символов: комбинации
+    ударов разбиваются на отдельные удары, поэтому каждая строка
+    сохраняется один раз. Нестроковые имена сохраняются как есть.
+    """
+    encoded = []
+    for name in names:
+        if isinstance(name, str):
+            encoded.append(tuple(symbols.setdefault(part, len(symbols)) for part in name.split(SEQUENCE_SEPARATOR)))
+        else:
+            encoded.append(name)
+    return encoded
+
+def _decode_names(encoded, symbols):
+    return [
+        SEQUENCE_SEPARATOR.join(symbols[i] for i in name) if isinstance(name, tuple) else name
+        for name in encoded
+    ]
+
+def dumps_match_stats(packed):
+    """
+    Сериализует {игрок: PlayerStats} в байты: короткий заголовок с именами
+    игроков и словарями, затем буферы массивов int64.
+    """
+    symbols = {}
+    players = []
+    buffers = []
+    for player, stats in packed.items():
+        players.append((player, [_encode_names(tally.names, symbols) for tally in stats._tables()], list(stats.sequences)))
+        buffers.append(stats.counters)
+        buffers.extend(tally.values for tally in stats._tables())
+    header_bytes = pickle.dumps((list(symbols), players), protocol=pickle.HIGHEST_PROTOCOL)
+    return b''.join(
+        [MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+        + [np.ascontiguousarray(buffer, dtype='<i8').tobytes() for buffer in buffers]
+    )
+
+def loads_match_stats(data):
+    """
+    Обратное преобразование для dumps_match_stats.
+    """
+    if data[:4] != MAGIC:
+        raise ValueError('Неизвестный формат статистики')
+    header_size = struct.unpack_from('<I', data, 4)[0]
+    offset = 8 + header_size
+    symbols, players = pickle.loads(data[8:offset])
+
+    def take(count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype='<i8', count=count, offset=offset).astype(np.int64)
+        offset += count * 8
+        return array
+
+    packed = {}
+    for player, table_names, sequence_lengths in players:
+        counters = take(len(COUNTER_FIELDS))
+        widths = [1 if fields is None else len(fields) for fields in TALLY_FIELDS.values()]
+        widths += [len(SEQUENCE_FIELDS)] * len(sequence_lengths)
+        tables = []
+        for width, encoded in zip(widths, table_names):
+            names = _decode_names(encoded, symbols)
+            tables.append(Tally(width, names, take(len(names) * width).reshape(-1, width)))
+        tallies = dict(zip(TALLY_FIELDS, tables))
+        sequences = dict(zip(sequence_lengths, tables[len(TALLY_FIELDS):]))
+        packed[player] = PlayerStats(counters, tallies, sequences)
+    return packed
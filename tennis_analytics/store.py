@@ -0,0 +1,189 @@
+"""
+Локальное хранилище проанализированных матчей в SQLite. Для каждого матча
+сохраняются исходные события (CSV, сжатый zlib) и player_stats в
+компактном двоичном виде, а в отдельной таблице - строка на игрока матча
+(игрок, соперник, дата, турнир) с индексами для запросов истории.
+Последние N матчей игрока читаются по индексу без загрузки событий и
+без повторного анализа.
+"""
+import io
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from tennis_analytics.cache import file_content_hash
+from tennis_analytics.stats import dumps_match_stats, loads_match_stats, pack_match_stats, unpack_match_stats
+
+DEFAULT_STORE_PATH = Path(os.environ.get(
+    'TENNIS_MATCH_STORE', Path.home() / '.local' / 'share' / 'tennis_analytics' / 'matches.sqlite3'
+))
+
+# Версия схемы (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    played_on TEXT,
+    tournament TEXT,
+    source TEXT,
+    rows INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    stats BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_events (
+    match_id INTEGER PRIMARY KEY REFERENCES matches(id) ON DELETE CASCADE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    match_id INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    opponent TEXT,
+    played_on TEXT,
+    tournament TEXT,
+    PRIMARY KEY (match_id, player)
+);
+CREATE INDEX IF NOT EXISTS match_players_player ON match_players (player, played_on DESC, match_id DESC);
+CREATE INDEX IF NOT EXISTS match_players_opponent ON match_players (opponent, played_on DESC);
+CREATE INDEX IF NOT EXISTS match_players_tournament ON match_players (tournament, played_on DESC);
+CREATE INDEX IF NOT EXISTS match_players_played_on ON match_players (played_on DESC);
+"""
+
+def _player_names(player_stats):
+    # Пропуски в столбце игрока (NaN) в историю не попадают
+    return [player for player in player_stats if isinstance(player, str)]
+
+class MatchStore:
+    """
+    Хранилище матчей в файле SQLite:
+
+        store = MatchStore()
+        match_id = store.save_match(file_bytes, player_stats, played_on='2024-05-12', tournament='Кубок')
+        store.last_matches('Иванов', 10)    # история без повторного анализа
+        store.load_events(match_id)         # исходные события матча
+
+    Соединение открывается на каждую операцию, поэтому объект можно
+    использовать из нескольких сеансов и потоков; журнал WAL позволяет
+    читать во время записи.
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            if connection.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                with connection:
+                    connection.executescript(SCHEMA)
+                    connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute('PRAGMA foreign_keys = ON')
+        return connection
+
+    def save_match(self, data, player_stats, played_on=None, tournament=None, source=None):
+        """
+        Сохраняет матч: data - исходный CSV (байты), player_stats - результат
+        анализа. played_on - дата ('ГГГГ-ММ-ДД' или date). Повторное
+        сохранение того же файла обновляет дату, турнир и статистику.
+        Возвращает номер матча.
+        """
+        played_on = played_on.isoformat() if hasattr(played_on, 'isoformat') else played_on
+        tournament = tournament or None
+        players = _player_names(player_stats)
+        stats = dumps_match_stats(pack_match_stats(player_stats))
+        rows = max(data.count(b'\n') - 1, 0)
+
+        with closing(self._connect()) as connection, connection:
+            match_id = connection.execute(
+                """
+                INSERT INTO matches (content_hash, played_on, tournament, source, rows, created_at, stats)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET
+                    played_on = excluded.played_on, tournament = excluded.tournament,
+                    source = coalesce(excluded.source, source), stats = excluded.stats
+                RETURNING id
+                """,
+                (file_content_hash(data), played_on, tournament, source, rows, time.time(), stats)
+            ).fetchone()[0]
+            connection.execute(
+                'INSERT OR IGNORE INTO match_events (match_id, data) VALUES (?, ?)',
+                (match_id, zlib.compress(data, 1))
+            )
+            connection.execute('DELETE FROM match_players WHERE match_id = ?', (match_id,))
+            # Соперник - первый другой игрок матча
+            connection.executemany(
+                'INSERT INTO match_players (match_id, player, opponent, played_on, tournament) VALUES (?, ?, ?, ?, ?)',
+                [
+                    (match_id, player, next((p for p in players if p != player), None), played_on, tournament)
+                    for player in players
+                ]
+            )
+        return match_id
+
+    def players(self):
+        """
+        Игроки, у которых есть сохраненные матчи, по алфавиту.
+        """
+        with closing(self._connect()) as connection:
+            return [row[0] for row in connection.execute('SELECT DISTINCT player FROM match_players ORDER BY player')]
+
+    def last_matches(self, player, n=10, opponent=None, tournament=None):
+        """
+        Последние n матчей игрока (новые первыми; матчи без даты - в конце),
+        при необходимости - только против соперника или в турнире.
+        Возвращает список словарей с ключами 'match_id', 'played_on',
+        'tournament', 'opponent', 'source' и 'player_stats' (статистика
+        всех игроков матча).
+        """
+        conditions = ['mp.player = ?']
+        params = [player]
+        if opponent is not None:
+            conditions.append('mp.opponent = ?')
+            params.append(opponent)
+        if tournament is not None:
+            conditions.append('mp.tournament = ?')
+            params.append(tournament)
+
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"""
+                SELECT mp.match_id, mp.played_on, mp.tournament, mp.opponent, m.source, m.stats
+                FROM match_players mp JOIN matches m ON m.id = mp.match_id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY mp.played_on DESC, mp.match_id DESC
+                LIMIT ?
+                """,
+                params + [n]
+            ).fetchall()
+        return [
+            {
+                'match_id': match_id,
+                'played_on': played_on,
+                'tournament': tournament,
+                'opponent': opponent,
+                'source': source,
+                'player_stats': unpack_match_stats(loads_match_stats(stats)),
+            }
+            for match_id, played_on, tournament, opponent, source, stats in rows
+        ]
+
+    def load_events(self, match_id):
+        """
+        Исходные события матча в виде DataFrame.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute('SELECT data FROM match_events WHERE match_id = ?', (match_id,)).fetchone()
+        if row is None:
+            raise KeyError(match_id)
+        return pd.read_csv(io.BytesIO(zlib.decompress(row[0])))
+
+    def delete_match(self, match_id):
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM matches WHERE id = ?', (match_id,))
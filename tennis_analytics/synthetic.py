@@ -0,0 +1,208 @@
+"""
+Генератор синтетических данных матча с детерминированным зерном.
+Матч разыгрывается по теннисным правилам (геймы, сеты, тай-брейк при 6-6),
+а каждое действие записывается строкой в формате CSV, который ожидает
+приложение: Player_1, Serve, Serve Zone, Serve Result, Shot Type,
+Finish Type, Game Score.
+
+Пример:
+    python -m tennis_analytics.synthetic --rows 1000000 --seed 1 -o match.csv
+"""
+import argparse
+import random
+
+import pandas as pd
+
+COLUMNS = ['Player_1', 'Serve', 'Serve Zone', 'Serve Result', 'Shot Type', 'Finish Type', 'Game Score']
+
+PLAYER_NAMES = [
+    'Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов',
+    'Волков', 'Соколов', 'Лебедев', 'Козлов', 'Новиков', 'Морозов',
+]
+
+SERVE_ZONES = (['Wide', 'Body', 'T'], [35, 20, 45])
+SHOT_TYPES = (['Forehand', 'Backhand', 'Slice', 'Volley', 'Drop Shot', 'Lob'], [45, 35, 9, 7, 2, 2])
+FINISH_TYPES = (['Winner', 'Forced Error', 'Unforced Error'], [30, 25, 45])
+
+GAME_POINTS = ['0', '15', '30', '40']
+
+# Вероятности, близкие к статистике профессиональных матчей
+FIRST_SERVE_IN = 0.62
+SECOND_SERVE_IN = 0.92
+ACE_ON_FIRST_SERVE = 0.10
+ACE_ON_SECOND_SERVE = 0.01
+MEAN_RALLY_SHOTS = 4.0
+
+def _game_score(server_points, returner_points):
+    """
+    Счет в гейме с точки зрения подающего: '30-15', '40-40', 'A-40', '40-A'.
+    """
+    if server_points >= 3 and returner_points >= 3:
+        if server_points == returner_points:
+            return '40-40'
+        return 'A-40' if server_points > returner_points else '40-A'
+    return f'{GAME_POINTS[server_points]}-{GAME_POINTS[returner_points]}'
+
+def _play_point(rng, server, returner, score, rows):
+    """
+    Добавляет строки одного розыгрыша в rows и возвращает победителя.
+    """
+    zone = rng.choices(*SERVE_ZONES)[0]
+
+    if rng.random() < FIRST_SERVE_IN:
+        serve = '1st'
+    else:
+        rows.append((server, '1st', zone, 'Fault', '-', '-', score))
+        zone = rng.choices(*SERVE_ZONES)[0]
+        if rng.random() >= SECOND_SERVE_IN:
+            rows.append((server, '2nd', zone, 'Double Fault', '-', 'Unforced Error', score))
+            return returner
+        serve = '2nd'
+
+    ace_probability = ACE_ON_FIRST_SERVE if serve == '1st' else ACE_ON_SECOND_SERVE
+    if rng.random() < ace_probability:
+        rows.append((server, serve, zone, 'Ace', '-', 'Winner', score))
+        return server
+
+    rows.append((server, serve, zone, 'In', '-', '-', score))
+
+    # Завершение розыгрыша определяет, кто сделал последний удар:
+    # победный удар - победитель розыгрыша, ошибка - проигравший
+    finish = rng.choices(*FINISH_TYPES)[0]
+    shots = 1 + int(rng.expovariate(1 / MEAN_RALLY_SHOTS))
+    last_hitter_is_returner = shots % 2 == 1
+    hitters = [returner, server]
+    for shot in range(shots):
+        hitter = hitters[shot % 2]
+        is_last = shot == shots - 1
+        rows.append((hitter, '-', '-', '-', rng.choices(*SHOT_TYPES)[0], finish if is_last else '-', '-'))
+
+    last_hitter = returner if last_hitter_is_returner else server
+    if finish == 'Winner':
+        return last_hitter
+    return server if last_hitter == returner else returner
+
+def _play_game(rng, server, returner, rows):
+    points = {server: 0, returner: 0}
+    while True:
+        winner = _play_point(rng, server, returner, _game_score(points[server], points[returner]), rows)
+        points[winner] += 1
+        if points[winner] >= 4 and points[winner] - min(points.values()) >= 2:
+            return winner
+
+def _play_tiebreak(rng, first_server, second_server, rows):
+    points = {first_server: 0, second_server: 0}
+    played = 0
+    while True:
+        # Подача меняется после первого очка, затем через каждые два
+        server = first_server if (played + 1) // 2 % 2 == 0 else second_server
+        returner = second_server if server == first_server else first_server
+        score = f'{points[server]}-{points[returner]}'
+        winner = _play_point(rng, server, returner, score, rows)
+        points[winner] += 1
+        played += 1
+        if points[winner] >= 7 and points[winner] - min(points.values()) >= 2:
+            return winner
+
+def _play_set(rng, players, first_server, rows):
+    games = {player: 0 for player in players}
+    server = first_server
+    while True:
+        returner = players[1] if server == players[0] else players[0]
+        if games[players[0]] == 6 and games[players[1]] == 6:
+            winner = _play_tiebreak(rng, server, returner, rows)
+            return winner, returner
+        winner = _play_game(rng, server, returner, rows)
+        games[winner] += 1
+        server = returner
+        if games[winner] >= 6 and games[winner] - min(games.values()) >= 2:
+            return winner, server
+
+def iter_match_points(seed=0, players=None, best_of=3, sets=None):
+    """
+    Генерирует матч и возвращает строки по розыгрышам: каждый элемент -
+    список строк (кортежей в порядке COLUMNS) одного сета.
+
+    Args:
+        seed: Зерно генератора
+        players: Пара имен игроков (по умолчанию выбирается по зерну)
+        best_of: Число сетов в матче (3 или 5)
+        sets: Ограничить матч этим числом сетов
+    """
+    rng = random.Random(seed)
+    players = list(players or rng.sample(PLAYER_NAMES, 2))
+    sets_won = {player: 0 for player in players}
+    server = players[0]
+    played = 0
+    while max(sets_won.values()) <= best_of // 2 and (sets is None or played < sets):
+        rows = []
+        winner, server = _play_set(rng, players, server, rows)
+        sets_won[winner] += 1
+        played += 1
+        yield rows
+
+def generate_match(seed=0, players=None, best_of=3, sets=None):
+    """
+    Возвращает DataFrame одного синтетического матча.
+    """
+    rows = [row for set_rows in iter_match_points(seed, players, best_of, sets) for row in set_rows]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+def iter_match_chunks(rows, seed=0, players=None, best_of=3, chunk_rows=500_000):
+    """
+    Генерирует не меньше rows строк (несколько матчей одних и тех же игроков
+    подряд) частями DataFrame примерно по chunk_rows строк.
+    """
+    rng = random.Random(seed)
+    players = list(players or rng.sample(PLAYER_NAMES, 2))
+    produced = 0
+    buffer = []
+    match = 0
+    while produced < rows:
+        for set_rows in iter_match_points(seed * 100_003 + match, players, best_of):
+            buffer.extend(set_rows)
+            produced += len(set_rows)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=COLUMNS)
+                buffer = []
+            if produced >= rows:
+                break
+        match += 1
+    if buffer:
+        yield pd.DataFrame(buffer, columns=COLUMNS)
+
+def write_match_csv(path, rows=None, sets=None, seed=0, best_of=3, chunk_rows=500_000):
+    """
+    Записывает синтетические данные в CSV частями, не держа весь файл в памяти.
+    Размер задается числом строк (rows) или числом сетов одного матча (sets).
+    Возвращает число записанных строк.
+    """
+    if rows is None:
+        chunks = [generate_match(seed, best_of=best_of, sets=sets)]
+    else:
+        chunks = iter_match_chunks(rows, seed, best_of=best_of, chunk_rows=chunk_rows)
+
+    written = 0
+    for chunk in chunks:
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(chunk)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m tennis_analytics.synthetic',
+        description='Генерация синтетического CSV с данными теннисного матча'
+    )
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--rows', type=int, help='Минимальное число строк')
+    size.add_argument('--sets', type=int, help='Число сетов одного матча')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора')
+    parser.add_argument('--best-of', type=int, choices=[3, 5], default=3, help='Формат матча')
+    parser.add_argument('-o', '--output', required=True, help='Путь к CSV')
+    args = parser.parse_args(argv)
+
+    written = write_match_csv(args.output, rows=args.rows, sets=args.sets, seed=args.seed, best_of=args.best_of)
+    print(f'Записано строк: {written}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Ход матча по розыгрышам: подающий, победитель и ключевые моменты каждого
+розыгрыша в порядке игры. Строится по таблице PointIndex, поэтому
+согласован с player_stats.
+"""
+import numpy as np
+import pandas as pd
+
+from tennis_analytics.points import PointIndex
+from tennis_analytics.scoring import tiebreak_flags
+
+TIMELINE_COLUMNS = ['point', 'server', 'winner', 'break_point', 'game_point', 'hold', 'break', 'hold_streak']
+
+def point_timeline(source):
+    """
+    Возвращает DataFrame со строкой на розыгрыш (source - DataFrame
+    матча или готовый PointIndex):
+        point - номер розыгрыша (с 1);
+        server, winner - подающий и победитель (категории в порядке
+        появления игроков; победитель пуст, если его нельзя определить);
+        break_point, game_point - флаги счета перед розыгрышем;
+        hold, break - розыгрыш закончил гейм победой подающего или принимающего
+        (в тай-брейке не отмечаются: геймов на подаче в нем нет);
+        hold_streak - число взятых подряд геймов на подаче подающего после
+        этого розыгрыша (только в строках hold и break).
+    """
+    points = (source if isinstance(source, PointIndex) else PointIndex(source)).points
+    if points.empty:
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+
+    # Сет-болы тай-брейка не завершают гейм на подаче
+    service_game = ~tiebreak_flags(points['game_score'])
+    timeline = pd.DataFrame({
+        'point': np.arange(1, len(points) + 1),
+        'server': points['server'].array,
+        'winner': points['winner'].array,
+        'break_point': points['break_point'].to_numpy(),
+        'game_point': points['game_point'].to_numpy(),
+        'hold': (points['game_point'] & (points['winner'] == points['server'])).to_numpy() & service_game,
+        'break': (points['break_point'] & (points['winner'] == points['returner'])).to_numpy() & service_game,
+    })
+    # Серия взятых подач: геймы подающего после его последнего проигранного гейма
+    games = timeline[timeline['hold'] | timeline['break']]
+    streak_group = games['break'].groupby(games['server'], observed=True).cumsum()
+    streak = games['hold'].astype(int).groupby([games['server'], streak_group], observed=True).cumsum()
+    timeline['hold_streak'] = streak.reindex(timeline.index)
+    return timeline
+
+def minmax_indices(values, max_points):
+    """
+    Индексы точек ряда для отображения не более чем max_points (+2 крайние)
+    точками: ряд делится на max_points // 2 равных интервалов, и из каждого
+    берутся минимум и максимум, поэтому пики и провалы сохраняются.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    # Последний интервал дополняется повтором последней точки
+    index = np.minimum(np.arange(buckets * size), n - 1).reshape(buckets, size)
+    bucket_values = values[index]
+    lows = index[np.arange(buckets), np.nanargmin(bucket_values, axis=1)]
+    highs = index[np.arange(buckets), np.nanargmax(bucket_values, axis=1)]
+    return np.unique(np.concatenate([lows, highs, [0, n - 1]]))
@@ -0,0 +1,82 @@
+"""
+Замер времени этапов анализа. Этапы с одинаковым именем суммируются,
+вместе со временем сохраняются числа строк и розыгрышей, чтобы считать
+пропускную способность. Итоги пишутся в журнал строками JSON.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('tennis_analytics.timing')
+
+class StageTimer:
+    """
+    Накопитель времени этапов:
+
+        timer = StageTimer()
+        with timer.stage('read', rows=len(df)) as record:
+            ...
+            record['points'] = n_points
+    """
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=None, points=None):
+        record = {'rows': rows, 'points': points}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.record(name, time.perf_counter() - started, record['rows'], record['points'])
+
+    def record(self, name, seconds, rows=None, points=None):
+        entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'rows': None, 'points': None})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+        if rows is not None:
+            entry['rows'] = rows
+        if points is not None:
+            entry['points'] = points
+
+    def rows(self):
+        """
+        Таблица этапов с пропускной способностью (строк и розыгрышей в секунду).
+        """
+        table = []
+        for name, entry in self.stages.items():
+            seconds = entry['seconds']
+            table.append({
+                'stage': name,
+                'seconds': round(seconds, 6),
+                'calls': entry['calls'],
+                'rows': entry['rows'],
+                'points': entry['points'],
+                'rows_per_second': round(entry['rows'] / seconds) if entry['rows'] and seconds > 0 else None,
+                'points_per_second': round(entry['points'] / seconds) if entry['points'] and seconds > 0 else None,
+            })
+        return table
+
+    def log(self, **context):
+        """
+        Пишет по строке JSON на этап; context (например, идентификатор
+        сессии и движок) добавляется в каждую строку для агрегирования.
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        for row in self.rows():
+            logger.info(json.dumps({'event': 'stage_timing', **context, **row}, ensure_ascii=False, default=str))
+
+class _NullTimer:
+    """
+    Заглушка с тем же интерфейсом: используется, когда замер не нужен.
+    """
+    @contextmanager
+    def stage(self, name, rows=None, points=None):
+        yield {'rows': rows, 'points': points}
+
+    def record(self, name, seconds, rows=None, points=None):
+        pass
+
+NULL_TIMER = _NullTimer()
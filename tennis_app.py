@@ -1,14 +1,92 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-from collections import defaultdict
 import io
-import re
+import logging
+import os
+import pickle
+import tempfile
+import time
+import zipfile
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from tennis_analytics.background import BackgroundAnalysis
+from tennis_analytics.batch import analyze_match_batch
+from tennis_analytics.cache import LRUCache, file_content_hash, stats_fingerprint
+from tennis_analytics.charts import (
+    cached_chart,
+    create_key_shots_chart,
+    create_momentum_chart,
+    create_rally_stats_chart,
+    create_serve_stats_chart,
+    create_serve_zones_chart,
+    create_shot_combinations_chart,
+    create_shot_types_chart,
+)
+from tennis_analytics.columnar_cache import read_match_table
+from tennis_analytics.engine import (
+    analyze_match_data,
+    analyze_match_data_columnar,
+    analyze_match_data_streaming,
+)
+from tennis_analytics.live import LiveMatchTail
+from tennis_analytics.memory import MemoryBudget, count_rows, track_memory
+from tennis_analytics.parallel import analyze_match_data_parallel
+from tennis_analytics.points import PointIndex
+from tennis_analytics.recommendations import generate_player_recommendations, generate_roster_recommendations
+from tennis_analytics.report import export_player_reports
+from tennis_analytics.stats import merge_match_stats, unpack_match_stats
+from tennis_analytics.store import DEFAULT_STORE_PATH, MatchStore
+from tennis_analytics.timeline import point_timeline
+from tennis_analytics.timing import StageTimer
 
 st.set_page_config(layout="wide", page_title="Теннисная аналитика")
 
+# Разделы отчета о матче (строится только выбранный)
+MATCH_SECTIONS = ["Визуализация данных", "Детальная статистика игроков", "Рекомендации для игроков"]
+
+# Фильтр ключевых моментов: подпись -> столбец таблицы розыгрышей
+KEY_POINT_FILTERS = {"Брейк-пойнты": "break_point", "Гейм-пойнты": "game_point", "Напряженные моменты": "pressure"}
+SERVE_FILTERS = {"Первая": "1st", "Вторая": "2nd"}
+
+# Столбцы, без которых анализ невозможен
+REQUIRED_COLUMNS = ['Player_1', 'Serve', 'Shot Type']
+
+# Файлы от этого размера анализируются в фоновом потоке с прогрессом и отменой
+BACKGROUND_MIN_BYTES = int(os.environ.get("TENNIS_BACKGROUND_MIN_MB", 20)) * 1024 * 1024
+BACKGROUND_POLL_SECONDS = 1.0
+BACKGROUND_STAGES = {"read": "Чтение и подсчет", "point_index": "Индекс розыгрышей"}
+
+# Бюджет памяти на анализ файла в одном сеансе (0 - без ограничения)
+SESSION_MEMORY_BYTES = int(os.environ.get("TENNIS_SESSION_MEMORY_MB", 1024)) * 1024 * 1024
+# Движок приложения -> строка таблицы оценок памяти
+ENGINE_MEMORY_KEYS = {"Колоночный": "columnar", "Параллельный": "parallel", "Построчный": "rows"}
+
+# Заголовки категорий рекомендаций в таблице состава
+RECOMMENDATION_LABELS = {
+    "strengths": "Сильные стороны",
+    "improvements": "Области для улучшения",
+    "tactics": "Тактика",
+    "training_focus": "Фокус тренировок",
+    "mental_game": "Ментальный аспект"
+}
+
+def configure_timing_log():
+    """
+    Строки замеров этапов пишутся в stderr или в файл из TENNIS_TIMING_LOG.
+    Обработчик добавляется один раз на процесс, а не при каждом перезапуске скрипта.
+    """
+    timing_logger = logging.getLogger("tennis_analytics.timing")
+    if timing_logger.handlers:
+        return
+    log_path = os.environ.get("TENNIS_TIMING_LOG")
+    handler = logging.FileHandler(log_path, encoding="utf-8") if log_path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    timing_logger.addHandler(handler)
+    timing_logger.setLevel(logging.INFO)
+    timing_logger.propagate = False
+
+configure_timing_log()
+
 # Получаем настройки из боковой панели
 def add_settings_sidebar():
     st.sidebar.title("Настройки анализа")
@@ -16,8 +94,47 @@ def add_settings_sidebar():
     # Общие настройки
     st.sidebar.header("Общие настройки")
     
+    mode = st.sidebar.radio("Режим", ["Один матч", "Живой матч", "Пакетный анализ", "История игрока"], horizontal=True)
+    
+    live_autorefresh = False
+    live_interval = 5
+    if mode == "Живой матч":
+        live_autorefresh = st.sidebar.checkbox("Автообновление", value=True)
+        live_interval = st.sidebar.number_input("Интервал обновления (с)", min_value=1, max_value=300, value=5)
+    
     show_help = st.sidebar.checkbox("Показывать подсказки", value=True)
     
+    diagnostics = st.sidebar.checkbox(
+        "Диагностика производительности",
+        value=False,
+        help="Показывать время каждого этапа анализа и отрисовки и пик памяти анализа (замер памяти замедляет анализ)"
+    )
+    
+    analysis_engine = st.sidebar.selectbox(
+        "Движок анализа",
+        ["Колоночный", "Параллельный", "Построчный"],
+        help="Колоночный движок считает статистику группировками и заметно быстрее на больших файлах; "
+             "параллельный делит большой файл на части по розыгрышам и считает их на всех ядрах"
+    )
+    
+    streaming = st.sidebar.checkbox(
+        "Потоковый анализ по частям",
+        value=False,
+        help="Файл читается частями, поэтому память не зависит от его размера"
+    )
+    background = st.sidebar.checkbox(
+        "Фоновый анализ больших файлов",
+        value=True,
+        help="Большой файл анализируется в фоне: видны прогресс и промежуточные итоги, анализ можно отменить"
+    )
+    chunk_size = 100_000
+    if streaming:
+        chunk_size = st.sidebar.select_slider(
+            "Размер части (строк)",
+            options=[10_000, 50_000, 100_000, 250_000, 500_000],
+            value=100_000
+        )
+    
     # Настройки визуализации
     st.sidebar.header("Визуализация")
     
@@ -28,6 +145,15 @@ def add_settings_sidebar():
     
     chart_height = st.sidebar.slider("Высота графиков", 300, 800, 400, 50)
     
+    heatmap_resolution = st.sidebar.slider("Разрешение карты зон подачи", 50, 500, 100, 50)
+    
+    sequence_length = st.sidebar.select_slider(
+        "Длина комбинаций ударов",
+        options=[2, 3, 4, 5],
+        value=2,
+        help="Последовательности из 3-5 ударов считают колоночный, параллельный и потоковый движки"
+    )
+    
     # Настройки рекомендаций
     st.sidebar.header("Рекомендации")
     
@@ -39,9 +165,19 @@ def add_settings_sidebar():
     
     # Возвращаем настройки в виде словаря
     return {
+        "mode": mode,
+        "live_autorefresh": live_autorefresh,
+        "live_interval": live_interval,
         "show_help": show_help,
+        "diagnostics": diagnostics,
+        "analysis_engine": analysis_engine,
+        "streaming": streaming,
+        "background": background,
+        "chunk_size": chunk_size,
         "color_scheme": color_scheme,
         "chart_height": chart_height,
+        "heatmap_resolution": heatmap_resolution,
+        "sequence_length": sequence_length,
         "recommendation_detail": recommendation_detail
     }
 
@@ -56,900 +192,657 @@ def get_color_scheme(settings):
     else:  # Стандартная
         return {"player1": "#0088FE", "player2": "#FF8042"}
 
-# Пороговые значения для разных показателей
-thresholds = {
-    'first_serve_pct': {'low': 50, 'medium': 60, 'high': 70},
-    'second_serve_pct': {'low': 80, 'medium': 85, 'high': 90},
-    'first_serve_won_pct': {'low': 60, 'medium': 70, 'high': 75},
-    'second_serve_won_pct': {'low': 40, 'medium': 50, 'high': 60},
-    'break_point_conversion': {'low': 30, 'medium': 40, 'high': 50},
-    'forehand_winners_ratio': {'low': 0.5, 'medium': 1.0, 'high': 1.5},
-    'long_rally_win_pct': {'low': 40, 'medium': 50, 'high': 60},
-}
-
-def analyze_match_data(df):
+def display_player_recommendations(recommendations, detail_level):
     """
-    Анализирует данные матча из CSV и возвращает статистику для обоих игроков.
+    Отображает рекомендации для игрока.
     """
-    # Получаем имена игроков
-    players = list(df['Player_1'].unique())
-    
-    # Инициализируем словарь для статистики
-    player_stats = {player: {} for player in players}
-    
-    # Группируем розыгрыши
-    points = []
-    current_point = None
-    
-    for _, row in df.iterrows():
-        # Начало нового розыгрыша
-        if isinstance(row['Serve'], str) and row['Serve'] in ['1st', '2nd', '1st Serve', '2nd Serve']:
-            if current_point:
-                points.append(current_point)
-            current_point = {'server': row['Player_1'], 'actions': [row.to_dict()]}
-        elif current_point:
-            current_point['actions'].append(row.to_dict())
-    
-    # Добавляем последний розыгрыш
-    if current_point:
-        points.append(current_point)
-    
-    # Анализ подачи
-    for player in players:
-        player_stats[player]['first_serve_total'] = 0
-        player_stats[player]['first_serve_in'] = 0
-        player_stats[player]['first_serve_won'] = 0
-        player_stats[player]['second_serve_total'] = 0
-        player_stats[player]['second_serve_in'] = 0
-        player_stats[player]['second_serve_won'] = 0
-        player_stats[player]['aces'] = 0
-        player_stats[player]['double_faults'] = 0
-        player_stats[player]['serve_zones'] = {}
-        player_stats[player]['shot_types'] = {}
-        player_stats[player]['shot_combinations'] = {}
-        player_stats[player]['points_by_rally_length'] = {'1-3': 0, '4-6': 0, '7-9': 0, '10+': 0}
-        player_stats[player]['wins_by_rally_length'] = {'1-3': 0, '4-6': 0, '7-9': 0, '10+': 0}
-        # Для анализа ключевых моментов
-        player_stats[player]['break_points'] = {'faced': 0, 'saved': 0, 'converted': 0}
-        player_stats[player]['game_points'] = {'faced': 0, 'saved': 0, 'converted': 0}
-        player_stats[player]['key_shots'] = {}
-        player_stats[player]['pressure_points_won'] = 0
-        player_stats[player]['pressure_points_total'] = 0
-    
-    # Анализируем каждый розыгрыш
-    for point in points:
-        server = point['server']
-        returner = [p for p in players if p != server][0] if len(players) > 1 else None
-        
-        # Анализ подачи
-        first_serve = next((a for a in point['actions'] if isinstance(a.get('Serve'), str) and a['Serve'] in ['1st', '1st Serve']), None)
-        second_serve = next((a for a in point['actions'] if isinstance(a.get('Serve'), str) and a['Serve'] in ['2nd', '2nd Serve']), None)
-        
-        if first_serve is not None:
-            player_stats[server]['first_serve_total'] += 1
-            
-            # Анализ зоны подачи
-            serve_zone = first_serve.get('Serve Zone')
-            if isinstance(serve_zone, str) and serve_zone != '-':
-                if serve_zone not in player_stats[server]['serve_zones']:
-                    player_stats[server]['serve_zones'][serve_zone] = 0
-                player_stats[server]['serve_zones'][serve_zone] += 1
-            
-            serve_result = first_serve.get('Serve Result')
-            if isinstance(serve_result, str) and serve_result in ['In', 'In Play']:
-                player_stats[server]['first_serve_in'] += 1
-            elif isinstance(serve_result, str) and serve_result == 'Ace':
-                player_stats[server]['first_serve_in'] += 1
-                player_stats[server]['aces'] += 1
-                player_stats[server]['first_serve_won'] += 1
-        
-        if second_serve is not None:
-            player_stats[server]['second_serve_total'] += 1
-            
-            serve_result = second_serve.get('Serve Result')
-            if isinstance(serve_result, str) and serve_result in ['In', 'In Play']:
-                player_stats[server]['second_serve_in'] += 1
-            elif isinstance(serve_result, str) and serve_result == 'Double Fault':
-                player_stats[server]['double_faults'] += 1
-        
-        # Определение победителя розыгрыша
-        winner = None
-        last_action = point['actions'][-1]
-        
-        if isinstance(last_action.get('Finish Type'), str) and last_action['Finish Type'] == 'Winner':
-            winner = last_action['Player_1']
-        elif isinstance(last_action.get('Finish Type'), str) and last_action['Finish Type'] in ['Forced Error', 'Unforced Error']:
-            winner = [p for p in players if p != last_action['Player_1']][0] if len(players) > 1 else None
-        
-        # Анализ счета в гейме для определения ключевых моментов
-        game_score = None
-        for action in point['actions']:
-            if isinstance(action.get('Game Score'), str) and action['Game Score'] != '-':
-                game_score = action['Game Score']
-                break
-        
-        if game_score and returner:
-            # Проверяем, является ли это брейк-пойнтом
-            is_break_point = False
-            is_game_point = False
-            
-            # Попробуем определить брейк-пойнты и гейм-пойнты по стандартным обозначениям
-            try:
-                if '40-A' in game_score or 'A-40' in game_score or '30-40' in game_score or '40-30' in game_score or '15-40' in game_score or '40-15' in game_score or '0-40' in game_score or '40-0' in game_score:
-                    if '40-A' in game_score or '30-40' in game_score or '15-40' in game_score or '0-40' in game_score:
-                        is_break_point = True
-                        player_stats[server]['break_points']['faced'] += 1
-                        player_stats[returner]['break_points']['faced'] += 1
-                    
-                    if 'A-40' in game_score or '40-30' in game_score or '40-15' in game_score or '40-0' in game_score:
-                        is_game_point = True
-                        player_stats[server]['game_points']['faced'] += 1
-            except:
-                pass
-            
-            # Обновляем статистику по ключевым моментам
-            if winner and (is_break_point or is_game_point):
-                if is_break_point:
-                    if winner == returner:
-                        player_stats[returner]['break_points']['converted'] += 1
-                    else:
-                        player_stats[server]['break_points']['saved'] += 1
-                
-                if is_game_point:
-                    if winner == server:
-                        player_stats[server]['game_points']['converted'] += 1
-                    else:
-                        player_stats[returner]['game_points']['saved'] += 1
+    if detail_level == "Минимальная":
+        # Для минимальной детализации показываем только самое важное
+        st.subheader("Ключевые рекомендации")
         
-        # Обновление статистики по победителю розыгрыша
-        if winner:
-            # Определяем длину розыгрыша
-            shot_count = sum(1 for a in point['actions'] if isinstance(a.get('Shot Type'), str) and a['Shot Type'] != '-')
-            
-            if shot_count <= 3:
-                rally_length = '1-3'
-            elif shot_count <= 6:
-                rally_length = '4-6'
-            elif shot_count <= 9:
-                rally_length = '7-9'
-            else:
-                rally_length = '10+'
-            
-            # Обновляем статистику по длине розыгрыша
-            for player in players:
-                player_stats[player]['points_by_rally_length'][rally_length] += 1
-            
-            # Отмечаем победителя
-            player_stats[winner]['wins_by_rally_length'][rally_length] += 1
-            
-            # Обновляем статистику подачи
-            if winner == server:
-                if first_serve and isinstance(first_serve.get('Serve Result'), str) and first_serve['Serve Result'] in ['In', 'In Play']:
-                    player_stats[server]['first_serve_won'] += 1
-                elif second_serve and isinstance(second_serve.get('Serve Result'), str) and second_serve['Serve Result'] in ['In', 'In Play']:
-                    player_stats[server]['second_serve_won'] += 1
+        # Объединяем все в один список
+        all_recs = []
+        for category, items in recommendations.items():
+            all_recs.extend(items)
         
-        # Анализ типов ударов
-        for action in point['actions']:
-            shot_type = action.get('Shot Type')
-            if isinstance(shot_type, str) and shot_type != '-':
-                player = action['Player_1']
-                
-                if shot_type not in player_stats[player]['shot_types']:
-                    player_stats[player]['shot_types'][shot_type] = 0
-                player_stats[player]['shot_types'][shot_type] += 1
-                
-                # Анализ ключевых ударов
-                if game_score and (is_break_point or is_game_point):
-                    if shot_type not in player_stats[player]['key_shots']:
-                        player_stats[player]['key_shots'][shot_type] = {'total': 0, 'won': 0}
-                    
-                    player_stats[player]['key_shots'][shot_type]['total'] += 1
-                    
-                    if winner == player:
-                        player_stats[player]['key_shots'][shot_type]['won'] += 1
-                
-                # Обновляем статистику по напряженным моментам
-                if game_score and (is_break_point or is_game_point or '30-30' in game_score or '40-40' in game_score):
-                    player_stats[player]['pressure_points_total'] += 1
-                    if winner == player:
-                        player_stats[player]['pressure_points_won'] += 1
+        # Выбираем максимум 3 самые важные рекомендации
+        for rec in all_recs[:3]:
+            st.write(f"• {rec}")
+    else:
+        # Для средней и подробной детализации показываем по категориям
+        if recommendations['strengths']:
+            st.subheader("💪 Сильные стороны")
+            for strength in recommendations['strengths']:
+                st.write(f"• {strength}")
         
-        # Анализ комбинаций ударов
-        for i in range(len(point['actions']) - 1):
-            curr_shot = point['actions'][i].get('Shot Type')
-            next_shot = point['actions'][i+1].get('Shot Type')
-            
-            if (isinstance(curr_shot, str) and curr_shot != '-' and 
-                isinstance(next_shot, str) and next_shot != '-'):
-                
-                player = point['actions'][i]['Player_1']
-                combo = f"{curr_shot} → {next_shot}"
-                
-                if combo not in player_stats[player]['shot_combinations']:
-                    player_stats[player]['shot_combinations'][combo] = {'count': 0, 'wins': 0}
-                
-                player_stats[player]['shot_combinations'][combo]['count'] += 1
-                
-                if winner == player:
-                    player_stats[player]['shot_combinations'][combo]['wins'] += 1
-    
-    # Рассчитываем проценты и соотношения
-    for player in players:
-        # Процент подач
-        if player_stats[player]['first_serve_total'] > 0:
-            player_stats[player]['first_serve_pct'] = round(
-                player_stats[player]['first_serve_in'] / player_stats[player]['first_serve_total'] * 100, 1
-            )
-        else:
-            player_stats[player]['first_serve_pct'] = 0
-            
-        if player_stats[player]['second_serve_total'] > 0:
-            player_stats[player]['second_serve_pct'] = round(
-                player_stats[player]['second_serve_in'] / player_stats[player]['second_serve_total'] * 100, 1
-            )
-        else:
-            player_stats[player]['second_serve_pct'] = 0
-            
-        # Процент выигранных очков на подаче
-        if player_stats[player]['first_serve_in'] > 0:
-            player_stats[player]['first_serve_won_pct'] = round(
-                player_stats[player]['first_serve_won'] / player_stats[player]['first_serve_in'] * 100, 1
-            )
-        else:
-            player_stats[player]['first_serve_won_pct'] = 0
-            
-        if player_stats[player]['second_serve_in'] > 0:
-            player_stats[player]['second_serve_won_pct'] = round(
-                player_stats[player]['second_serve_won'] / player_stats[player]['second_serve_in'] * 100, 1
-            )
-        else:
-            player_stats[player]['second_serve_won_pct'] = 0
+        if recommendations['improvements']:
+            st.subheader("🔄 Области для улучшения")
+            for improvement in recommendations['improvements']:
+                st.write(f"• {improvement}")
         
-        # Расчет процента выигранных розыгрышей по длине
-        for length in player_stats[player]['points_by_rally_length']:
-            if player_stats[player]['points_by_rally_length'][length] > 0:
-                player_stats[player][f'{length}_rally_win_pct'] = round(
-                    player_stats[player]['wins_by_rally_length'][length] / 
-                    player_stats[player]['points_by_rally_length'][length] * 100, 1
-                )
-            else:
-                player_stats[player][f'{length}_rally_win_pct'] = 0
-                
-        # Обобщенный показатель для длинных розыгрышей (4+ ударов)
-        long_rally_wins = sum(player_stats[player]['wins_by_rally_length'][l] 
-                            for l in ['4-6', '7-9', '10+'])
-        long_rally_points = sum(player_stats[player]['points_by_rally_length'][l] 
-                              for l in ['4-6', '7-9', '10+'])
+        if recommendations['tactics']:
+            st.subheader("🎯 Тактические рекомендации")
+            for tactic in recommendations['tactics']:
+                st.write(f"• {tactic}")
         
-        if long_rally_points > 0:
-            player_stats[player]['long_rally_win_pct'] = round(
-                long_rally_wins / long_rally_points * 100, 1
-            )
-        else:
-            player_stats[player]['long_rally_win_pct'] = 0
+        if recommendations['training_focus']:
+            st.subheader("🏋️ Фокус тренировок")
+            for focus in recommendations['training_focus']:
+                st.write(f"• {focus}")
         
-        # Расчет выигрышей комбинаций
-        for combo in player_stats[player]['shot_combinations']:
-            combo_stats = player_stats[player]['shot_combinations'][combo]
-            if combo_stats['count'] > 0:
-                combo_stats['win_percentage'] = round(
-                    combo_stats['wins'] / combo_stats['count'] * 100, 1
-                )
-            else:
-                combo_stats['win_percentage'] = 0
-                
-        # Расчет статистики по ключевым ударам
-        for shot_type in player_stats[player]['key_shots']:
-            shot_stats = player_stats[player]['key_shots'][shot_type]
-            if shot_stats['total'] > 0:
-                shot_stats['win_percentage'] = round(
-                    shot_stats['won'] / shot_stats['total'] * 100, 1
-                )
-            else:
-                shot_stats['win_percentage'] = 0
-                
-        # Процент выигранных очков под давлением
-        if player_stats[player]['pressure_points_total'] > 0:
-            player_stats[player]['pressure_points_pct'] = round(
-                player_stats[player]['pressure_points_won'] / player_stats[player]['pressure_points_total'] * 100, 1
-            )
-        else:
-            player_stats[player]['pressure_points_pct'] = 0
-    
-    return player_stats
+        if recommendations['mental_game']:
+            st.subheader("🧠 Ментальный аспект")
+            for mental in recommendations['mental_game']:
+                st.write(f"• {mental}")
 
-def generate_player_recommendations(player_stats, opponent_stats=None, detail_level="Средняя"):
+# Кэши, общие для всех сессий
+@st.cache_resource
+def get_analysis_cache(max_entries, max_bytes):
     """
-    Генерирует рекомендации для игрока на основе его статистики
-    и опционально статистики соперника.
-    
-    Args:
-        player_stats: Статистика игрока
-        opponent_stats: Статистика соперника
-        detail_level: Уровень детализации рекомендаций ("Минимальная", "Средняя", "Подробная")
+    Кэш разобранных данных и статистики матча. Ключ - хэш содержимого
+    загруженного файла, поэтому повторная загрузка того же файла
+    (в том числе из другой сессии) не требует нового анализа.
     """
-    recommendations = {
-        'strengths': [],        # Сильные стороны
-        'improvements': [],     # Области для улучшения
-        'tactics': [],          # Тактические рекомендации
-        'training_focus': [],   # Фокус тренировок
-        'mental_game': []       # Ментальный аспект
-    }
-    
-    # Анализ подачи
-    if player_stats['first_serve_pct'] < thresholds['first_serve_pct']['low']:
-        recommendations['improvements'].append(
-            f"Улучшить процент первой подачи (текущий: {player_stats['first_serve_pct']}%). "
-            f"Сосредоточиться на технике и стабильности."
-        )
-        recommendations['training_focus'].append("Работа над первой подачей")
-    elif player_stats['first_serve_pct'] > thresholds['first_serve_pct']['high']:
-        recommendations['strengths'].append(
-            f"Высокий процент первой подачи ({player_stats['first_serve_pct']}%). "
-            f"Продолжать использовать это как преимущество."
-        )
+    return LRUCache(max_entries, max_bytes)
+
+@st.cache_resource
+def get_figure_cache(max_entries):
+    """
+    Кэш JSON-представлений графиков без учета высоты.
+    """
+    return LRUCache(max_entries)
+
+@st.cache_resource
+def get_match_store(path):
+    """
+    Хранилище проанализированных матчей (общее для всех сессий).
+    """
+    return MatchStore(path)
+
+def show_cache_stats(cache, title="Кэш анализа"):
+    """
+    Отображает счетчики кэша в боковой панели.
+    """
+    stats = cache.stats()
+    with st.sidebar.expander(title):
+        st.write(f"Записей: {stats['entries']} из {cache.max_entries}")
+        st.write(f"Объем: {stats['bytes'] / 1024 / 1024:.1f} из {cache.max_bytes / 1024 / 1024:.0f} МБ")
+        st.write(f"Попаданий: {stats['hits']}, промахов: {stats['misses']}")
+        if st.button("Очистить кэш", key=f"clear_{title}"):
+            cache.clear()
+
+def show_chart(timer, figure_cache, fingerprint, builder, player_stats, *args, **kwargs):
+    """
+    Строит (или берет из кэша) график и отображает его, замеряя отдельно
+    построение фигуры и ее сериализацию в st.plotly_chart.
+    """
+    with timer.stage("figures"):
+        fig = cached_chart(figure_cache, fingerprint, builder, player_stats, *args, **kwargs)
+    with timer.stage("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_diagnostics(timer):
+    """
+    Панель с временем этапов в боковой панели.
+    """
+    table = pd.DataFrame(timer.rows())
+    if table.empty:
+        return
+    table["seconds"] = (table["seconds"] * 1000).round(1)
+    table = table.rename(columns={
+        "stage": "Этап",
+        "seconds": "Время, мс",
+        "calls": "Вызовов",
+        "rows": "Строк",
+        "points": "Розыгрышей",
+        "rows_per_second": "Строк/с",
+        "points_per_second": "Розыгрышей/с"
+    })
+    with st.sidebar.expander("Диагностика", expanded=True):
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+def finish_timing(timer, settings, started, rows=None, points=None):
+    """
+    Записывает общее время запуска скрипта, пишет замеры в журнал и при
+    включенной диагностике показывает их в боковой панели.
+    """
+    timer.record("total", time.perf_counter() - started, rows=rows, points=points)
+    ctx = get_script_run_ctx()
+    timer.log(
+        session=ctx.session_id if ctx else None,
+        mode=settings["mode"],
+        engine="Потоковый" if settings["streaming"] else settings["analysis_engine"]
+    )
+    if settings["diagnostics"]:
+        show_diagnostics(timer)
+
+def display_batch_analysis(settings, cache):
+    """
+    Пакетный анализ ZIP-архива с матчами и вывод итогов сезона по игрокам.
+    """
+    archive = st.file_uploader("Загрузите ZIP-архив с CSV файлами матчей", type=['zip'])
     
-    # Анализ второй подачи
-    if player_stats['second_serve_won_pct'] < thresholds['second_serve_won_pct']['low']:
-        recommendations['improvements'].append(
-            f"Низкий процент выигранных очков на второй подаче ({player_stats['second_serve_won_pct']}%). "
-            f"Улучшить качество и вариативность второй подачи."
-        )
-        recommendations['training_focus'].append("Работа над второй подачей")
-    
-    # Анализ зон подачи
-    serve_zones = player_stats.get('serve_zones', {})
-    if serve_zones:
-        total_serves = sum(serve_zones.values())
-        if total_serves > 0:
-            zone_percentages = {zone: count/total_serves*100 for zone, count in serve_zones.items()}
-            max_zone_pct = max(zone_percentages.values())
-            if max_zone_pct > 60:
-                max_zone = max(zone_percentages, key=zone_percentages.get)
-                recommendations['improvements'].append(
-                    f"Чрезмерная концентрация подач в зону {max_zone} ({max_zone_pct:.1f}%). "
-                    f"Увеличить вариативность подачи."
-                )
+    if settings["show_help"]:
+        st.info("""
+        Архив может содержать любое количество CSV файлов матчей в формате одиночного анализа.
+        Матчи анализируются параллельно, а проценты в итогах сезона считаются по суммарным показателям.
+        """)
     
-    # Сравнение с соперником (если доступно)
-    if opponent_stats:
-        # Сравнение эффективности форхенда
-        player_forehand = player_stats.get('shot_types', {}).get('Forehand', 0)
-        opponent_forehand = opponent_stats.get('shot_types', {}).get('Forehand', 0)
-        
-        if player_forehand > opponent_forehand * 1.5 and player_forehand > 5:
-            recommendations['strengths'].append(
-                "Значительное преимущество в эффективности форхенда. "
-                "Использовать форхенд как основное оружие."
-            )
-            recommendations['tactics'].append(
-                "Строить розыгрыши через форхенд, искать возможности для атаки с форхенда"
-            )
-        
-        # Сравнение эффективности в длинных розыгрышах
-        if (player_stats.get('long_rally_win_pct', 0) > 
-            opponent_stats.get('long_rally_win_pct', 0) + 20):
-            recommendations['tactics'].append(
-                f"Значительное преимущество в длинных розыгрышах " 
-                f"({player_stats.get('long_rally_win_pct', 0)}% vs "
-                f"{opponent_stats.get('long_rally_win_pct', 0)}%). "
-                f"Стремиться к затяжным обменам ударами."
-            )
-        elif (player_stats.get('long_rally_win_pct', 0) < 
-              opponent_stats.get('long_rally_win_pct', 0) - 20):
-            recommendations['tactics'].append(
-                f"Слабая эффективность в длинных розыгрышах "
-                f"({player_stats.get('long_rally_win_pct', 0)}% vs "
-                f"{opponent_stats.get('long_rally_win_pct', 0)}%). "
-                f"Избегать затяжных обменов, играть более агрессивно."
-            )
-            recommendations['training_focus'].append(
-                "Физическая подготовка и выносливость для длинных розыгрышей"
-            )
-        
-        # Анализ брейк-пойнтов
-        if player_stats['break_points']['faced'] > 2:
-            bp_conv_pct = player_stats['break_points']['converted'] / player_stats['break_points']['faced'] * 100 if player_stats['break_points']['faced'] > 0 else 0
-            if bp_conv_pct < 30:
-                recommendations['mental_game'].append(
-                    f"Низкий процент реализации брейк-пойнтов ({bp_conv_pct:.1f}%). "
-                    f"Работать над концентрацией в ключевые моменты."
-                )
-            elif bp_conv_pct > 60:
-                recommendations['strengths'].append(
-                    f"Высокий процент реализации брейк-пойнтов ({bp_conv_pct:.1f}%). "
-                    f"Хорошая психологическая устойчивость в ключевые моменты."
-                )
+    if archive is None:
+        return
     
-    # Анализ типов ударов
-    shot_types = player_stats.get('shot_types', {})
-    if shot_types:
-        total_shots = sum(shot_types.values())
-        if total_shots > 0:
-            for shot_type, count in shot_types.items():
-                shot_pct = count / total_shots * 100
-                
-                # Анализ распределения между форхендом и бэкхендом
-                if shot_type == 'Forehand' and shot_pct > 65:
-                    recommendations['strengths'].append(
-                        f"Высокое использование форхенда ({shot_pct:.1f}% всех ударов). "
-                        f"Продолжать строить игру через форхенд."
-                    )
-                elif shot_type == 'Backhand' and shot_pct > 65:
-                    recommendations['strengths'].append(
-                        f"Высокое использование бэкхенда ({shot_pct:.1f}% всех ударов). "
-                        f"Продолжать строить игру через бэкхенд."
-                    )
-                
-                # Проверка редко используемых типов ударов
-                if shot_type in ['Slice', 'Drop Shot', 'Volley'] and shot_pct < 5:
-                    recommendations['improvements'].append(
-                        f"Редкое использование удара {shot_type} ({shot_pct:.1f}%). "
-                        f"Добавить больше вариативности в игру."
-                    )
-                    recommendations['training_focus'].append(f"Развитие удара {shot_type}")
-    
-    # Анализ комбинаций ударов
-    shot_combinations = player_stats.get('shot_combinations', {})
-    if shot_combinations:
-        # Найти наиболее успешные комбинации
-        successful_combos = [(combo, stats) for combo, stats in shot_combinations.items() 
-                            if stats.get('win_percentage', 0) > 60 and stats.get('count', 0) >= 3]
-        
-        if successful_combos:
-            # Сортировка по проценту побед
-            successful_combos.sort(key=lambda x: x[1].get('win_percentage', 0), reverse=True)
-            top_combo, top_stats = successful_combos[0]
-            
-            recommendations['tactics'].append(
-                f"Комбинация '{top_combo}' особенно эффективна "
-                f"({top_stats.get('win_percentage', 0)}% успешности). "
-                f"Использовать чаще в ключевые моменты."
-            )
+    archive_bytes = archive.getvalue()
+    cache_key = "batch:" + file_content_hash(archive_bytes)
+    result = cache.get(cache_key)
     
-    # Анализ ключевых ударов
-    key_shots = player_stats.get('key_shots', {})
-    if key_shots and detail_level == "Подробная":
-        best_key_shots = [(shot, stats) for shot, stats in key_shots.items() 
-                         if stats.get('win_percentage', 0) > 60 and stats.get('total', 0) >= 2]
+    if result is None:
+        progress_bar = st.progress(0.0, text="Анализ матчей...")
         
-        worst_key_shots = [(shot, stats) for shot, stats in key_shots.items() 
-                          if stats.get('win_percentage', 0) < 40 and stats.get('total', 0) >= 2]
+        def report_progress(done, total, elapsed):
+            rate = done / elapsed if elapsed > 0 else 0
+            progress_bar.progress(done / total, text=f"Обработано матчей: {done} из {total} ({rate:.1f} матчей/с)")
         
-        if best_key_shots:
-            best_key_shots.sort(key=lambda x: x[1].get('win_percentage', 0), reverse=True)
-            shot, stats = best_key_shots[0]
-            recommendations['strengths'].append(
-                f"Эффективное использование {shot} в ключевые моменты "
-                f"({stats.get('win_percentage', 0)}% успешности)."
-            )
-        
-        if worst_key_shots:
-            worst_key_shots.sort(key=lambda x: x[1].get('win_percentage', 0))
-            shot, stats = worst_key_shots[0]
-            recommendations['improvements'].append(
-                f"Низкая эффективность {shot} в ключевые моменты "
-                f"({stats.get('win_percentage', 0)}% успешности). "
-                f"Работать над стабильностью этого удара под давлением."
-            )
+        # Файлы и так анализируются параллельно, поэтому каждый считается колоночным движком
+        engine = 'rows' if settings["analysis_engine"] == "Построчный" else 'columnar'
+        result = analyze_match_batch(io.BytesIO(archive_bytes), engine=engine, progress=report_progress)
+        cache.put(cache_key, result, len(pickle.dumps(result)))
     
-    # Рекомендации по ментальной игре на основе паттернов
-    if player_stats.get('first_serve_pct', 0) > 65 and player_stats.get('second_serve_won_pct', 0) < 40:
-        recommendations['mental_game'].append(
-            "Высокий риск на второй подаче может привести к неуверенности. "
-            "Работать над психологической стабильностью при второй подаче."
-        )
+    if result['errors']:
+        st.warning("Не удалось проанализировать файлы: " + ", ".join(result['errors']))
     
-# Анализ выигрышей под давлением
-    if player_stats.get('pressure_points_total', 0) > 5:
-        pressure_pct = player_stats.get('pressure_points_pct', 0)
-        if pressure_pct < 40:
-            recommendations['mental_game'].append(
-                f"Низкий процент выигрыша очков под давлением ({pressure_pct:.1f}%). "
-                f"Работать над ментальной устойчивостью в ключевые моменты."
-            )
-        elif pressure_pct > 60:
-            recommendations['strengths'].append(
-                f"Высокий процент выигрыша очков под давлением ({pressure_pct:.1f}%). "
-                f"Хорошая психологическая устойчивость."
-            )
+    if not result['players']:
+        st.error("В архиве не найдено данных матчей")
+        return
     
-    # Фильтрация рекомендаций в соответствии с уровнем детализации
-    if detail_level == "Минимальная":
-        # Для минимальной детализации оставляем только самые важные рекомендации
-        for category in recommendations:
-            recommendations[category] = recommendations[category][:1]
-    elif detail_level == "Средняя":
-        # Для средней детализации ограничиваем количество рекомендаций
-        for category in recommendations:
-            recommendations[category] = recommendations[category][:2]
-    
-    return recommendations
-
-# Создание визуализаций
-def create_serve_stats_chart(player_stats, colors, height=400):
-    """
-    Создает график статистики подачи.
-    """
-    players = list(player_stats.keys())
+    st.header("Итоги сезона")
     
-    # Создаем данные для графика
-    data = []
-    for player in players:
-        data.append({
-            'Игрок': player,
-            'Показатель': 'Процент первой подачи',
-            'Значение': player_stats[player].get('first_serve_pct', 0)
-        })
-        data.append({
-            'Игрок': player,
-            'Показатель': 'Выигрыш на первой подаче (%)',
-            'Значение': player_stats[player].get('first_serve_won_pct', 0)
-        })
-        data.append({
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Матчей", len(result['matches']))
+    col2.metric("Время анализа", f"{result['elapsed']:.1f} с")
+    col3.metric("Скорость", f"{result['matches_per_second']:.1f} матчей/с")
+    
+    summary = []
+    for player, stats in result['players'].items():
+        summary.append({
             'Игрок': player,
-            'Показатель': 'Выигрыш на второй подаче (%)',
-            'Значение': player_stats[player].get('second_serve_won_pct', 0)
+            'Матчей': sum(1 for match_stats in result['matches'].values() if player in match_stats),
+            'Эйсы': stats['aces'],
+            'Двойные ошибки': stats['double_faults'],
+            'Процент первой подачи': stats['first_serve_pct'],
+            'Выигрыш на первой подаче (%)': stats['first_serve_won_pct'],
+            'Выигрыш на второй подаче (%)': stats['second_serve_won_pct'],
+            'Длинные розыгрыши (%)': stats['long_rally_win_pct'],
+            'Очки под давлением (%)': stats['pressure_points_pct']
         })
     
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Показатель', 
-        y='Значение', 
-        color='Игрок',
-        barmode='group',
-        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
-        height=height
-    )
+    st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
     
-    fig.update_layout(
-        title='Статистика подачи',
-        xaxis_title=None,
-        yaxis_title='Процент (%)',
-        legend_title='Игрок',
-        yaxis_range=[0, 100]
-    )
+    # Рекомендации всему составу по итогам сезона (одним проходом по таблице правил)
+    with st.expander("Рекомендации по составу"):
+        players = list(result['players'])
+        with st.spinner("Подбор рекомендаций..."):
+            roster = generate_roster_recommendations(
+                [(result['players'][player], None) for player in players],
+                settings["recommendation_detail"]
+            )
+        st.dataframe(
+            pd.DataFrame([
+                {'Игрок': player, **{label: "\n".join(recommendations[category]) for category, label in RECOMMENDATION_LABELS.items()}}
+                for player, recommendations in zip(players, roster)
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
     
-    return fig
+    # Статические отчеты для тренеров: комплект HTML-файлов одним ZIP-архивом
+    with st.expander("HTML-отчеты по игрокам"):
+        st.caption(f"Отчетов: {len(players)}; библиотека Plotly JS включается в комплект один раз")
+        if st.button("Подготовить отчеты", key="export_reports"):
+            progress_bar = st.progress(0.0, text="Построение отчетов...")
+            
+            def report_progress(done, total, elapsed):
+                progress_bar.progress(done / total, text=f"Готово отчетов: {done} из {total} ({elapsed:.1f} с)")
+            
+            with tempfile.TemporaryDirectory() as directory:
+                export = export_player_reports(
+                    result['players'],
+                    directory,
+                    detail_level=settings["recommendation_detail"],
+                    color=get_color_scheme(settings)["player1"],
+                    height=settings["chart_height"],
+                    progress=report_progress
+                )
+                bundle = io.BytesIO()
+                with zipfile.ZipFile(bundle, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for name in sorted(os.listdir(directory)):
+                        archive.write(os.path.join(directory, name), name)
+            
+            if export['errors']:
+                st.warning("Не удалось построить отчеты: " + ", ".join(map(str, export['errors'])))
+            st.caption(f"Комплект: {export['bytes'] / 2**20:.1f} МБ, {export['elapsed']:.1f} с")
+            st.download_button("Скачать отчеты (ZIP)", bundle.getvalue(), file_name="reports.zip", mime="application/zip")
 
-def create_rally_stats_chart(player_stats, colors, height=400):
+def save_match_to_store(store, file_bytes, player_stats, source):
     """
-    Создает график статистики розыгрышей по длине.
+    Форма сохранения проанализированного матча в историю.
     """
-    players = list(player_stats.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for player in players:
-        for rally_length in ['1-3', '4-6', '7-9', '10+']:
-            data.append({
-                'Игрок': player,
-                'Длина розыгрыша': rally_length,
-                'Процент выигрыша': player_stats[player].get(f'{rally_length}_rally_win_pct', 0)
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.line(
-        df, 
-        x='Длина розыгрыша', 
-        y='Процент выигрыша', 
-        color='Игрок',
-        markers=True,
-        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
-        height=height
-    )
+    with st.expander("Сохранить матч в историю"):
+        col1, col2 = st.columns(2)
+        played_on = col1.date_input("Дата матча", key="store_played_on")
+        tournament = col2.text_input("Турнир", key="store_tournament")
+        if st.button("Сохранить", key="store_save"):
+            match_id = store.save_match(file_bytes, player_stats, played_on, tournament.strip(), source)
+            st.success(f"Матч сохранен (№ {match_id})")
+
+def display_player_history(store, settings, color_scheme, figure_cache, timer):
+    """
+    Последние матчи игрока из хранилища: таблица по матчам и итоги по ним
+    в обычном виде отчета. Статистика берется из хранилища без повторного анализа.
+    """
+    players = store.players()
+    if not players:
+        st.info("В истории пока нет матчей: сохраните матч после анализа в режиме «Один матч»")
+        return
+    
+    col1, col2 = st.columns([3, 1])
+    player = col1.selectbox("Игрок", players, key="history_player")
+    n = col2.number_input("Последних матчей", min_value=1, max_value=500, value=10, key="history_n")
+    
+    with timer.stage("history"):
+        started = time.perf_counter()
+        matches = store.last_matches(player, int(n))
+        elapsed = time.perf_counter() - started
+    
+    st.caption(f"Загружено матчей: {len(matches)} за {elapsed * 1000:.1f} мс")
+    
+    history = []
+    for match in matches:
+        stats = match["player_stats"][player]
+        history.append({
+            'Дата': match["played_on"],
+            'Турнир': match["tournament"],
+            'Соперник': match["opponent"],
+            'Эйсы': stats['aces'],
+            'Двойные ошибки': stats['double_faults'],
+            'Процент первой подачи': stats['first_serve_pct'],
+            'Выигрыш на первой подаче (%)': stats['first_serve_won_pct'],
+            'Выигрыш на второй подаче (%)': stats['second_serve_won_pct'],
+            'Очки под давлением (%)': stats['pressure_points_pct']
+        })
+    st.dataframe(pd.DataFrame(history), use_container_width=True, hide_index=True)
     
-    fig.update_layout(
-        title='Эффективность по длине розыгрыша',
-        xaxis_title='Количество ударов в розыгрыше',
-        yaxis_title='Процент выигранных розыгрышей (%)',
-        legend_title='Игрок',
-        yaxis_range=[0, 100]
+    # Итоги по выбранным матчам: проценты пересчитываются по суммам счетчиков
+    with timer.stage("history_merge"):
+        player_stats = unpack_match_stats(merge_match_stats({player: match["player_stats"][player]} for match in matches))
+    display_match_stats(player_stats, settings, color_scheme, figure_cache, timer)
+
+def select_player(players, key):
+    """
+    Переключатель игрока вместо вкладок. Возвращает номер выбранного игрока.
+    """
+    player = st.radio("Игрок", players, format_func=str, horizontal=True, key=key, label_visibility="collapsed")
+    return players.index(player)
+
+def select_points(point_index):
+    """
+    Фильтр розыгрышей. Возвращает маску таблицы point_index.points или
+    None, если ни одно условие не задано.
+    """
+    points = point_index.points
+    with st.expander("Фильтр розыгрышей"):
+        col1, col2 = st.columns(2)
+        key_points = col1.multiselect("Ключевые моменты", list(KEY_POINT_FILTERS), key="filter_key_points")
+        serves = col2.multiselect("Подача", list(SERVE_FILTERS), key="filter_serves")
+        serve_zones = col1.multiselect("Зона подачи", list(points["serve_zone"].cat.categories), key="filter_serve_zones")
+        servers = col2.multiselect("Подающий", list(points["server"].cat.categories), format_func=str, key="filter_servers")
+        
+        max_length = max(int(points["rally_length"].max()), 1)
+        rally_lengths = st.slider("Длина розыгрыша (ударов)", 0, max_length, (0, max_length), key="filter_rally_lengths")
+        if rally_lengths == (0, max_length):
+            rally_lengths = None
+    
+    if not (key_points or serves or serve_zones or servers or rally_lengths):
+        return None
+    return point_index.mask(
+        key_points=[KEY_POINT_FILTERS[label] for label in key_points],
+        serves=[SERVE_FILTERS[label] for label in serves],
+        serve_zones=serve_zones,
+        rally_lengths=rally_lengths,
+        servers=servers
     )
-    
-    return fig
 
-def create_shot_types_chart(player_stats, colors, height=400):
+def display_match_stats(player_stats, settings, color_scheme, figure_cache, timer, timeline=None, point_index=None):
     """
-    Создает график распределения типов ударов.
+    Отображает общую информацию и выбранный раздел: графики матча,
+    детальную статистику или рекомендации одного игрока. timeline -
+    таблица розыгрышей для графика хода матча, point_index - индекс
+    розыгрышей для фильтра (если есть).
     """
-    players = list(player_stats.keys())
+    sequence_length = settings["sequence_length"]
+    # Статистика пересчитывается по выбранным розыгрышам без повторного разбора файла
+    if point_index is not None and len(point_index) > 0:
+        mask = select_points(point_index)
+        if mask is not None:
+            with timer.stage("filter_points", points=int(mask.sum())):
+                sequence_lengths = (sequence_length,) if sequence_length > 2 else ()
+                player_stats = point_index.player_stats(mask, sequence_lengths)
+            st.caption(f"Розыгрышей в выборке: {int(mask.sum())} из {len(point_index)}")
     
-    # Собираем все типы ударов
-    all_shot_types = set()
-    for player in players:
-        shot_types = player_stats[player].get('shot_types', {})
-        all_shot_types.update(shot_types.keys())
-    
-    # Создаем данные для графика
-    data = []
-    for player in players:
-        shot_types = player_stats[player].get('shot_types', {})
-        total_shots = sum(shot_types.values()) if shot_types else 0
+    players = list(player_stats.keys())
+    fingerprint = stats_fingerprint(player_stats)
+    
+    # Построчный движок считает только пары ударов
+    if sequence_length > 2 and not any('shot_sequences' in stats for stats in player_stats.values()):
+        sequence_length = 2
+    
+    if len(players) == 0:
+        st.error("Не удалось найти информацию об игроках в данных")
+        return
+    
+    # Показываем общую информацию
+    st.header("Общая информация")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader(f"Игрок: {players[0]}")
+        st.write(f"Эйсы: {player_stats[players[0]].get('aces', 0)}")
+        st.write(f"Двойные ошибки: {player_stats[players[0]].get('double_faults', 0)}")
+        st.write(f"Процент первой подачи: {player_stats[players[0]].get('first_serve_pct', 0)}%")
+        st.write(f"Выигрыш на первой подаче: {player_stats[players[0]].get('first_serve_won_pct', 0)}%")
+        st.write(f"Выигрыш на второй подаче: {player_stats[players[0]].get('second_serve_won_pct', 0)}%")
+    
+    if len(players) > 1:
+        with col2:
+            st.subheader(f"Игрок: {players[1]}")
+            st.write(f"Эйсы: {player_stats[players[1]].get('aces', 0)}")
+            st.write(f"Двойные ошибки: {player_stats[players[1]].get('double_faults', 0)}")
+            st.write(f"Процент первой подачи: {player_stats[players[1]].get('first_serve_pct', 0)}%")
+            st.write(f"Выигрыш на первой подаче: {player_stats[players[1]].get('first_serve_won_pct', 0)}%")
+            st.write(f"Выигрыш на второй подаче: {player_stats[players[1]].get('second_serve_won_pct', 0)}%")
+    
+    # Разделы и игроки выбираются переключателями, а не вкладками: st.tabs
+    # строит содержимое всех вкладок сразу, а здесь строится только видимое
+    section = st.radio("Раздел", MATCH_SECTIONS, horizontal=True, key="match_section")
+    
+    if section == "Визуализация данных":
+        st.header("Визуализация данных")
         
-        for shot_type in all_shot_types:
-            if total_shots > 0:
-                percentage = shot_types.get(shot_type, 0) / total_shots * 100
-            else:
-                percentage = 0
-                
-            data.append({
-                'Игрок': player,
-                'Тип удара': shot_type,
-                'Процент': percentage
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Тип удара', 
-        y='Процент', 
-        color='Игрок',
-        barmode='group',
-        color_discrete_map={players[0]: colors['player1'], players[1]: colors['player2']} if len(players) > 1 else None,
-        height=height
-    )
+        # График статистики подачи
+        show_chart(timer, figure_cache, fingerprint, create_serve_stats_chart, player_stats, color_scheme, height=settings["chart_height"])
+        
+        # График статистики розыгрышей
+        show_chart(timer, figure_cache, fingerprint, create_rally_stats_chart, player_stats, color_scheme, height=settings["chart_height"])
+        
+        # График типов ударов
+        show_chart(timer, figure_cache, fingerprint, create_shot_types_chart, player_stats, color_scheme, height=settings["chart_height"])
+        
+        # Ход матча по розыгрышам
+        if timeline is not None:
+            show_chart(timer, figure_cache, stats_fingerprint(timeline), create_momentum_chart, timeline, color_scheme, height=settings["chart_height"])
     
-    fig.update_layout(
-        title='Распределение типов ударов',
-        xaxis_title=None,
-        yaxis_title='Процент (%)',
-        legend_title='Игрок'
-    )
+    elif section == "Детальная статистика игроков":
+        # Зоны подачи, ключевые удары и комбинации выбранного игрока
+        st.header("Детальная статистика игроков")
+        
+        i = select_player(players, "detail_player")
+        player = players[i]
+        color = color_scheme['player1'] if i == 0 else color_scheme['player2']
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            show_chart(
+                timer, figure_cache, fingerprint, create_serve_zones_chart,
+                player_stats, player, color,
+                height=settings["chart_height"],
+                resolution=settings["heatmap_resolution"]
+            )
+        
+        with col2:
+            show_chart(
+                timer, figure_cache, fingerprint, create_key_shots_chart,
+                player_stats, player, color,
+                height=settings["chart_height"]
+            )
+        
+        # Комбинации ударов
+        show_chart(
+            timer, figure_cache, fingerprint, create_shot_combinations_chart,
+            player_stats, player, color,
+            height=settings["chart_height"],
+            sequence_length=sequence_length
+        )
     
-    return fig
+    else:
+        # Рекомендации
+        st.header("Рекомендации для игроков")
+        
+        i = select_player(players, "recommendations_player")
+        player = players[i]
+        opponent = players[1-i] if len(players) > 1 else None
+        opponent_stats = player_stats[opponent] if opponent else None
+        
+        with timer.stage("recommendations"):
+            recommendations = generate_player_recommendations(
+                player_stats[player], 
+                opponent_stats, 
+                settings["recommendation_detail"]
+            )
+        
+        # Отображаем рекомендации
+        display_player_recommendations(recommendations, settings["recommendation_detail"])
 
-def create_serve_zones_chart(player_stats, player, color, height=400):
+def display_live_match(settings, color_scheme, figure_cache, timer):
     """
-    Создает тепловую карту зон подачи для игрока.
+    Живой матч: CSV на сервере дописывается по ходу игры, а при каждом
+    обновлении анализируются только новые строки. Состояние чтения
+    хранится в сессии. Возвращает LiveMatchTail или None, если файл не выбран.
     """
-    # Получаем данные о зонах подачи
-    serve_zones = player_stats[player].get('serve_zones', {})
-    total_serves = sum(serve_zones.values()) if serve_zones else 0
-    
-    # Стандартное теннисное поле (упрощенно)
-    court_x = np.linspace(0, 1, 100)
-    court_y = np.linspace(0, 1, 100)
-    X, Y = np.meshgrid(court_x, court_y)
-    Z = np.zeros_like(X)
-    
-    # Заполняем тепловую карту на основе данных о зонах
-    # Здесь используется упрощенная модель, в реальном приложении нужно
-    # соотносить названия зон с координатами на корте
-    zone_to_coords = {
-        "Wide": (0.2, 0.8),  # Широкая подача
-        "Body": (0.5, 0.8),  # Подача в корпус
-        "T": (0.8, 0.8),     # Подача по центральной линии
-        "Center": (0.5, 0.5)  # Центр (для общих случаев)
-    }
+    path = st.text_input("Путь к CSV файлу матча на сервере")
     
-    for zone, count in serve_zones.items():
-        if zone in zone_to_coords and total_serves > 0:
-            x, y = zone_to_coords[zone]
-            percentage = count / total_serves * 100
-            
-            # Добавляем "тепло" в тепловую карту
-            for i in range(len(X)):
-                for j in range(len(X[0])):
-                    dist = np.sqrt((X[i, j] - x)**2 + (Y[i, j] - y)**2)
-                    # Используем гауссову функцию для распределения "тепла"
-                    Z[i, j] += percentage * np.exp(-10 * dist**2)
-    
-    # Создаем график
-    fig = go.Figure()
-    
-    # Добавляем тепловую карту
-    fig.add_trace(go.Heatmap(
-        z=Z,
-        colorscale=[[0, 'rgba(255,255,255,0)'], [1, color]],
-        showscale=False
-    ))
-    
-    # Добавляем разметку теннисного корта (упрощенно)
-    # Внешние границы
-    fig.add_shape(type="rect", x0=0, y0=0, x1=1, y1=1, line=dict(color="black"))
-    # Центральная линия
-    fig.add_shape(type="line", x0=0.5, y0=0, x1=0.5, y1=1, line=dict(color="black"))
-    
-    # Настраиваем макет
-    fig.update_layout(
-        title=f"Зоны подачи - {player}",
-        height=height,
-        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x", scaleratio=1),
-        margin=dict(l=0, r=0, t=40, b=0)
-    )
+    if settings["show_help"]:
+        st.info("""
+        Укажите путь к CSV файлу, который дописывается во время матча (формат тот же, что и для одного матча).
+        При обновлении читаются только новые строки; последний розыгрыш учитывается до его завершения.
+        """)
     
-    return fig
+    if not path:
+        return None
+    if not os.path.isfile(path):
+        st.error(f"Файл не найден: {path}")
+        return None
+    
+    tail = st.session_state.get("live_tail")
+    if tail is None or str(tail.path) != path:
+        tail = LiveMatchTail(path)
+        st.session_state["live_tail"] = tail
+    
+    col1, col2 = st.columns(2)
+    # Нажатие кнопки само перезапускает скрипт, а с ним и чтение новых строк
+    col1.button("Обновить")
+    if col2.button("Начать заново"):
+        tail.reset()
+    
+    with timer.stage("live_poll") as record:
+        record["rows"] = tail.poll()
+    with timer.stage("analyze") as record:
+        player_stats = tail.result()
+        record["rows"] = tail.rows
+        record["points"] = tail.points
+    
+    if not player_stats:
+        st.warning("В файле пока нет данных матча")
+        return tail
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Строк", tail.rows, delta=tail.last_new_rows or None)
+    col2.metric("Завершенных розыгрышей", tail.points)
+    col3.metric("Обновлено", time.strftime("%H:%M:%S"))
+    
+    display_match_stats(player_stats, settings, color_scheme, figure_cache, timer)
+    return tail
 
-def create_key_shots_chart(player_stats, player, color, height=400):
+def apply_memory_budget(file_bytes, cache_key, settings):
     """
-    Создает график эффективности ключевых ударов игрока.
+    Сверяет оценку памяти анализа файла с бюджетом сеанса. Если полный
+    анализ не помещается, включается потоковый анализ частями; если не
+    помещается и он, выводится ошибка. Возвращает (настройки, план).
+    
+    План хранится в состоянии сессии: при перезапусках сценария (пока
+    идет фоновый анализ) файл заново не сканируется и предупреждения
+    не повторяются.
     """
-    # Получаем данные о ключевых ударах
-    key_shots = player_stats[player].get('key_shots', {})
-    
-    # Создаем данные для графика
-    data = []
-    for shot_type, stats in key_shots.items():
-        if stats.get('total', 0) >= 2:  # Фильтруем удары с малым количеством наблюдений
-            data.append({
-                'Тип удара': shot_type,
-                'Процент успешности': stats.get('win_percentage', 0),
-                'Количество': stats.get('total', 0)
-            })
-    
-    # Сортируем по количеству
-    data = sorted(data, key=lambda x: x['Количество'], reverse=True)
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Если данных нет, возвращаем пустой график
-    if df.empty:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Эффективность ключевых ударов - {player}",
-            height=height,
-            xaxis_title="Нет данных",
-            yaxis_title="Нет данных"
+    budget = st.session_state.setdefault("memory_budget", MemoryBudget(SESSION_MEMORY_BYTES))
+    limit_mb = budget.limit / 2**20
+    plan_key = (cache_key, settings["analysis_engine"], settings["streaming"], settings["chunk_size"])
+    key, plan = st.session_state.get("memory_plan", (None, None))
+    
+    if key != plan_key:
+        rows = 0 if settings["streaming"] else count_rows(file_bytes)
+        plan = budget.plan(
+            len(file_bytes), rows, ENGINE_MEMORY_KEYS[settings["analysis_engine"]],
+            settings["streaming"], settings["chunk_size"]
         )
-        return fig
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        x='Тип удара', 
-        y='Процент успешности',
-        color_discrete_sequence=[color],
-        text='Количество',
-        height=height
-    )
-    
-    fig.update_layout(
-        title=f"Эффективность ключевых ударов - {player}",
-        xaxis_title=None,
-        yaxis_title='Процент успешности (%)',
-        yaxis_range=[0, 100]
-    )
+        st.session_state["memory_plan"] = (plan_key, plan)
+        
+        if plan.mode == "streaming" and not settings["streaming"]:
+            st.warning(
+                f"Полный анализ файла ({rows:,} строк) потребует больше {limit_mb:.0f} МБ памяти: "
+                f"включен потоковый анализ частями по {plan.chunk_size:,} строк. "
+                "Фильтр розыгрышей и ход матча в этом режиме недоступны."
+            )
+        elif plan.mode == "streaming" and plan.chunk_size != settings["chunk_size"]:
+            st.warning(f"Размер части уменьшен до {plan.chunk_size:,} строк, чтобы уложиться в бюджет памяти {limit_mb:.0f} МБ")
     
-    # Добавляем линию среднего значения
-    avg = df['Процент успешности'].mean()
-    fig.add_shape(
-        type="line",
-        xref="paper", yref="y",
-        x0=0, y0=avg,
-        x1=1, y1=avg,
-        line=dict(
-            color="red",
-            width=2,
-            dash="dash",
+    if plan.mode == "refuse":
+        st.error(
+            f"Файлу нужно не меньше {plan.estimate / 2**20:.0f} МБ памяти даже в потоковом режиме, "
+            f"а бюджет сеанса - {limit_mb:.0f} МБ. Разделите файл на части или обратитесь к администратору."
         )
-    )
-    
-    fig.add_annotation(
-        xref="paper", yref="y",
-        x=0.01, y=avg,
-        text=f"Среднее: {avg:.1f}%",
-        showarrow=False,
-        font=dict(color="red")
-    )
     
-    return fig
+    if plan.mode == "streaming":
+        settings = dict(settings, streaming=True, chunk_size=plan.chunk_size)
+    return settings, plan
 
-def create_shot_combinations_chart(player_stats, player, color, height=400, top_n=5):
+def observe_memory(plan, peak, file_size, settings):
     """
-    Создает график эффективности комбинаций ударов игрока.
+    Передает бюджету фактический пик анализа (вместе с байтами файла)
+    и показывает его в диагностике. Пик замеряется только в режиме
+    диагностики; без замера (peak=None) ничего не делает.
     """
-    # Получаем данные о комбинациях ударов
-    combinations = player_stats[player].get('shot_combinations', {})
-    
-    # Создаем данные для графика
-    data = []
-    for combo, stats in combinations.items():
-        if stats.get('count', 0) >= 3:  # Фильтруем комбинации с малым количеством наблюдений
-            data.append({
-                'Комбинация': combo,
-                'Процент успешности': stats.get('win_percentage', 0),
-                'Количество': stats.get('count', 0)
-            })
-    
-    # Сортируем по проценту успешности и берем top_n
-    data = sorted(data, key=lambda x: x['Процент успешности'], reverse=True)[:top_n]
-    
-    # Создаем DataFrame
-    df = pd.DataFrame(data)
-    
-    # Если данных нет, возвращаем пустой график
-    if df.empty:
-        fig = go.Figure()
-        fig.update_layout(
-            title=f"Топ комбинации ударов - {player}",
-            height=height,
-            xaxis_title="Нет данных",
-            yaxis_title="Нет данных"
+    if peak is None:
+        return
+    budget = st.session_state["memory_budget"]
+    budget.observe(plan.estimate, peak + file_size)
+    if settings["diagnostics"]:
+        st.sidebar.caption(
+            f"Память анализа: пик {(peak + file_size) / 2**20:.1f} МБ, "
+            f"оценка {plan.estimate / 2**20:.1f} МБ, бюджет {budget.limit / 2**20:.0f} МБ"
         )
-        return fig
-    
-    # Создаем график
-    fig = px.bar(
-        df, 
-        y='Комбинация', 
-        x='Процент успешности',
-        color_discrete_sequence=[color],
-        text='Количество',
-        height=height,
-        orientation='h'
-    )
-    
-    fig.update_layout(
-        title=f"Топ-{top_n} комбинаций ударов - {player}",
-        xaxis_title='Процент успешности (%)',
-        yaxis_title=None,
-        xaxis_range=[0, 100]
-    )
-    
-    return fig
 
-def display_player_recommendations(recommendations, detail_level):
+def cache_analysis(cache, cache_key, df, player_stats, point_index, timeline):
     """
-    Отображает рекомендации для игрока.
+    Сохраняет результат анализа файла в кэше с оценкой занимаемой памяти.
     """
-    if detail_level == "Минимальная":
-        # Для минимальной детализации показываем только самое важное
-        st.subheader("Ключевые рекомендации")
-        
-        # Объединяем все в один список
-        all_recs = []
-        for category, items in recommendations.items():
-            all_recs.extend(items)
-        
-        # Выбираем максимум 3 самые важные рекомендации
-        for rec in all_recs[:3]:
-            st.write(f"• {rec}")
-    else:
-        # Для средней и подробной детализации показываем по категориям
-        if recommendations['strengths']:
-            st.subheader("💪 Сильные стороны")
-            for strength in recommendations['strengths']:
-                st.write(f"• {strength}")
-        
-        if recommendations['improvements']:
-            st.subheader("🔄 Области для улучшения")
-            for improvement in recommendations['improvements']:
-                st.write(f"• {improvement}")
-        
-        if recommendations['tactics']:
-            st.subheader("🎯 Тактические рекомендации")
-            for tactic in recommendations['tactics']:
-                st.write(f"• {tactic}")
-        
-        if recommendations['training_focus']:
-            st.subheader("🏋️ Фокус тренировок")
-            for focus in recommendations['training_focus']:
-                st.write(f"• {focus}")
-        
-        if recommendations['mental_game']:
-            st.subheader("🧠 Ментальный аспект")
-            for mental in recommendations['mental_game']:
-                st.write(f"• {mental}")
+    frame_size = int(df.memory_usage(deep=True).sum()) if df is not None else 0
+    index_size = point_index.nbytes if point_index is not None else 0
+    stats_size = len(pickle.dumps((player_stats, timeline)))
+    cache.put(cache_key, (df, player_stats, point_index, timeline), frame_size + index_size + stats_size)
+
+def display_background_analysis(file_bytes, cache_key, sequence_lengths, settings, color_scheme, figure_cache, timer):
+    """
+    Фоновый анализ большого файла. Задача хранится в состоянии сессии и
+    переживает перезапуски сценария; пока она идет, выводятся прогресс,
+    кнопка отмены и статистика по уже обработанным частям. Возвращает задачу.
+    """
+    key, job = st.session_state.get("analysis_job", (None, None))
+    if job is None or key != cache_key:
+        if job is not None:
+            job.cancel()
+        job = BackgroundAnalysis(
+            file_bytes,
+            settings["chunk_size"],
+            sequence_lengths,
+            keep_frame=not settings["streaming"],
+            measure_memory=settings["diagnostics"]
+        ).start()
+        st.session_state["analysis_job"] = (cache_key, job)
+    
+    if job.state in ("done", "failed"):
+        del st.session_state["analysis_job"]
+        if job.error is not None:
+            raise job.error
+        return job
+    
+    if job.state == "cancelled":
+        st.info("Анализ отменен")
+        if st.button("Запустить заново", key="restart_analysis"):
+            del st.session_state["analysis_job"]
+            st.rerun()
+        return job
+    
+    progress = job.progress()
+    st.progress(
+        progress["fraction"],
+        text=f"{BACKGROUND_STAGES[progress['stage']]}: строк {progress['rows']:,}, розыгрышей {progress['points']:,}"
+    )
+    if st.button("Отменить анализ", key="cancel_analysis"):
+        job.cancel()
+        job.wait()
+        st.rerun()
+    
+    partial = job.partial()
+    if partial:
+        st.caption("Промежуточные результаты по прочитанной части файла")
+        display_match_stats(partial, settings, color_scheme, figure_cache, timer)
+    return job
 
 # Основная функция приложения
 def main():
+    started = time.perf_counter()
+    timer = StageTimer()
+    rows = points = None
+    
     st.title("Теннисная аналитика")
     
     # Добавляем настройки в сайдбар
     settings = add_settings_sidebar()
     color_scheme = get_color_scheme(settings)
     
+    # Кэш общий для всех сессий; лимиты задаются переменными окружения
+    cache = get_analysis_cache(
+        int(os.environ.get("TENNIS_CACHE_MAX_ENTRIES", 16)),
+        int(os.environ.get("TENNIS_CACHE_MAX_MB", 512)) * 1024 * 1024
+    )
+    figure_cache = get_figure_cache(int(os.environ.get("TENNIS_FIGURE_CACHE_MAX_ENTRIES", 256)))
+    
+    if settings["mode"] == "Пакетный анализ":
+        display_batch_analysis(settings, cache)
+        show_cache_stats(cache)
+        finish_timing(timer, settings, started)
+        return
+    
+    store = get_match_store(str(DEFAULT_STORE_PATH))
+    
+    if settings["mode"] == "История игрока":
+        display_player_history(store, settings, color_scheme, figure_cache, timer)
+        show_cache_stats(figure_cache, "Кэш графиков")
+        finish_timing(timer, settings, started)
+        return
+    
+    if settings["mode"] == "Живой матч":
+        tail = display_live_match(settings, color_scheme, figure_cache, timer)
+        show_cache_stats(figure_cache, "Кэш графиков")
+        if tail is None:
+            finish_timing(timer, settings, started)
+            return
+        finish_timing(timer, settings, started, tail.rows, tail.points)
+        # Повторный запуск скрипта через заданный интервал
+        if settings["live_autorefresh"]:
+            time.sleep(settings["live_interval"])
+            st.rerun()
+        return
+    
     # Загрузка данных
     uploaded_file = st.file_uploader("Загрузите CSV файл с данными матча", type=['csv'])
     
@@ -968,116 +861,111 @@ def main():
     
     if uploaded_file is not None:
         try:
-            # Чтение данных
-            df = pd.read_csv(uploaded_file)
-            
-            # Проверка обязательных столбцов
-            required_columns = ['Player_1', 'Serve', 'Shot Type']
-            if not all(col in df.columns for col in required_columns):
-                st.error("Загруженный файл не содержит необходимых столбцов для анализа")
-                return
+            file_bytes = uploaded_file.getvalue()
+            with timer.stage("cache_lookup"):
+                cache_key = file_content_hash(file_bytes)
+                sequence_lengths = (settings["sequence_length"],) if settings["sequence_length"] > 2 else ()
+                if sequence_lengths:
+                    cache_key += f":seq{settings['sequence_length']}"
+                cached = cache.get(cache_key)
             
-            # Анализ данных
-            player_stats = analyze_match_data(df)
-            players = list(player_stats.keys())
+            if cached is None:
+                # Бюджет памяти сеанса: при нехватке - потоковый анализ частями или отказ
+                settings, plan = apply_memory_budget(file_bytes, cache_key, settings)
+                if plan.mode == "refuse":
+                    show_cache_stats(cache)
+                    show_cache_stats(figure_cache, "Кэш графиков")
+                    finish_timing(timer, settings, started)
+                    return
             
-            if len(players) == 0:
-                st.error("Не удалось найти информацию об игроках в данных")
-                return
-            
-            # Показываем общую информацию
-            st.header("Общая информация")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.subheader(f"Игрок: {players[0]}")
-                st.write(f"Эйсы: {player_stats[players[0]].get('aces', 0)}")
-                st.write(f"Двойные ошибки: {player_stats[players[0]].get('double_faults', 0)}")
-                st.write(f"Процент первой подачи: {player_stats[players[0]].get('first_serve_pct', 0)}%")
-                st.write(f"Выигрыш на первой подаче: {player_stats[players[0]].get('first_serve_won_pct', 0)}%")
-                st.write(f"Выигрыш на второй подаче: {player_stats[players[0]].get('second_serve_won_pct', 0)}%")
-            
-            if len(players) > 1:
-                with col2:
-                    st.subheader(f"Игрок: {players[1]}")
-                    st.write(f"Эйсы: {player_stats[players[1]].get('aces', 0)}")
-                    st.write(f"Двойные ошибки: {player_stats[players[1]].get('double_faults', 0)}")
-                    st.write(f"Процент первой подачи: {player_stats[players[1]].get('first_serve_pct', 0)}%")
-                    st.write(f"Выигрыш на первой подаче: {player_stats[players[1]].get('first_serve_won_pct', 0)}%")
-                    st.write(f"Выигрыш на второй подаче: {player_stats[players[1]].get('second_serve_won_pct', 0)}%")
-            
-            # Визуализации
-            st.header("Визуализация данных")
-            
-            # График статистики подачи
-            st.plotly_chart(create_serve_stats_chart(player_stats, color_scheme, settings["chart_height"]), use_container_width=True)
-            
-            # График статистики розыгрышей
-            st.plotly_chart(create_rally_stats_chart(player_stats, color_scheme, settings["chart_height"]), use_container_width=True)
-            
-            # График типов ударов
-            st.plotly_chart(create_shot_types_chart(player_stats, color_scheme, settings["chart_height"]), use_container_width=True)
-            
-            # Зоны подачи и ключевые удары (в разных вкладках для каждого игрока)
-            st.header("Детальная статистика игроков")
-            
-            tabs = st.tabs(players)
-            for i, player in enumerate(players):
-                with tabs[i]:
-                    col1, col2 = st.columns(2)
+            if cached is not None:
+                df, player_stats, point_index, timeline = cached
+            elif settings["background"] and len(file_bytes) >= BACKGROUND_MIN_BYTES:
+                # Проверка обязательных столбцов по заголовку до запуска анализа
+                columns = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
+                if not all(col in columns for col in REQUIRED_COLUMNS):
+                    st.error("Загруженный файл не содержит необходимых столбцов для анализа")
+                    return
+                
+                job = display_background_analysis(
+                    file_bytes, cache_key, sequence_lengths, settings, color_scheme, figure_cache, timer
+                )
+                if job.state != "done":
+                    show_cache_stats(cache)
+                    show_cache_stats(figure_cache, "Кэш графиков")
+                    finish_timing(timer, settings, started)
+                    # Сценарий перезапускается, пока идет анализ
+                    if job.state == "running":
+                        time.sleep(BACKGROUND_POLL_SECONDS)
+                        st.rerun()
+                    return
+                
+                # Этапы фонового потока добавляются в замер сценария
+                for name, entry in job.timer.stages.items():
+                    timer.record(name, entry["seconds"], entry["rows"], entry["points"])
+                rows, points = job.timer.stages["stream_chunks"]["rows"], job.timer.stages["stream_chunks"]["points"]
+                df, player_stats, point_index, timeline = job.result
+                observe_memory(plan, job.peak_memory, len(file_bytes), settings)
+                cache_analysis(cache, cache_key, df, player_stats, point_index, timeline)
+            else:
+                # Пик памяти замеряется только в режиме диагностики: трассировка
+                # замедляет анализ в разы, а бюджет работает и по одной оценке
+                with track_memory(settings["diagnostics"]) as memory:
+                    # Чтение данных (в потоковом режиме - только заголовок)
+                    with timer.stage("read") as record:
+                        if settings["streaming"]:
+                            df = None
+                            columns = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
+                        else:
+                            df = read_match_table(file_bytes)
+                            columns = df.columns
+                            record["rows"] = len(df)
                     
-                    with col1:
-                        st.plotly_chart(
-                            create_serve_zones_chart(
-                                player_stats, player, 
-                                color_scheme['player1'] if i == 0 else color_scheme['player2'],
-                                settings["chart_height"]
-                            ),
-                            use_container_width=True
-                        )
+                    # Проверка обязательных столбцов
+                    if not all(col in columns for col in REQUIRED_COLUMNS):
+                        st.error("Загруженный файл не содержит необходимых столбцов для анализа")
+                        return
                     
-                    with col2:
-                        st.plotly_chart(
-                            create_key_shots_chart(
-                                player_stats, player, 
-                                color_scheme['player1'] if i == 0 else color_scheme['player2'],
-                                settings["chart_height"]
-                            ),
-                            use_container_width=True
-                        )
+                    # Анализ данных
+                    with timer.stage("analyze") as record:
+                        if settings["streaming"]:
+                            player_stats = analyze_match_data_streaming(
+                                io.BytesIO(file_bytes), settings["chunk_size"], timer, sequence_lengths
+                            )
+                        elif settings["analysis_engine"] == "Колоночный":
+                            player_stats = analyze_match_data_columnar(df, timer, sequence_lengths)
+                        elif settings["analysis_engine"] == "Параллельный":
+                            player_stats = analyze_match_data_parallel(df, timer=timer, sequence_lengths=sequence_lengths)
+                        else:
+                            player_stats = analyze_match_data(df, timer)
+                        
+                        # Числа строк и розыгрышей берутся из этапов движка
+                        inner = timer.stages.get("stream_chunks") or timer.stages.get("aggregate_points") or {}
+                        record["rows"] = inner.get("rows")
+                        record["points"] = inner.get("points")
+                    rows, points = record["rows"], record["points"]
                     
-                    # Комбинации ударов
-                    st.plotly_chart(
-                        create_shot_combinations_chart(
-                            player_stats, player, 
-                            color_scheme['player1'] if i == 0 else color_scheme['player2'],
-                            settings["chart_height"]
-                        ),
-                        use_container_width=True
-                    )
-            
-            # Рекомендации
-            st.header("Рекомендации для игроков")
+                    # Индекс и ход матча по розыгрышам (в потоковом режиме исходных строк нет)
+                    point_index = timeline = None
+                    if df is not None:
+                        with timer.stage("point_index", rows=len(df)) as record:
+                            point_index = PointIndex(df)
+                            timeline = point_timeline(point_index)
+                            record["points"] = len(point_index)
+                
+                observe_memory(plan, memory["peak"], len(file_bytes), settings)
+                cache_analysis(cache, cache_key, df, player_stats, point_index, timeline)
             
-            player_tabs = st.tabs(players)
-            for i, player in enumerate(players):
-                with player_tabs[i]:
-                    # Генерируем рекомендации
-                    opponent = players[1-i] if len(players) > 1 else None
-                    opponent_stats = player_stats[opponent] if opponent else None
-                    
-                    recommendations = generate_player_recommendations(
-                        player_stats[player], 
-                        opponent_stats, 
-                        settings["recommendation_detail"]
-                    )
-                    
-                    # Отображаем рекомендации
-                    display_player_recommendations(recommendations, settings["recommendation_detail"])
+            display_match_stats(player_stats, settings, color_scheme, figure_cache, timer, timeline, point_index)
+            save_match_to_store(store, file_bytes, player_stats, uploaded_file.name)
         
         except Exception as e:
             st.error(f"Произошла ошибка при анализе данных: {str(e)}")
             st.exception(e)
+    
+    show_cache_stats(cache)
+    show_cache_stats(figure_cache, "Кэш графиков")
+    finish_timing(timer, settings, started, rows, points)
 
 # Запуск приложения
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+"""
+Все движки анализа должны возвращать тот же player_stats, что и
+построчный analyze_match_data.
+"""
+import pandas as pd
+import pytest
+
+from tennis_analytics.columnar_cache import read_match_table
+from tennis_analytics.engine import ENGINES, analyze_match_data, analyze_match_data_columnar, analyze_match_data_streaming
+from tennis_analytics.parallel import analyze_match_data_parallel
+from tennis_analytics.synthetic import write_match_csv
+
+# Несколько матчей подряд (с тай-брейками и границами частей внутри матчей)
+ROWS = 6000
+
+@pytest.fixture(scope='module')
+def match_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('match') / 'match.csv'
+    write_match_csv(path, rows=ROWS, seed=7, chunk_rows=2000)
+    return path
+
+@pytest.fixture(scope='module')
+def expected(match_csv):
+    return analyze_match_data(pd.read_csv(match_csv))
+
+def test_synthetic_match_is_not_trivial(expected):
+    assert len(expected) == 2
+    assert all(stats['first_serve_total'] > 0 for stats in expected.values())
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_engine_matches_row_engine(engine, match_csv, expected):
+    assert ENGINES[engine](pd.read_csv(match_csv)) == expected
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_engine_accepts_encoded_frame(engine, match_csv, expected):
+    assert ENGINES[engine](read_match_table(match_csv, cache=False)) == expected
+
+@pytest.mark.parametrize('chunksize', [97, 1000, ROWS * 2])
+def test_streaming_matches_row_engine(chunksize, match_csv, expected):
+    assert analyze_match_data_streaming(match_csv, chunksize) == expected
+
+def test_parallel_matches_row_engine(match_csv, expected):
+    assert analyze_match_data_parallel(pd.read_csv(match_csv), workers=3, min_shard_rows=500) == expected
+
+def test_shot_sequences_agree(match_csv):
+    """
+    Последовательности ударов (построчный движок их не считает) совпадают
+    у колоночного, потокового и параллельного движков.
+    """
+    df = pd.read_csv(match_csv)
+    expected = analyze_match_data_columnar(df.copy(), sequence_lengths=(3, 4))
+    assert all(stats['shot_sequences'][3] for stats in expected.values())
+    assert analyze_match_data_streaming(match_csv, 250, sequence_lengths=(3, 4)) == expected
+    assert analyze_match_data_parallel(df, workers=3, min_shard_rows=500, sequence_lengths=(3, 4)) == expected
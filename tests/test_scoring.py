@@ -0,0 +1,51 @@
+"""
+Флаги ключевых моментов по счету в гейме: (брейк-пойнт, гейм-пойнт,
+напряженный момент). Счет записан с точки зрения подающего.
+"""
+import pandas as pd
+import pytest
+
+from tennis_analytics.scoring import NO_FLAGS, game_score_columns, game_score_flags, parse_game_score
+
+@pytest.mark.parametrize('score, flags', [
+    # Обычный гейм
+    ('0-0', (False, False, False)),
+    ('30-30', (False, False, True)),
+    ('40-40', (False, False, True)),     # ровно - не брейк-пойнт
+    ('30-40', (True, False, True)),
+    ('0-40', (True, False, True)),
+    ('40-A', (True, False, True)),
+    ('A-40', (False, True, True)),
+    ('40-15', (False, True, True)),
+    ('6-4 30-40', (True, False, True)),  # счет сета перед счетом гейма
+    # Тай-брейк: сет-болы подающего и принимающего
+    ('5-5', (False, False, True)),
+    ('6-5', (False, True, True)),
+    ('5-6', (True, False, True)),
+    ('6-6', (False, False, True)),
+    ('7-6', (False, True, True)),
+    ('4-3', (False, False, False)),
+    # Не счет
+    ('', NO_FLAGS),
+    ('A-30', NO_FLAGS),
+    (None, NO_FLAGS),
+])
+def test_game_score_flags(score, flags):
+    assert game_score_flags(score) == flags
+
+@pytest.mark.parametrize('score, state', [
+    ('40-40', (3, 3, False)),
+    ('A-40', (4, 3, False)),
+    ('15-0', (1, 0, False)),
+    ('5-5', (5, 5, True)),
+    ('6-5', (6, 5, True)),
+])
+def test_parse_game_score(score, state):
+    assert parse_game_score(score) == state
+
+def test_game_score_columns_match_flags():
+    scores = pd.Series(['40-40', '30-40', None, 'A-40', '6-5', '5-5', '30-40'])
+    columns = game_score_columns(scores)
+    expected = [game_score_flags(score) for score in scores]
+    assert [tuple(row) for row in columns.itertuples(index=False)] == expected
+    assert [tuple(row) for row in game_score_columns(scores.astype('category')).itertuples(index=False)] == expected
@@ -0,0 +1,70 @@
+"""
+Двоичный формат статистики (dumps_match_stats/loads_match_stats) и
+объединение статистики частей файла.
+"""
+import pytest
+
+from tennis_analytics.engine import analyze_match_data_columnar
+from tennis_analytics.parallel import shard_boundaries
+from tennis_analytics.stats import (
+    MAGIC,
+    PlayerStats,
+    dumps_match_stats,
+    loads_match_stats,
+    merge_match_stats,
+    pack_match_stats,
+    unpack_match_stats,
+)
+from tennis_analytics.synthetic import generate_match
+
+@pytest.fixture(scope='module')
+def match():
+    # Один длинный матч: победитель розыгрыша определяется по паре игроков
+    return generate_match(seed=3, best_of=5)
+
+def test_round_trip(match):
+    player_stats = analyze_match_data_columnar(match, sequence_lengths=(3, 5))
+    data = dumps_match_stats(pack_match_stats(player_stats))
+    assert data[:4] == MAGIC
+    assert unpack_match_stats(loads_match_stats(data)) == player_stats
+
+def test_round_trip_nan_player_and_empty_tables(match):
+    # Пропуск в столбце игрока (NaN) сохраняется как есть, пустые таблицы - пустыми
+    player_stats = analyze_match_data_columnar(match)
+    packed = pack_match_stats(player_stats)
+    packed[float('nan')] = PlayerStats()
+    restored = loads_match_stats(dumps_match_stats(packed))
+
+    *players, missing = restored
+    assert missing != missing
+    assert restored[missing].to_dict() == PlayerStats().to_dict()
+    assert {player: restored[player].to_dict() for player in players} == player_stats
+    assert loads_match_stats(dumps_match_stats({})) == {}
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        loads_match_stats(b'XXXX' + dumps_match_stats({})[4:])
+
+@pytest.mark.parametrize('shards', [2, 5])
+def test_merged_shards_match_whole_frame(match, shards):
+    """
+    Части по границам розыгрышей, проанализированные отдельно и
+    объединенные (через двоичный формат), дают статистику всего файла.
+    """
+    sequence_lengths = (3,)
+    expected = analyze_match_data_columnar(match.copy(), sequence_lengths=sequence_lengths)
+    boundaries = shard_boundaries(match, shards)
+    assert len(boundaries) == shards + 1
+
+    parts = [
+        dumps_match_stats(pack_match_stats(analyze_match_data_columnar(match.iloc[start:end], sequence_lengths=sequence_lengths)))
+        for start, end in zip(boundaries, boundaries[1:])
+    ]
+    merged = merge_match_stats(loads_match_stats(data) for data in parts)
+    assert unpack_match_stats(merged) == expected
+
+def test_merge_does_not_modify_inputs(match):
+    first = pack_match_stats(analyze_match_data_columnar(match))
+    before = unpack_match_stats(first)
+    merge_match_stats([first, first])
+    assert unpack_match_stats(first) == before
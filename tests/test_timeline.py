@@ -0,0 +1,18 @@
+"""
+Ход матча: взятые и проигранные подачи отмечаются только в геймах на подаче.
+"""
+from tennis_analytics.points import PointIndex
+from tennis_analytics.scoring import tiebreak_flags
+from tennis_analytics.synthetic import generate_match
+from tennis_analytics.timeline import point_timeline
+
+def test_tiebreak_points_are_not_service_games():
+    # В этом матче есть тай-брейк с сет-болами
+    index = PointIndex(generate_match(seed=8))
+    timeline = point_timeline(index)
+    tiebreak = tiebreak_flags(index.points['game_score'])
+    assert (tiebreak & timeline['game_point'].to_numpy()).any()
+
+    assert not (timeline['hold'] | timeline['break'])[tiebreak].any()
+    assert timeline['hold_streak'][tiebreak].isna().all()
+    assert timeline['hold'].any() and timeline['break'].any()